@@ -1,10 +1,12 @@
 from Logging_Mechanism.logger import info, error
 from AI_Based_Classification.classifier import classify_pages
+from Essentials.html_store import HtmlStore, PAGE_BLOB_COLUMNS, PAGE_BLOB_JOIN
 
 
 class SiteClassifier:
     def __init__(self, pool):
         self.pool = pool
+        self.html_store = HtmlStore(pool)
 
         # Selection
         self.total = 0
@@ -73,13 +75,13 @@ class SiteClassifier:
 
     async def classify_site(self, site_id: str):
         async with self.pool.acquire() as conn:
-            pages = await conn.fetch("""
-                SELECT raw_html
-                FROM Pages
-                WHERE site_id = $1
-                  AND raw_html IS NOT NULL
-                  AND octet_length(raw_html) > 200
-                ORDER BY crawl_date DESC
+            pages = await conn.fetch(f"""
+                SELECT {PAGE_BLOB_COLUMNS}
+                FROM Pages p
+                {PAGE_BLOB_JOIN}
+                WHERE p.site_id = $1
+                  AND COALESCE(b.raw_size, octet_length(p.raw_html)) > 200
+                ORDER BY p.crawl_date DESC
                 LIMIT 3
             """, site_id)
 
@@ -88,7 +90,7 @@ class SiteClassifier:
             info(f"💤 {site_id[:8]} skipped — no usable pages")
             return
 
-        html_pages = [p["raw_html"] for p in pages]
+        html_pages = [await self.html_store.page_html(p) for p in pages]
         self.attempted += 1
 
         keyword, confidence = classify_pages(html_pages)
@@ -19,15 +19,20 @@ from datetime import timezone
 
 from Logging_Mechanism.logger import *
 import atexit
+from Connector.connector import TorNetwork
+from Crawler.distributed import DistributedFrontier
 from Crawler.linkmanager import LinkManager
 from Crawler.seed import SeedCollector
 from Crawler.unified_crawler import UnifiedCrawler
 from Essentials.configs import *
+from Essentials.html_store import HtmlStore
+from Essentials.metrics import REGISTRY
 
 from Reports.queries import *
 from Reports.assembler import *
 from Reports.pdf_renderer import *
 import os
+import tempfile
 import hashlib
 
 
@@ -78,6 +83,18 @@ def run_background_loop(loop):
 threading.Thread(target=run_background_loop, args=(loop,), daemon=True).start()
 
 
+def on_crawler_loop(function, timeout: float = 5.0):
+    """Call a synchronous read of crawler state on the loop that mutates it (no races with Flask threads)."""
+    async def call():
+        return function()
+    return asyncio.run_coroutine_threadsafe(call(), loop).result(timeout=timeout)
+
+# Shared Tor layer: bootstrapped once, circuits and keep-alive connections reused by every crawl job
+tor_network = TorNetwork()
+if TOR_WARM_ON_STARTUP:
+    asyncio.run_coroutine_threadsafe(tor_network.start(), loop)
+
+
 @atexit.register
 def close_pool():
     global db_pool
@@ -85,6 +102,7 @@ def close_pool():
         future = asyncio.run_coroutine_threadsafe(db_pool.close(), loop)
         future.result()
         print("Closed asyncpg connection pool.")
+    asyncio.run_coroutine_threadsafe(tor_network.close(), loop).result(timeout=10)
 
 
 # ==================== ASYNC CRAWLER CORE ====================
@@ -93,7 +111,10 @@ async def run_crawler(
     keywords: list[str],
     manual_urls: list[str],
     crawl_depth: int,
-    polite_delay: float
+    polite_delay: float,
+    workers: int = 1,
+    parse_workers: int = 0,
+    revisit_limit: int = 0
 ):
     global crawler_status, crawler_progress, crawler_message, crawler_instance
 
@@ -111,7 +132,22 @@ async def run_crawler(
                 error(f"[CRAWLER INIT ERROR] {e}")
                 return
 
-        link_manager = LinkManager(pool=db_pool)  # type: ignore
+        link_manager = LinkManager(
+            pool=db_pool,  # type: ignore
+            visited_backend=VISITED_BACKEND,
+            visited_capacity=VISITED_CAPACITY,
+            revisit_budget_per_hour=REVISIT_BUDGET_PER_HOUR,
+            keywords=keywords
+        )
+
+        # Resume whatever the previous run left queued instead of re-crawling from scratch
+        crawler_message = "Restoring checkpointed crawl frontier..."
+        await link_manager.restore_frontier()
+
+        # Known sites the revisit policy considers due (by estimated change rate)
+        if revisit_limit:
+            crawler_message = "Scheduling revisits of known sites..."
+            await link_manager.init_LinksQueue(limit=revisit_limit)
 
         # --------------------------------------------------
         # 🔥 MANUAL URL INGESTION (CORRECT FOR YOUR LINKMANAGER)
@@ -148,15 +184,20 @@ async def run_crawler(
 
 
         # --------------------------------------------------
-        # 🔍 SEED COLLECTION (UNCHANGED)
+        # 🔍 SEED COLLECTION (ALL KEYWORDS x SOURCES CONCURRENTLY)
         # --------------------------------------------------
+        # Warm network layer: no-op after the first job (or the startup warm-up)
+        crawler_message = "Waiting for Tor bootstrap..."
+        if not await tor_network.start():
+            warning("Tor bootstrap not confirmed, crawling anyway")
+
         if keywords:
             crawler_message = f"Collecting seeds for: {', '.join(keywords)}"
-            seed = SeedCollector(
-                link_manager=link_manager
-            )
-            for kw in keywords:
-                await seed.collect_from_ahmia_and_duckduckgo(kw)
+            async with SeedCollector(
+                link_manager=link_manager,
+                visited_backend=VISITED_BACKEND
+            ) as seed:
+                await seed.collect_keywords(keywords)
             crawler_progress = 30
 
         # --------------------------------------------------
@@ -169,7 +210,10 @@ async def run_crawler(
         crawler_instance = UnifiedCrawler(
             link_manager=link_manager,
             max_depth=crawl_depth,
-            polite_delay=polite_delay
+            polite_delay=polite_delay,
+            workers=workers,
+            parse_workers=parse_workers,
+            network=tor_network
         )
 
         await crawler_instance.start()
@@ -268,15 +312,6 @@ def start_crawler():
     keywords = list(set(k.lower() for k in keywords if k))
     manual_urls = list(set(u.strip() for u in manual_urls if u))
 
-    # --------------------------------------------------
-    # VALIDATION
-    # --------------------------------------------------
-    if not keywords and not manual_urls:
-        return jsonify({
-            "status": "error",
-            "message": "Provide keywords OR manual .onion URLs or upload seed file"
-        }), 400
-
     # --------------------------------------------------
     # PARAMETERS
     # --------------------------------------------------
@@ -292,6 +327,18 @@ def start_crawler():
 
     crawl_depth = get_param("crawl_depth", 2, int)
     polite_delay = get_param("polite_delay", 2.0, float)
+    workers = max(1, min(get_param("workers", 1, int), 64))
+    parse_workers = max(0, min(get_param("parse_workers", 0, int), os.cpu_count() or 1))
+    revisit_limit = max(0, get_param("revisit", 0, int))
+
+    # --------------------------------------------------
+    # VALIDATION
+    # --------------------------------------------------
+    if not keywords and not manual_urls and not revisit_limit:
+        return jsonify({
+            "status": "error",
+            "message": "Provide keywords, manual .onion URLs, a seed file or a revisit count"
+        }), 400
 
     # --------------------------------------------------
     # START CRAWLER
@@ -305,7 +352,10 @@ def start_crawler():
             keywords,
             manual_urls,
             crawl_depth,
-            polite_delay
+            polite_delay,
+            workers,
+            parse_workers,
+            revisit_limit
         ),
         loop
     )
@@ -321,7 +371,10 @@ def start_crawler():
             "keywords": keywords,
             "manual_urls": manual_urls,
             "crawl_depth": crawl_depth,
-            "polite_delay": polite_delay
+            "polite_delay": polite_delay,
+            "workers": workers,
+            "parse_workers": parse_workers,
+            "revisit": revisit_limit
         }
     })
 
@@ -333,10 +386,56 @@ def crawler_status_api():
     return jsonify({
         "status": crawler_status,
         "progress": crawler_progress,
-        "message": crawler_message
+        "message": crawler_message,
+        "throughput": on_crawler_loop(crawler_instance.throughput) if crawler_instance else None
     })
 
 
+@app.route("/api/crawler/frontier", methods=["GET"])
+def crawler_frontier_api():
+    """Return per-domain queue depth and politeness wait-time stats"""
+    if not crawler_instance:
+        return jsonify({"status": "idle", "message": "No active crawler"}), 400
+    return jsonify({
+        "status": crawler_status,
+        "data": on_crawler_loop(crawler_instance.link_manager.frontier_stats),
+        "revisit_plan": crawler_instance.link_manager.revisit.last_plan
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_prometheus():
+    """Prometheus text exposition of crawler metrics"""
+    return Response(on_crawler_loop(REGISTRY.render_prometheus), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/metrics", methods=["GET"])
+def metrics_api():
+    """Crawler metrics as JSON (histograms summarised as count/avg/p50/p95/p99)"""
+    return jsonify({"status": "success", "data": on_crawler_loop(REGISTRY.snapshot)})
+
+
+@app.route("/api/network/status", methods=["GET"])
+def network_status_api():
+    """Shared Tor network layer: bootstrap state, reuse across jobs, circuit endpoints"""
+    return jsonify({"status": "success", "data": tor_network.status()})
+
+
+@app.route("/api/crawler/cluster", methods=["GET"])
+def crawler_cluster_api():
+    """Coordinator view of distributed crawling: shared queue states, nodes, domain locks"""
+    async def fetch():
+        await init_db_pool()
+        return await DistributedFrontier(db_pool).cluster_status()  # type: ignore
+
+    try:
+        data = asyncio.run_coroutine_threadsafe(fetch(), loop).result(timeout=10)
+    except Exception as e:
+        error(f"[CLUSTER STATUS ERROR] {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+    return jsonify({"status": "success", "data": data})
+
+
 @app.route("/api/crawler/stop", methods=["POST"])
 def stop_crawler():
     global crawler_task, crawler_instance, crawler_status, crawler_message
@@ -351,6 +450,83 @@ def stop_crawler():
     return jsonify({"status": "idle", "message": "No active crawler"}), 400
 
 
+# ==================== BULK SEED IMPORT ====================
+seed_import_task = None
+seed_import_stats = {}
+
+
+async def run_seed_import(file_path: str, source: str, keyword: str):
+    global seed_import_stats
+    try:
+        await init_db_pool()
+        link_manager = LinkManager(pool=db_pool, persist_frontier=False, buffered_writes=False)  # type: ignore
+        seed = SeedCollector(link_manager=link_manager, visited_backend=VISITED_BACKEND)
+        seed_import_stats = {"status": "running", "file": os.path.basename(file_path)}
+        stats = await seed.import_file(file_path, source=source, keyword=keyword)
+        seed_import_stats = {"status": "completed", **stats}
+    except Exception as e:
+        seed_import_stats = {"status": "error", "message": str(e)}
+        error(f"[SEED IMPORT ERROR] {e}")
+    finally:
+        os.remove(file_path)
+
+
+@app.route("/api/seeds/import", methods=["POST"])
+def import_seeds_api():
+    """Bulk-import an uploaded onion list into OnionSites (streamed, COPY-based)"""
+    global seed_import_task
+    if seed_import_task and not seed_import_task.done():
+        return jsonify({"status": "error", "message": "An import is already running"}), 400
+
+    file = request.files.get("seed_file")
+    if not file:
+        return jsonify({"status": "error", "message": "Upload a seed_file"}), 400
+
+    # Spool to disk so the import streams from a file instead of holding the upload in memory
+    fd, file_path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, "wb") as out:
+        file.save(out)
+
+    source = request.form.get("source", "File")
+    keyword = request.form.get("keyword", "")
+    seed_import_task = asyncio.run_coroutine_threadsafe(run_seed_import(file_path, source, keyword), loop)
+    return jsonify({"status": "success", "message": "Seed import started"})
+
+
+@app.route("/api/seeds/import", methods=["GET"])
+def import_seeds_status_api():
+    """Progress / throughput of the last bulk seed import"""
+    return jsonify({"status": "success", "data": seed_import_stats})
+
+
+
+# ==================== HTML STORAGE ====================
+async def run_dictionary_training(sample_limit: int):
+    await init_db_pool()
+    # A running crawl switches to the new dictionary at once; later crawls load it on start
+    if crawler_instance is not None:
+        store = crawler_instance.link_manager.html_store
+    else:
+        store = HtmlStore(db_pool)
+    await store.load_dictionaries()
+    return await store.train_dictionary(sample_limit=sample_limit)
+
+
+@app.route("/api/storage/dictionary", methods=["POST"])
+def train_html_dictionary_api():
+    """Train a zstd dictionary on recently stored pages; new blobs are compressed with it"""
+    sample_limit = get_int_param(request.args.get("sample_limit"), 2000, min_val=10, max_val=50_000)
+    try:
+        future = asyncio.run_coroutine_threadsafe(run_dictionary_training(sample_limit), loop)
+        dict_id = future.result(timeout=600)
+    except Exception as e:
+        error(f"[DICTIONARY TRAINING ERROR] {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+    if dict_id is None:
+        return jsonify({"status": "error", "message": "zstandard is not installed or no pages are stored"}), 400
+    info(f"🗜️ Trained HTML dictionary {dict_id} on up to {sample_limit} pages")
+    return jsonify({"status": "success", "data": {"dict_id": dict_id}})
+
 
 # ==================== MOCK DATA INITIALIZATION ====================
 
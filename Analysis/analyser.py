@@ -1,42 +1,104 @@
 import asyncio
+import hashlib
 import json
+import time
+from datetime import datetime, timezone
 import aiohttp
-from Logging_Mechanism.logger import info, error
-from .metadata_extractor import MetadataExtractor
+import asyncpg
+from Essentials.html_store import HtmlStore
+from Essentials.metrics import REGISTRY
+from Logging_Mechanism.logger import info, error, warning
+from .analysis_pool import AnalysisPool
 from .bitcoin_extractor import BitcoinExtractor
 from .transaction_analyzer import TransactionAnalyzer
+from .translation import Translator
+
+ANALYSIS_BATCH_SECONDS = REGISTRY.histogram(
+    "analysis_batch_seconds", "Duration of one PageAnalyzer batch", ("stage",)
+)
+ANALYSIS_PAGES = REGISTRY.counter("analysis_pages_total", "Pages analysed by outcome", ("status",))
+
+# AnalysisCache columns, in Metadata column order after page_id, then the BTC list
+CACHE_FIELDS = (
+    "title", "meta_tags", "emails", "pgp_keys", "pgp_fingerprints",
+    "xmr_addresses", "vendor_handles", "language", "translated_text", "btc_addresses",
+)
+CACHE_COLUMNS = ", ".join(f"c.{field}" for field in CACHE_FIELDS)
+
+# Errors caused by a row itself (constraint violations, invalid data such as NUL bytes)
+ROW_ERRORS = (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError)
 
 
 class PageAnalyzer:
     """
     Background analysis worker for OnionTraceX.
+    - Pulls a batch of unanalysed pages, extracts metadata and Bitcoin
+      addresses for all of them, then writes every Metadata and
+      BitcoinAddresses row in one transaction (executemany).
+    - A batch the database rejects is retried in halves; pages that still
+      fail, like pages that cannot be extracted, go to AnalysisFailures and
+      are skipped until they are crawled again.
+    - Batch size adapts to latency: it grows while full batches finish well
+      under `target_batch_seconds` and shrinks when they overrun it.
+    - With `workers` > 0 extraction fans out to a process pool (raw bytes in,
+      row tuples out), so throughput scales with cores.
+    - Results are cached per html_hash (AnalysisCache): pages whose content
+      was analysed before, or repeats within a batch, reuse them without parsing.
+    - Non-English pages are translated per batch through `translator`
+      (segment cache, pluggable backend, off the event loop).
     """
 
-    def __init__(self, pool, batch_size: int = 50, sleep_interval: int = 10):
+    def __init__(self, pool, batch_size: int = 50, sleep_interval: int = 10, min_batch_size: int = 10,
+                 max_batch_size: int = 1000, target_batch_seconds: float = 5.0, workers: int = 0,
+                 translator: Translator | None = None):
         self.pool = pool
         self.batch_size = batch_size
         self.sleep_interval = sleep_interval
-        self.btc_extractor = BitcoinExtractor()
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.target_batch_seconds = target_batch_seconds
+        self.html_store = HtmlStore(pool)
+        self.analysis_pool = AnalysisPool(workers=workers)
+        self.translator = translator or Translator(pool)
+
+        # Throughput stats
+        self.pages_analyzed = 0
+        self.pages_failed = 0
+        self.cache_hits = 0
+        self.batches = 0
+        self.last_batch_seconds = 0.0
 
     async def run(self):
-        info("🧠 PageAnalyzer started")
-        while True:
-            try:
-                processed = await self.analyze_unprocessed_pages()
-                if processed == 0:
+        info(f"🧠 PageAnalyzer started ({self.analysis_pool.workers or 'inline'} analysis worker(s))")
+        self.analysis_pool.start()
+        try:
+            while True:
+                try:
+                    processed = await self.analyze_unprocessed_pages()
+                    if processed == 0:
+                        await asyncio.sleep(self.sleep_interval)
+                except Exception as e:
+                    error(f"PageAnalyzer fatal error: {e}")
                     await asyncio.sleep(self.sleep_interval)
-            except Exception as e:
-                error(f"PageAnalyzer fatal error: {e}")
-                await asyncio.sleep(self.sleep_interval)
+        finally:
+            self.analysis_pool.shutdown()
 
     async def analyze_unprocessed_pages(self) -> int:
+        started = time.perf_counter()
         async with self.pool.acquire() as conn:
+            # Blob columns only for content without a cached analysis
             rows = await conn.fetch(
-                """
-                SELECT p.page_id, p.site_id, p.raw_html
+                f"""
+                SELECT p.page_id, p.site_id, p.html_hash,
+                       c.html_hash IS NOT NULL AS cached, {CACHE_COLUMNS},
+                       CASE WHEN c.html_hash IS NULL THEN p.raw_html END AS raw_html,
+                       b.codec, b.data AS blob, b.raw_size
                 FROM Pages p
+                LEFT JOIN AnalysisCache c ON c.html_hash = p.html_hash
+                LEFT JOIN HtmlBlobs b ON b.html_hash = p.html_hash AND c.html_hash IS NULL
                 LEFT JOIN Metadata m ON p.page_id = m.page_id
-                WHERE m.page_id IS NULL
+                LEFT JOIN AnalysisFailures f ON f.page_id = p.page_id AND f.failed_at >= p.crawl_date
+                WHERE m.page_id IS NULL AND f.page_id IS NULL
                 LIMIT $1;
                 """,
                 self.batch_size
@@ -46,95 +108,262 @@ class PageAnalyzer:
             info("🧠 No new pages to analyze")
             return 0
 
+        # ---------------- Extract (distinct uncached content only) ----------------
+        extract_started = time.perf_counter()
+        pages = []
+        cache_hits = []     # (row, cache entry) served without parsing
+        failures = []       # (page_id, html_hash, stage, error) to quarantine
+        duplicates = {}     # html_hash -> rows sharing content with a page analysed in this batch
         for row in rows:
+            html_hash = row["html_hash"]
+            if row["cached"]:
+                cache_hits.append((row, tuple(row[c] for c in CACHE_FIELDS)))
+                continue
+            if html_hash is not None and html_hash in duplicates:
+                duplicates[html_hash].append(row)
+                continue
             try:
-                await self._analyze_single_page(row)
+                pages.append((row["page_id"], row["site_id"], await self.html_store.page_html(row)))
             except Exception as e:
+                ANALYSIS_PAGES.inc(status="failed")
                 error(f"Page analysis failed for {row['page_id']}: {e}")
+                failures.append((row["page_id"], html_hash, "extract", f"{type(e).__name__}: {e}"))
+                continue
+            if html_hash is not None:
+                duplicates[html_hash] = []
+
+        hashes = {row["page_id"]: row["html_hash"] for row in rows}
+        analysed = []
+        for result in await self.analysis_pool.analyze_batch(pages):
+            if result[0] != "ok":
+                # Pages with the same content would fail the same way: quarantine them together
+                html_hash = hashes[result[1]]
+                failed = [result[1]] + [row["page_id"] for row in duplicates.pop(html_hash, ())]
+                ANALYSIS_PAGES.inc(len(failed), status="failed")
+                error(f"Page analysis failed for {', '.join(failed)}: {result[2]}")
+                failures.extend((page_id, html_hash, "extract", result[2]) for page_id in failed)
+                continue
+            analysed.append(result)
+        ANALYSIS_BATCH_SECONDS.observe(time.perf_counter() - extract_started, stage="extract")
 
-        info(f"🧠 Analyzed {len(rows)} pages")
+        # ---------------- Translate (whole batch, cached per segment) ----------------
+        translate_started = time.perf_counter()
+        translations, untranslated = await self._translate([(result[4], result[2][9]) for result in analysed])
+        ANALYSIS_BATCH_SECONDS.observe(time.perf_counter() - translate_started, stage="translate")
+
+        # One write per page: (page_id, html_hash, metadata row, BTC rows, AnalysisCache row or None, reused)
+        writes = []
+        for i, ((_, page_id, meta_row, page_btc, _), translated_text) in enumerate(zip(analysed, translations)):
+            meta_row = meta_row + (translated_text,)
+            html_hash = hashes[page_id]
+            cache_row = None
+            if html_hash is not None:
+                entry = meta_row[2:] + (json.dumps([[btc[1], btc[4]] for btc in page_btc]),)
+                # A failed translation is neither cached nor copied to this batch's duplicates:
+                # they stay unanalysed, so the next batch retries the translation for them
+                if i not in untranslated:
+                    cache_row = (html_hash,) + entry
+                    cache_hits.extend((row, entry) for row in duplicates.get(html_hash, ()))
+            writes.append((page_id, html_hash, meta_row, page_btc, cache_row, False))
+
+        for row, entry in cache_hits:
+            meta_row, page_btc = self._rows_from_cache(row["page_id"], row["site_id"], entry)
+            writes.append((row["page_id"], row["html_hash"], meta_row, page_btc, None, True))
+
+        # ---------------- Write (one transaction, split only if rejected) ----------------
+        write_started = time.perf_counter()
+        stored = await self._store(writes, failures)
+        await self._quarantine(failures)
+        ANALYSIS_BATCH_SECONDS.observe(time.perf_counter() - write_started, stage="write")
+
+        elapsed = time.perf_counter() - started
+        analyzed = len(analysed)
+        ANALYSIS_BATCH_SECONDS.observe(elapsed, stage="total")
+        ANALYSIS_PAGES.inc(analyzed, status="analyzed")
+        ANALYSIS_PAGES.inc(len(cache_hits), status="cached")
+        self.pages_analyzed += analyzed
+        self.pages_failed += len(failures)
+        self.cache_hits += len(cache_hits)
+        self.batches += 1
+        self.last_batch_seconds = elapsed
+        self._adapt_batch_size(len(rows), elapsed)
+
+        btc_count = len({btc[0] for write in writes for btc in write[3]})
+        info(
+            f"🧠 Analyzed {analyzed} pages, reused {len(cache_hits)} cached results "
+            f"({stored}/{len(rows)} stored, {len(failures)} quarantined), {btc_count} BTC addresses "
+            f"in {elapsed:.2f}s (next batch size {self.batch_size}, cache hit rate {self.cache_hit_rate():.1%})"
+        )
         return len(rows)
 
-    async def _analyze_single_page(self, row):
-        page_id = row["page_id"]
-        site_id = row["site_id"]
-        raw_html = row["raw_html"]
+    async def _translate(self, pages: list[tuple[list[str], str]]) -> tuple[list[str | None], set[int]]:
+        """translated_text per page plus failed page indexes; a failing translation never fails the batch."""
+        try:
+            return await self.translator.translate_pages(pages)
+        except Exception as e:
+            warning(f"Translation skipped for {len(pages)} pages: {e}")
+            return [None] * len(pages), set(range(len(pages)))
 
-        # ---------------- Metadata ----------------
-        meta = MetadataExtractor.extract(page_id, raw_html)
+    @staticmethod
+    def _rows_from_cache(page_id: str, site_id: str, entry: tuple) -> tuple[tuple, list[tuple]]:
+        """Metadata and BitcoinAddresses rows for a page whose content was analysed before."""
+        now = datetime.now(timezone.utc)
+        metadata_id = hashlib.sha256(f"{page_id}{now.isoformat()}".encode()).hexdigest()
+        meta_row = (metadata_id, page_id) + tuple(entry[:9])
+        btc_rows = [
+            (BitcoinExtractor._hash(address), address, site_id, page_id, valid, now)
+            for address, valid in json.loads(entry[9] or "[]")
+        ]
+        return meta_row, btc_rows
 
-        # ✅ Defensive defaults
-        pgp_keys = meta.get("pgp_keys", [])
-        pgp_fingerprints = meta.get("pgp_fingerprints", [])
-        xmr_addresses = meta.get("xmr_addresses", [])
-        vendor_handles = meta.get("vendor_handles", [])
-        emails = meta.get("emails", [])
-        meta_tags = meta.get("meta_tags", {})
+    def cache_hit_rate(self) -> float:
+        total = self.pages_analyzed + self.cache_hits
+        return self.cache_hits / total if total else 0.0
 
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO Metadata
-                (
-                    metadata_id,
-                    page_id,
-                    title,
-                    meta_tags,
-                    emails,
-
-                    pgp_keys,
-                    pgp_fingerprints,
-                    xmr_addresses,
-                    vendor_handles,
-
-                    language
-                )
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-                ON CONFLICT (metadata_id) DO NOTHING;
-                """,
-                meta["metadata_id"],
-                page_id,
-                meta.get("title"),
-                json.dumps(meta_tags),
-                json.dumps(emails),
-                json.dumps(pgp_keys),
-                json.dumps(pgp_fingerprints),
-                json.dumps(xmr_addresses),
-                json.dumps(vendor_handles),
-                meta.get("language")
-            )
+    def _adapt_batch_size(self, fetched: int, elapsed: float):
+        """Multiplicative step towards `target_batch_seconds`; only full batches may grow it."""
+        if elapsed > self.target_batch_seconds:
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+        elif fetched >= self.batch_size and elapsed < self.target_batch_seconds / 2:
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
 
+    async def _store(self, writes: list[tuple], failures: list[tuple]) -> int:
+        """
+        Write per-page results in one transaction. If the database rejects a row,
+        retry each half on its own, so one bad page (e.g. a NUL byte in its title)
+        costs O(log n) extra transactions and is added to `failures` alone.
+        Returns the number of pages stored; other errors are raised.
+        """
+        try:
+            await self._write_batch(writes)
+            return len(writes)
+        except ROW_ERRORS as e:
+            if len(writes) == 1:
+                ANALYSIS_PAGES.inc(status="failed")
+                error(f"Page analysis write rejected for {writes[0][0]}: {e}")
+                failures.append((writes[0][0], writes[0][1], "write", f"{type(e).__name__}: {e}"))
+                return 0
+            middle = len(writes) // 2
+            return await self._store(writes[:middle], failures) + await self._store(writes[middle:], failures)
 
+    async def _quarantine(self, failures: list[tuple]):
+        """Record pages that failed, so the next batches skip them until they are recrawled."""
+        if not failures:
+            return
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.executemany(
+                    """
+                    INSERT INTO AnalysisFailures (page_id, html_hash, stage, error)
+                    VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (page_id) DO UPDATE
+                    SET html_hash = EXCLUDED.html_hash,
+                        stage = EXCLUDED.stage,
+                        error = EXCLUDED.error,
+                        attempts = AnalysisFailures.attempts + 1,
+                        failed_at = NOW();
+                    """,
+                    [(page_id, html_hash, stage, message.replace("\x00", "")[:1000])
+                     for page_id, html_hash, stage, message in failures]
+                )
+            warning(f"⚠️ Quarantined {len(failures)} pages that could not be analysed")
+        except Exception as e:
+            error(f"Could not record {len(failures)} analysis failures: {e}")
 
-        # ---------------- Bitcoin Addresses (UNCHANGED) ----------------
-        btc_results = self.btc_extractor.extract_from_html(
-            raw_html.decode("utf-8", errors="ignore"),
-            site_id,
-            page_id
-        )
+    async def _write_batch(self, writes: list[tuple]):
+        if not writes:
+            return
+        metadata_rows = [write[2] for write in writes]
+        btc_rows = {}  # address_id -> row; one address seen on several pages is stored once
+        for write in writes:
+            for btc in write[3]:
+                btc_rows.setdefault(btc[0], btc)
+        btc_rows = list(btc_rows.values())
+        cache_rows = [write[4] for write in writes if write[4] is not None]
+        reused = {}  # html_hash -> pages served from AnalysisCache
+        for write in writes:
+            if write[5]:
+                reused[write[1]] = reused.get(write[1], 0) + 1
+        reuse_counts = [(n, html_hash) for html_hash, n in reused.items()]
 
         async with self.pool.acquire() as conn:
-            for btc in btc_results:
-                await conn.execute(
+            async with conn.transaction():
+                if cache_rows:
+                    await conn.executemany(
+                        """
+                        INSERT INTO AnalysisCache
+                        (
+                            html_hash,
+                            title,
+                            meta_tags,
+                            emails,
+                            pgp_keys,
+                            pgp_fingerprints,
+                            xmr_addresses,
+                            vendor_handles,
+                            language,
+                            translated_text,
+                            btc_addresses
+                        )
+                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+                        ON CONFLICT (html_hash) DO NOTHING;
+                        """,
+                        cache_rows
+                    )
+                if reuse_counts:
+                    await conn.executemany(
+                        "UPDATE AnalysisCache SET reuse_count = reuse_count + $1 WHERE html_hash = $2;",
+                        reuse_counts
+                    )
+                await conn.executemany(
                     """
-                    INSERT INTO BitcoinAddresses
+                    INSERT INTO Metadata
                     (
-                        address_id,
-                        address,
-                        site_id,
+                        metadata_id,
                         page_id,
-                        valid,
-                        detected_at
+                        title,
+                        meta_tags,
+                        emails,
+
+                        pgp_keys,
+                        pgp_fingerprints,
+                        xmr_addresses,
+                        vendor_handles,
+
+                        language,
+                        translated_text
                     )
-                    VALUES ($1, $2, $3, $4, $5, $6)
-                    ON CONFLICT (address_id) DO NOTHING;
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+                    ON CONFLICT (metadata_id) DO NOTHING;
                     """,
-                    btc["address_id"],
-                    btc["address"],
-                    btc["site_id"],
-                    btc["page_id"],
-                    btc["valid"],
-                    btc["detected_at"]
+                    metadata_rows
                 )
+                if btc_rows:
+                    await conn.executemany(
+                        """
+                        INSERT INTO BitcoinAddresses
+                        (
+                            address_id,
+                            address,
+                            site_id,
+                            page_id,
+                            valid,
+                            detected_at
+                        )
+                        VALUES ($1, $2, $3, $4, $5, $6)
+                        ON CONFLICT (address_id) DO NOTHING;
+                        """,
+                        btc_rows
+                    )
 
-        info(f"📄 Page fully enriched (Phase-2): {page_id}")
+    def stats(self) -> dict:
+        return {
+            "pages_analyzed": self.pages_analyzed,
+            "pages_failed": self.pages_failed,
+            "cache_hits": self.cache_hits,
+            "cache_hit_rate": round(self.cache_hit_rate(), 3),
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+            "last_batch_seconds": round(self.last_batch_seconds, 3),
+            "translation": self.translator.stats(),
+        }
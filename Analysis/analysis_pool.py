@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .artifact_scanner import ArtifactScanner, group_hits
+from .bitcoin_extractor import BitcoinExtractor
+from .metadata_extractor import MetadataExtractor
+
+# Pages per task sent to a worker: amortises pickling/IPC without starving other workers
+DEFAULT_CHUNK_SIZE = 8
+
+_btc_extractor = None
+_scanner = ArtifactScanner()
+
+
+def _worker_init():
+    """Per-process setup: deterministic language detection, one BitcoinExtractor."""
+    global _btc_extractor
+    try:
+        from langdetect import DetectorFactory
+        DetectorFactory.seed = 0
+    except ImportError:
+        pass
+    _btc_extractor = BitcoinExtractor()
+
+
+def analyze_page(page_id: str, site_id: str, html: bytes) -> tuple[tuple, list[tuple], list[str]]:
+    """
+    CPU-bound analysis of one page. Runs in a worker process (or inline).
+    Returns the Metadata row (without translated_text), the BitcoinAddresses
+    rows, already in DB column order so only compact tuples cross the process
+    boundary, and the text segments to translate (empty for English pages).
+    """
+    if _btc_extractor is None:
+        _worker_init()
+    # Decode and scan once; both extractors reuse the text and the artifact hits
+    text = html.decode("utf-8", errors="ignore")
+    artifacts = group_hits(_scanner.scan_text(text))
+    meta = MetadataExtractor.extract(page_id, html, text=text, artifacts=artifacts)
+    meta_row = (
+        meta["metadata_id"],
+        page_id,
+        meta.get("title"),
+        json.dumps(meta.get("meta_tags", {})),
+        json.dumps(meta.get("emails", [])),
+        json.dumps(meta.get("pgp_keys", [])),
+        json.dumps(meta.get("pgp_fingerprints", [])),
+        json.dumps(meta.get("xmr_addresses", [])),
+        json.dumps(meta.get("vendor_handles", [])),
+        meta.get("language"),
+    )
+    btc_rows = [
+        (btc["address_id"], btc["address"], btc["site_id"], btc["page_id"], btc["valid"], btc["detected_at"])
+        for btc in _btc_extractor.extract_from_html(text, site_id, page_id, artifacts=artifacts)
+    ]
+    return meta_row, btc_rows, meta["segments"]
+
+
+def analyze_chunk(pages: list[tuple[str, str, bytes]]) -> list[tuple]:
+    """
+    Analyse several pages in one task. Each result is ("ok", page_id, meta_row, btc_rows, segments)
+    or ("error", page_id, message), so one bad page does not fail its chunk.
+    """
+    results = []
+    for page_id, site_id, html in pages:
+        try:
+            meta_row, btc_rows, segments = analyze_page(page_id, site_id, html)
+            results.append(("ok", page_id, meta_row, btc_rows, segments))
+        except Exception as e:
+            results.append(("error", page_id, f"{type(e).__name__}: {e}"))
+    return results
+
+
+class AnalysisPool:
+    """
+    Process pool for PageAnalyzer's extraction stage.
+    - `workers=0` analyses inline on the event loop (previous behaviour).
+    - Otherwise a batch is split into chunks of raw HTML bytes and fanned out
+      to a ProcessPoolExecutor; results come back as compact row tuples.
+    """
+
+    def __init__(self, workers: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.workers = max(0, int(workers))
+        self.chunk_size = max(1, chunk_size)
+        self._executor = None
+
+    @staticmethod
+    def default_workers() -> int:
+        """All cores but one, which stays free for the event loop and PostgreSQL client."""
+        return max(1, (os.cpu_count() or 2) - 1)
+
+    def start(self):
+        if self.workers and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_worker_init)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def analyze_batch(self, pages: list[tuple[str, str, bytes]]) -> list[tuple]:
+        """Results of `analyze_chunk` for every (page_id, site_id, html) in `pages`, in order."""
+        if self._executor is None:
+            return analyze_chunk(pages)
+        loop = asyncio.get_running_loop()
+        # Aim for at least two chunks per worker so a slow page does not idle the rest
+        size = max(1, min(self.chunk_size, -(-len(pages) // (self.workers * 2))))
+        chunks = [pages[i:i + size] for i in range(0, len(pages), size)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, analyze_chunk, chunk) for chunk in chunks
+        ))
+        return [result for chunk in results for result in chunk]
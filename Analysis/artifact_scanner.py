@@ -0,0 +1,174 @@
+import re
+from typing import NamedTuple
+
+# Hit kinds
+EMAIL = "email"
+PGP_KEY = "pgp_key"
+XMR = "xmr"
+BTC_BASE58 = "btc_base58"
+BTC_BECH32 = "btc_bech32"
+VENDOR_HANDLE = "vendor_handle"
+KINDS = (EMAIL, PGP_KEY, XMR, BTC_BASE58, BTC_BECH32, VENDOR_HANDLE)
+
+PGP_BEGIN = "-----BEGIN PGP PUBLIC KEY BLOCK-----"
+PGP_END = "-----END PGP PUBLIC KEY BLOCK-----"
+_VENDOR_WORDS = r"vendor|seller|dealer|admin|operator"
+
+# ---------- Reference patterns (MetadataExtractor / BitcoinExtractor) ----------
+EMAIL_REGEX = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+PGP_BLOCK_REGEX = re.compile(rf"{PGP_BEGIN}.*?{PGP_END}", re.DOTALL)
+XMR_REGEX = re.compile(r"(?:^|[^A-Za-z0-9])(4|8)[0-9A-Za-z]{94,105}(?:$|[^A-Za-z0-9])")
+VENDOR_HANDLE_REGEX = re.compile(rf"({_VENDOR_WORDS})[\s:]+([a-zA-Z0-9_-]{{3,30}})", re.IGNORECASE)
+BASE58_PATTERN = re.compile(r"\b[13][a-km-zA-HJ-NP-Z1-9]{25,34}\b")
+BECH32_PATTERN = re.compile(r"\bbc1[ac-hj-np-z02-9]{11,71}\b")
+
+# Address-length word runs: every BTC / XMR candidate is (inside) one of these
+_WORD_RUN = re.compile(r"\b\w{14,}")
+# The vendor pattern behind a first-letter prefilter (ſ folds to s under IGNORECASE)
+_VENDOR_PREFILTERED = re.compile(rf"(?=[vsdaoVSDAO\u017f]){VENDOR_HANDLE_REGEX.pattern}", re.IGNORECASE)
+
+# Addresses are bounded by \b and made of word characters, so a match is always a whole word run
+_BASE58_RUN = re.compile(r"[13][a-km-zA-HJ-NP-Z1-9]{25,34}")
+_BECH32_RUN = re.compile(r"bc1[ac-hj-np-z02-9]{11,71}")
+_ALNUM_RUN = re.compile(r"[0-9A-Za-z]+")
+_EMAIL_LOCAL = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.+-")
+
+
+class ArtifactHit(NamedTuple):
+    kind: str
+    value: str
+    start: int  # byte offsets of `value` in the page
+    end: int
+
+
+class ArtifactScanner:
+    """
+    Single-pass artifact scanner for emails, PGP key blocks, XMR, BTC
+    (Base58 and Bech32) addresses and vendor handles.
+    - The page is decoded once. Instead of six regex scans, one pass over
+      address-length word runs yields every BTC/XMR candidate, '@' and PGP
+      armour are located with str.find, and the vendor pattern runs behind a
+      first-letter prefilter.
+    - Verification reproduces the original patterns' non-overlapping
+      `finditer` semantics of the reference patterns above, so the value sets
+      are identical to running each of them over the page.
+    - Hits are typed and carry byte offsets into the original bytes (exact for
+      valid UTF-8; invalid sequences are dropped by decoding, as before).
+    """
+
+    def scan(self, html: bytes | str) -> list[ArtifactHit]:
+        text = html.decode("utf-8", errors="ignore") if isinstance(html, bytes) else html
+        return self.scan_text(text)
+
+    def scan_text(self, text: str) -> list[ArtifactHit]:
+        spans = []  # (kind, value, char_start, char_end)
+
+        # Addresses: one pass over word runs, each verified in place
+        xmr_end = 0
+        for m in _WORD_RUN.finditer(text):
+            start, end = m.span()
+            run = m.group()
+            length = end - start
+            if length <= 35 and _BASE58_RUN.fullmatch(run):
+                spans.append((BTC_BASE58, run, start, end))
+            if length <= 74 and _BECH32_RUN.fullmatch(run):
+                spans.append((BTC_BECH32, run, start, end))
+            if length >= 95:
+                xmr_end = self._xmr(text, start, end, xmr_end, spans)
+
+        # Emails: anchored on '@', located with str.find
+        email_end = 0
+        at = text.find("@")
+        while at != -1:
+            email_end = self._email(text, at, email_end, spans)
+            at = text.find("@", at + 1)
+
+        # PGP armour: non-overlapping BEGIN ... first END
+        begin = text.find(PGP_BEGIN)
+        while begin != -1:
+            close = text.find(PGP_END, begin + len(PGP_BEGIN))
+            if close == -1:
+                break
+            pgp_end = close + len(PGP_END)
+            spans.append((PGP_KEY, text[begin:pgp_end], begin, pgp_end))
+            begin = text.find(PGP_BEGIN, pgp_end)
+
+        for m in _VENDOR_PREFILTERED.finditer(text):
+            spans.append((VENDOR_HANDLE, m.group(2), m.start(2), m.end(2)))
+
+        spans.sort(key=lambda span: span[2])
+        return self._to_bytes(text, spans)
+
+    # ---------- Verifiers ----------
+    @staticmethod
+    def _email(text: str, at: int, floor: int, spans: list) -> int:
+        """Email whose '@' is at `at`; `floor` is where the previous email ended (no overlaps)."""
+        start = at
+        while start > floor and text[start - 1] in _EMAIL_LOCAL:
+            start -= 1
+        if start == at:
+            return floor
+        match = EMAIL_REGEX.match(text, start)
+        if match is None:
+            return floor
+        spans.append((EMAIL, match.group(), start, match.end()))
+        return match.end()
+
+    @staticmethod
+    def _xmr(text: str, start: int, end: int, floor: int, spans: list) -> int:
+        """
+        XMR candidates among the alphanumeric sub-runs of a word run. The
+        original pattern consumes one boundary character on each side (kept in
+        the value unless it is whitespace), so a run right after a previous
+        match's trailing boundary is not matched.
+        """
+        for run in _ALNUM_RUN.finditer(text, start, end):
+            r, e = run.span()
+            if not 95 <= e - r <= 106 or text[r] not in "48":
+                continue
+            if r > 0 and r - 1 < floor:
+                continue
+            left = r - 1 if r > 0 else 0
+            if e == len(text) or (e == len(text) - 1 and text[e] == "\n"):
+                right = e
+            else:
+                right = e + 1
+            raw = text[left:right]
+            value = raw.strip()
+            offset = left + (len(raw) - len(raw.lstrip()))
+            spans.append((XMR, value, offset, offset + len(value)))
+            floor = right
+        return floor
+
+    @staticmethod
+    def _to_bytes(text: str, spans: list) -> list[ArtifactHit]:
+        if text.isascii():
+            return [ArtifactHit(*span) for span in spans]
+        # Convert char offsets to UTF-8 byte offsets with one forward walk
+        positions = sorted({p for _, _, s, e in spans for p in (s, e)})
+        byte_at, last_char, last_byte = {}, 0, 0
+        for p in positions:
+            last_byte += len(text[last_char:p].encode("utf-8"))
+            last_char = p
+            byte_at[p] = last_byte
+        return [ArtifactHit(kind, value, byte_at[s], byte_at[e]) for kind, value, s, e in spans]
+
+
+def group_hits(hits: list[ArtifactHit]) -> dict[str, set[str]]:
+    """Distinct values per kind (every kind present, possibly empty)."""
+    grouped = {kind: set() for kind in KINDS}
+    for hit in hits:
+        grouped[hit.kind].add(hit.value)
+    return grouped
+
+
+def legacy_artifacts(text: str) -> dict[str, set[str]]:
+    """The separate-regex path the scanner replaces; kept as the reference for equivalence checks."""
+    return {
+        EMAIL: set(EMAIL_REGEX.findall(text)),
+        PGP_KEY: set(PGP_BLOCK_REGEX.findall(text)),
+        XMR: {m.group(0).strip() for m in XMR_REGEX.finditer(text)},
+        BTC_BASE58: set(BASE58_PATTERN.findall(text)),
+        BTC_BECH32: set(BECH32_PATTERN.findall(text)),
+        VENDOR_HANDLE: {m.group(2) for m in VENDOR_HANDLE_REGEX.finditer(text)},
+    }
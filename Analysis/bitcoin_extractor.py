@@ -1,10 +1,11 @@
-import re
 import hashlib
 from datetime import datetime, timezone
-from typing import List, Dict
+from typing import List, Dict, Optional, Set
 
 import base58
 
+from . import artifact_scanner
+
 
 class BitcoinExtractor:
     """
@@ -13,8 +14,8 @@ class BitcoinExtractor:
     """
 
     # Regex patterns (candidate extraction only)
-    BASE58_PATTERN = re.compile(r'\b[13][a-km-zA-HJ-NP-Z1-9]{25,34}\b')
-    BECH32_PATTERN = re.compile(r'\bbc1[ac-hj-np-z02-9]{11,71}\b')
+    BASE58_PATTERN = artifact_scanner.BASE58_PATTERN
+    BECH32_PATTERN = artifact_scanner.BECH32_PATTERN
 
     def __init__(self, enable_bech32: bool = True):
         self.enable_bech32 = enable_bech32
@@ -26,10 +27,12 @@ class BitcoinExtractor:
         self,
         html: str,
         site_id: str,
-        page_id: str
+        page_id: str,
+        artifacts: Optional[Dict[str, Set[str]]] = None
     ) -> List[Dict]:
         """
         Extract and validate Bitcoin addresses from raw HTML.
+        `artifacts` (`group_hits` of an ArtifactScanner pass) skips the regex scan.
 
         Returns:
             List of dictionaries ready for DB insertion.
@@ -38,11 +41,16 @@ class BitcoinExtractor:
         results = []
         now = datetime.now(timezone.utc)
 
-        # Step 1: Regex extraction
-        candidates = set(self.BASE58_PATTERN.findall(html))
+        # Step 1: Candidate extraction
+        if artifacts is not None:
+            candidates = set(artifacts[artifact_scanner.BTC_BASE58])
+            if self.enable_bech32:
+                candidates.update(artifacts[artifact_scanner.BTC_BECH32])
+        else:
+            candidates = set(self.BASE58_PATTERN.findall(html))
 
-        if self.enable_bech32:
-            candidates.update(self.BECH32_PATTERN.findall(html))
+            if self.enable_bech32:
+                candidates.update(self.BECH32_PATTERN.findall(html))
 
         # Step 2: Validation
         for address in candidates:
@@ -1,55 +1,38 @@
-import re
 import hashlib
 from bs4 import BeautifulSoup
 from datetime import datetime, timezone
 from langdetect import detect, LangDetectException
-from deep_translator import GoogleTranslator
 
+from . import artifact_scanner
+from .artifact_scanner import ArtifactScanner, group_hits
+from .translation import split_segments
 
-class MetadataExtractor:
-
-    EMAIL_REGEX = re.compile(
-        r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"
-    )
 
-    PGP_BLOCK_REGEX = re.compile(
-        r"-----BEGIN PGP PUBLIC KEY BLOCK-----.*?-----END PGP PUBLIC KEY BLOCK-----",
-        re.DOTALL
-    )
+class MetadataExtractor:
 
-    XMR_REGEX = re.compile(
-        r"(?:^|[^A-Za-z0-9])(4|8)[0-9A-Za-z]{94,105}(?:$|[^A-Za-z0-9])"
-    )
+    # Patterns live in the artifact scanner, which finds all of them in one pass
+    EMAIL_REGEX = artifact_scanner.EMAIL_REGEX
+    PGP_BLOCK_REGEX = artifact_scanner.PGP_BLOCK_REGEX
+    XMR_REGEX = artifact_scanner.XMR_REGEX
+    VENDOR_HANDLE_REGEX = artifact_scanner.VENDOR_HANDLE_REGEX
 
-    VENDOR_HANDLE_REGEX = re.compile(
-        r"(vendor|seller|dealer|admin|operator)[\s:]+([a-zA-Z0-9_-]{3,30})",
-        re.IGNORECASE
-    )
+    SCANNER = ArtifactScanner()
 
     @staticmethod
     def extract_pgp_fingerprint(pgp_block: str) -> str:
         return hashlib.sha1(pgp_block.encode()).hexdigest()
 
     @staticmethod
-    def translate_to_english(text: str, lang: str) -> str:
+    def extract(page_id: str, html: bytes, text: str | None = None, artifacts: dict | None = None):
         """
-        Translate non-English text to English.
-        Safe fallback: return original text on failure.
+        `text` (the decoded page) and `artifacts` (`group_hits` of a scan) can be
+        passed in when the caller already has them, so the page is decoded and
+        scanned only once.
         """
-        if not text.strip() or lang in ("en", "unknown"):
-            return text
-
-        try:
-            return GoogleTranslator(
-                source=lang,
-                target="en"
-            ).translate(text)
-        except Exception:
-            return text
-
-    @staticmethod
-    def extract(page_id: str, html: bytes):
-        text = html.decode("utf-8", errors="ignore")
+        if text is None:
+            text = html.decode("utf-8", errors="ignore")
+        if artifacts is None:
+            artifacts = group_hits(MetadataExtractor.SCANNER.scan_text(text))
         soup = BeautifulSoup(text, "html.parser")
 
         # -------- Title --------
@@ -68,10 +51,10 @@ class MetadataExtractor:
                 meta_tags[str(name)] = str(content)
 
         # -------- Emails --------
-        emails = list(set(MetadataExtractor.EMAIL_REGEX.findall(text)))
+        emails = list(artifacts[artifact_scanner.EMAIL])
 
         # -------- PGP Keys + Fingerprints --------
-        pgp_keys = list(set(MetadataExtractor.PGP_BLOCK_REGEX.findall(text)))
+        pgp_keys = list(artifacts[artifact_scanner.PGP_KEY])
 
         pgp_fingerprints = list({
             MetadataExtractor.extract_pgp_fingerprint(block)
@@ -79,16 +62,10 @@ class MetadataExtractor:
         })
 
         # -------- XMR Addresses --------
-        xmr_addresses = list({
-            match.group(0).strip()
-            for match in MetadataExtractor.XMR_REGEX.finditer(text)
-        })
+        xmr_addresses = list(artifacts[artifact_scanner.XMR])
 
         # -------- Vendor Handles --------
-        vendor_handles = list({
-            match.group(2)
-            for match in MetadataExtractor.VENDOR_HANDLE_REGEX.finditer(text)
-        })
+        vendor_handles = list(artifacts[artifact_scanner.VENDOR_HANDLE])
 
         # -------- Language detection --------
         try:
@@ -96,11 +73,13 @@ class MetadataExtractor:
         except LangDetectException:
             language = "unknown"
 
-        # -------- Translate if needed --------
-        translated_text = MetadataExtractor.translate_to_english(
-            text=text,
-            lang=language
-        )
+        # -------- Segments to translate --------
+        # Translation itself is batched and cached by PageAnalyzer (Translator)
+        segments = []
+        if language not in ("en", "unknown"):
+            for tag in soup(["script", "style", "noscript"]):
+                tag.decompose()
+            segments = split_segments(soup.get_text("\n"))
 
         metadata_id = hashlib.sha256(
             f"{page_id}{datetime.now(timezone.utc).isoformat()}".encode()
@@ -114,6 +93,9 @@ class MetadataExtractor:
             "meta_tags": meta_tags,
             "emails": emails,
             "pgp_keys": pgp_keys,
+            "pgp_fingerprints": pgp_fingerprints,
+            "xmr_addresses": xmr_addresses,
+            "vendor_handles": vendor_handles,
             "language": language,
-            "translated_text": translated_text
+            "segments": segments
         }
@@ -3,6 +3,7 @@ import asyncpg
 
 from Logging_Mechanism.logger import info, error
 from .analyser import PageAnalyzer
+from .analysis_pool import AnalysisPool
 from .transaction_worker import TransactionWorker
 
 
@@ -27,7 +28,7 @@ async def main():
         return
 
     # Initialize workers
-    page_analyzer = PageAnalyzer(pool)
+    page_analyzer = PageAnalyzer(pool, workers=AnalysisPool.default_workers())
     tx_worker = TransactionWorker(pool)
 
     info("🧠 Starting PageAnalyzer and TransactionWorker")
@@ -0,0 +1,304 @@
+import asyncio
+import hashlib
+import re
+from collections import OrderedDict
+
+from Essentials.configs import TRANSLATION_BACKEND, TRANSLATION_CACHE_SIZE, TRANSLATION_CONCURRENCY
+from Essentials.metrics import REGISTRY
+from Logging_Mechanism.logger import warning, error
+
+TRANSLATION_SEGMENTS = REGISTRY.counter(
+    "analysis_translation_segments_total", "Translated segments by source", ("source",)
+)
+TRANSLATION_SECONDS = REGISTRY.histogram(
+    "analysis_translation_seconds", "Duration of one backend translation call", ("backend",)
+)
+
+# Sentence ends (Latin, CJK, Arabic) or line breaks
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?。！？؟])\s+|\n+")
+SKIP_LANGUAGES = ("unknown",)
+
+
+# ---------- Segmentation ----------
+def split_segments(text: str, max_segment_chars: int = 1000, max_segments: int = 500) -> list[str]:
+    """
+    Sentence-level segments of visible page text, whitespace-normalised.
+    Segments without letters are dropped and repeats (menus, footers) are kept
+    once, so boilerplate is translated a single time per page.
+    """
+    seen, segments = set(), []
+    for part in SENTENCE_SPLIT.split(text):
+        segment = " ".join(part.split())
+        if len(segment) < 2 or not any(ch.isalpha() for ch in segment):
+            continue
+        # Hard-wrap run-on text without sentence punctuation at word boundaries
+        while len(segment) > max_segment_chars:
+            cut = segment.rfind(" ", 0, max_segment_chars)
+            cut = cut if cut > 0 else max_segment_chars
+            piece, segment = segment[:cut], segment[cut:].lstrip()
+            if piece not in seen:
+                seen.add(piece)
+                segments.append(piece)
+        if segment and segment not in seen:
+            seen.add(segment)
+            segments.append(segment)
+        if len(segments) >= max_segments:
+            break
+    return segments[:max_segments]
+
+
+def segment_key(segment: str, source: str, target: str, backend: str) -> str:
+    return hashlib.sha256(f"{backend}\x00{source}\x00{target}\x00{segment}".encode()).hexdigest()
+
+
+# ---------- Backends ----------
+class TranslationBackend:
+    """
+    A translation engine. `translate_batch` is blocking and is always called
+    from a worker thread; it returns one translation per input segment.
+    """
+
+    name = "base"
+    max_chars = 4500  # characters per call
+
+    def translate_batch(self, segments: list[str], source: str, target: str) -> list[str]:
+        raise NotImplementedError
+
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate via deep_translator (optional dependency)."""
+
+    name = "google"
+
+    def _translator(self, source: str, target: str):
+        from deep_translator import GoogleTranslator
+        try:
+            return GoogleTranslator(source=source, target=target)
+        except Exception:
+            # langdetect codes do not always match Google's (e.g. zh-cn / zh-CN)
+            return GoogleTranslator(source="auto", target=target)
+
+    def translate_batch(self, segments: list[str], source: str, target: str) -> list[str]:
+        translator = self._translator(source, target)
+        # One request per chunk; segments travel as lines and come back in order
+        lines = (translator.translate("\n".join(segments)) or "").split("\n")
+        if len(lines) == len(segments):
+            return lines
+        return [translator.translate(segment) or segment for segment in segments]
+
+
+class LocalBackend(TranslationBackend):
+    """
+    Offline stand-in: word-for-word glossary substitution, anything else is
+    returned unchanged. Deterministic, so analysis runs and tests need no network.
+    """
+
+    name = "local"
+
+    def __init__(self, glossary: dict | None = None):
+        self.glossary = {k.lower(): v for k, v in (glossary or {}).items()}
+        self._word = re.compile(r"\w+")
+
+    def translate_batch(self, segments: list[str], source: str, target: str) -> list[str]:
+        if not self.glossary:
+            return list(segments)
+        return [self._word.sub(lambda m: self.glossary.get(m.group().lower(), m.group()), s) for s in segments]
+
+
+BACKENDS = {"google": GoogleBackend, "local": LocalBackend}
+
+
+def get_backend(backend: str | TranslationBackend) -> TranslationBackend:
+    if isinstance(backend, TranslationBackend):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown translation backend {backend!r} (expected one of {sorted(BACKENDS)})")
+    return BACKENDS[backend]()
+
+
+# ---------- Cache ----------
+class TranslationCache:
+    """
+    Segment translations keyed by segment_key: an in-process LRU in front of
+    the TranslationSegments table (memory only when `pool` is None).
+    """
+
+    def __init__(self, pool=None, max_entries: int = TRANSLATION_CACHE_SIZE):
+        self.pool = pool
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+
+    def _remember(self, key: str, translated: str):
+        self._memory[key] = translated
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get_many(self, keys: list[str]) -> tuple[dict, int]:
+        """Cached translations for `keys`, and how many of them came from the database."""
+        found = {key: self._memory[key] for key in keys if key in self._memory}
+        for key in found:
+            self._memory.move_to_end(key)
+        missing = [key for key in keys if key not in found]
+        if not missing or self.pool is None:
+            return found, 0
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT segment_hash, translated FROM TranslationSegments WHERE segment_hash = ANY($1::text[]);",
+                missing,
+            )
+        for row in rows:
+            found[row["segment_hash"]] = row["translated"]
+            self._remember(row["segment_hash"], row["translated"])
+        return found, len(rows)
+
+    async def put_many(self, rows: list[tuple]):
+        """rows: (segment_hash, source_lang, target_lang, backend, translated)."""
+        for key, *_, translated in rows:
+            self._remember(key, translated)
+        if not rows or self.pool is None:
+            return
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.executemany(
+                    """
+                    INSERT INTO TranslationSegments (segment_hash, source_lang, target_lang, backend, translated)
+                    VALUES ($1, $2, $3, $4, $5)
+                    ON CONFLICT (segment_hash) DO NOTHING;
+                    """,
+                    rows,
+                )
+        except Exception as e:
+            error(f"Translation cache write failed ({len(rows)} segments): {e}")
+
+
+# ---------- Translator ----------
+class Translator:
+    """
+    Batched, cached translation of page segments.
+    - A batch of pages is translated together: every distinct segment is looked
+      up once (memory, then TranslationSegments), so boilerplate shared by
+      pages or seen in earlier runs never reaches the backend again.
+    - Misses are packed into backend-sized chunks per source language and sent
+      from worker threads, at most `max_concurrency` at a time.
+    - A failed chunk is not cached, and the pages it belongs to are reported
+      as failed so callers do not persist a partial translation.
+    """
+
+    def __init__(self, pool=None, backend: str | TranslationBackend = TRANSLATION_BACKEND, target: str = "en",
+                 max_concurrency: int = TRANSLATION_CONCURRENCY, cache: TranslationCache | None = None):
+        self.backend = get_backend(backend)
+        self.target = target
+        self.cache = cache or TranslationCache(pool)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # Stats
+        self.segments = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.backend_calls = 0
+        self.chars_translated = 0
+        self.failures = 0
+
+    def needs_translation(self, language: str | None) -> bool:
+        return bool(language) and language not in SKIP_LANGUAGES and language.split("-")[0] != self.target
+
+    async def translate(self, text: str, source: str) -> str | None:
+        """Translate free text (split into segments first); None if it was not needed or failed."""
+        texts, failed = await self.translate_pages([(split_segments(text), source)])
+        return None if failed else texts[0]
+
+    async def translate_pages(self, pages: list[tuple[list[str], str]]) -> tuple[list[str | None], set[int]]:
+        """
+        `pages` holds (segments, source_language) per page. Returns the translated
+        text per page (segments joined by newlines, None where nothing needed
+        translating) and the indexes of pages whose translation failed; their
+        text is None too.
+        """
+        keyed = []  # per page: [(key, segment)] or None
+        unique = {}  # key -> (segment, source)
+        for segments, source in pages:
+            if not segments or not self.needs_translation(source):
+                keyed.append(None)
+                continue
+            page = [(segment_key(s, source, self.target, self.backend.name), s) for s in segments]
+            keyed.append(page)
+            for key, segment in page:
+                unique.setdefault(key, (segment, source))
+        if not unique:
+            return [None] * len(pages), set()
+
+        found, from_db = await self.cache.get_many(list(unique))
+        self.segments += len(unique)
+        self.db_hits += from_db
+        self.memory_hits += len(found) - from_db
+        TRANSLATION_SEGMENTS.inc(len(found) - from_db, source="memory")
+        TRANSLATION_SEGMENTS.inc(from_db, source="database")
+
+        missing = [(key, *unique[key]) for key in unique if key not in found]
+        if missing:
+            results = await asyncio.gather(*(self._translate_chunk(chunk) for chunk in self._chunks(missing)))
+            new_rows = []
+            for chunk, translated in results:
+                if translated is None:
+                    continue
+                for (key, _, source), text in zip(chunk, translated):
+                    found[key] = text
+                    new_rows.append((key, source, self.target, self.backend.name, text))
+            await self.cache.put_many(new_rows)
+
+        texts, failed = [], set()
+        for i, page in enumerate(keyed):
+            if page is not None and any(key not in found for key, _ in page):
+                failed.add(i)
+                page = None
+            texts.append(None if page is None else "\n".join(found[key] for key, _ in page))
+        return texts, failed
+
+    def _chunks(self, missing: list[tuple]):
+        """Group (key, segment, source) by language, packed up to the backend's per-call size."""
+        by_source = {}
+        for item in missing:
+            by_source.setdefault(item[2], []).append(item)
+        for items in by_source.values():
+            chunk, size = [], 0
+            for item in items:
+                if chunk and size + len(item[1]) + 1 > self.backend.max_chars:
+                    yield chunk
+                    chunk, size = [], 0
+                chunk.append(item)
+                size += len(item[1]) + 1
+            if chunk:
+                yield chunk
+
+    async def _translate_chunk(self, chunk: list[tuple]) -> tuple[list[tuple], list[str] | None]:
+        segments = [segment for _, segment, _ in chunk]
+        source = chunk[0][2]
+        async with self._semaphore:
+            try:
+                with TRANSLATION_SECONDS.time(backend=self.backend.name):
+                    translated = await asyncio.to_thread(self.backend.translate_batch, segments, source, self.target)
+            except Exception as e:
+                self.failures += 1
+                warning(f"Translation of {len(segments)} segments ({source}→{self.target}) failed: {e}")
+                return chunk, None
+        self.backend_calls += 1
+        self.chars_translated += sum(len(s) for s in segments)
+        TRANSLATION_SEGMENTS.inc(len(segments), source="backend")
+        if len(translated) != len(segments):
+            self.failures += 1
+            return chunk, None
+        return chunk, translated
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.db_hits
+        return {
+            "backend": self.backend.name,
+            "segments": self.segments,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "cache_hit_rate": round(hits / self.segments, 3) if self.segments else 0.0,
+            "backend_calls": self.backend_calls,
+            "chars_translated": self.chars_translated,
+            "failures": self.failures,
+        }
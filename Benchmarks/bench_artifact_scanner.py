@@ -0,0 +1,66 @@
+"""
+Benchmark the single-pass artifact scanner against the previous path
+(page decoded twice, six separate regex scans). Every page is checked for
+identical result sets.
+
+    python -m Benchmarks.bench_artifact_scanner --limit 500
+    python -m Benchmarks.bench_artifact_scanner --dir ./html_samples
+    python -m Benchmarks.bench_artifact_scanner --synthetic 400
+"""
+import argparse
+import asyncio
+import time
+
+from Analysis.artifact_scanner import ArtifactScanner, group_hits, legacy_artifacts
+from Benchmarks.bench_page_analyzer import load_db_corpus, load_dir_corpus, synthetic_corpus
+
+
+def legacy_scan(html: bytes) -> dict:
+    """MetadataExtractor and PageAnalyzer each decoded the page, then ran their own regexes."""
+    results = legacy_artifacts(html.decode("utf-8", errors="ignore"))
+    html.decode("utf-8", errors="ignore")  # second decode for BitcoinExtractor
+    return results
+
+
+def fused_scan(scanner: ArtifactScanner, html: bytes) -> dict:
+    return group_hits(scanner.scan(html))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--dir", help="directory of *.html files instead of the database")
+    parser.add_argument("--synthetic", type=int, help="generate this many pages instead of the database")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N timings")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        corpus = synthetic_corpus(args.synthetic)
+    elif args.dir:
+        corpus = load_dir_corpus(args.dir)
+    else:
+        corpus = asyncio.run(load_db_corpus(args.limit))
+    pages = [html for _, _, html in corpus]
+    total_mb = sum(len(html) for html in pages) / 1e6
+    scanner = ArtifactScanner()
+
+    def best(fn):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = [fn(html) for html in pages]
+            timings.append(time.perf_counter() - start)
+        return min(timings), results
+
+    legacy_s, legacy = best(legacy_scan)
+    fused_s, fused = best(lambda html: fused_scan(scanner, html))
+    mismatches = sum(1 for a, b in zip(legacy, fused) if a != b)
+    hits = sum(len(values) for result in fused for values in result.values())
+
+    print(f"pages={len(pages)} size={total_mb:.1f}MB artifacts={hits} mismatches={mismatches}")
+    print(f"separate regexes | {legacy_s:.3f}s | {total_mb / legacy_s:.2f} MB/s")
+    print(f"fused scanner    | {fused_s:.3f}s | {total_mb / fused_s:.2f} MB/s | {legacy_s / fused_s:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
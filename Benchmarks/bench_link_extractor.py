@@ -0,0 +1,86 @@
+"""
+Benchmark the streaming link extractor against the previous BeautifulSoup path.
+
+Corpus: stored pages from the database (default) or *.html files from a
+directory. Every page is checked for identical output.
+
+    python -m Benchmarks.bench_link_extractor --limit 500
+    python -m Benchmarks.bench_link_extractor --dir ./html_samples
+"""
+import argparse
+import asyncio
+import re
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Tag
+
+from Crawler.link_extractor import extract_onion_links
+
+LEGACY_ONION_PATTERN = re.compile(r"https?://[a-zA-Z0-9]{16,56}\.onion")
+
+
+def legacy_extract(html: str, base_url: str = "") -> set[str]:
+    """The BeautifulSoup extractor UnifiedCrawler used before."""
+    links = set()
+    soup = BeautifulSoup(html, "html.parser")
+    for a in soup.find_all("a", href=True):
+        if isinstance(a, Tag):
+            full = urljoin(base_url, a.get("href", "").strip())  # type: ignore
+            if ".onion" in full:
+                links.add(full)
+    links.update(LEGACY_ONION_PATTERN.findall(html))
+    return {url.rstrip("/") for url in links}
+
+
+async def load_db_corpus(limit: int) -> list[tuple[str, str]]:
+    import asyncpg
+    from Essentials.configs import DB_CONFIG
+    from Essentials.html_store import HtmlStore, PAGE_BLOB_COLUMNS, PAGE_BLOB_JOIN
+
+    pool = await asyncpg.create_pool(**DB_CONFIG)
+    try:
+        store = HtmlStore(pool)
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"SELECT p.url, {PAGE_BLOB_COLUMNS} FROM Pages p {PAGE_BLOB_JOIN} LIMIT $1;", limit
+            )
+        return [(row["url"], (await store.page_html(row)).decode("utf-8", errors="ignore")) for row in rows]
+    finally:
+        await pool.close()
+
+
+def load_dir_corpus(directory: str) -> list[tuple[str, str]]:
+    return [
+        ("http://" + "a" * 56 + ".onion/", path.read_text(errors="ignore"))
+        for path in sorted(Path(directory).glob("*.html"))
+    ]
+
+
+def timed(fn, corpus) -> tuple[float, list]:
+    start = time.perf_counter()
+    results = [fn(html, base) for base, html in corpus]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--dir", help="directory of *.html files instead of the database")
+    args = parser.parse_args()
+
+    corpus = load_dir_corpus(args.dir) if args.dir else asyncio.run(load_db_corpus(args.limit))
+    total_mb = sum(len(html) for _, html in corpus) / 1e6
+
+    legacy_s, legacy = timed(legacy_extract, corpus)
+    fast_s, fast = timed(extract_onion_links, corpus)
+    mismatches = sum(1 for a, b in zip(legacy, fast) if a != b)
+
+    print(f"pages={len(corpus)} size={total_mb:.1f}MB mismatches={mismatches}")
+    print(f"beautifulsoup | {legacy_s:.3f}s | {total_mb / legacy_s:.2f} MB/s")
+    print(f"streaming     | {fast_s:.3f}s | {total_mb / fast_s:.2f} MB/s | {legacy_s / fast_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark PageAnalyzer's extraction stage inline vs. on a process pool.
+
+Corpus: stored pages from the database (default), *.html files from a
+directory, or generated marketplace-like pages (--synthetic N). Each pool
+size is checked for results identical to the inline run.
+
+    python -m Benchmarks.bench_page_analyzer --limit 500 --workers 1,2,4,8
+    python -m Benchmarks.bench_page_analyzer --synthetic 400
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import time
+from pathlib import Path
+
+from Analysis.analysis_pool import AnalysisPool
+
+
+def synthetic_corpus(pages: int, seed: int = 7) -> list[tuple[str, str, bytes]]:
+    rng = random.Random(seed)
+    words = "escrow vendor shipping stealth listing market crypto wallet refund review price order".split()
+    corpus = []
+    for i in range(pages):
+        body = " ".join(rng.choice(words) for _ in range(rng.randint(800, 4000)))
+        btc = "1" + "".join(rng.choice("123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz") for _ in range(33))
+        html = (
+            f"<html><head><title>Shop {i}</title><meta name='description' content='listing {i}'></head>"
+            f"<body><p>{body}</p><p>Vendor: seller_{i % 50} contact shop{i}@mail{i % 7}.onion</p>"
+            f"<p>Pay to {btc} or bc1q{hashlib.sha256(str(i).encode()).hexdigest()[:38]}</p></body></html>"
+        )
+        page_id = hashlib.sha256(f"page{i}".encode()).hexdigest()
+        corpus.append((page_id, "0" * 64, html.encode()))
+    return corpus
+
+
+def load_dir_corpus(directory: str) -> list[tuple[str, str, bytes]]:
+    return [
+        (hashlib.sha256(path.name.encode()).hexdigest(), "0" * 64, path.read_bytes())
+        for path in sorted(Path(directory).glob("*.html"))
+    ]
+
+
+async def load_db_corpus(limit: int) -> list[tuple[str, str, bytes]]:
+    import asyncpg
+    from Essentials.configs import DB_CONFIG
+    from Essentials.html_store import HtmlStore, PAGE_BLOB_COLUMNS, PAGE_BLOB_JOIN
+
+    pool = await asyncpg.create_pool(**DB_CONFIG)
+    try:
+        store = HtmlStore(pool)
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"SELECT p.page_id, p.site_id, {PAGE_BLOB_COLUMNS} FROM Pages p {PAGE_BLOB_JOIN} LIMIT $1;", limit
+            )
+        return [(row["page_id"], row["site_id"], await store.page_html(row)) for row in rows]
+    finally:
+        await pool.close()
+
+
+def comparable(results: list[tuple]) -> list:
+    """Drop the time-derived fields (metadata_id, detected_at) before comparing runs."""
+    out = []
+    for result in results:
+        if result[0] != "ok":
+            out.append(result)
+            continue
+        _, page_id, meta_row, btc_rows, segments = result
+        out.append((page_id, meta_row[1:], sorted(row[:5] for row in btc_rows), segments))
+    return out
+
+
+async def run(corpus, workers: int) -> tuple[float, list]:
+    pool = AnalysisPool(workers=workers)
+    pool.start()
+    try:
+        if workers:
+            await pool.analyze_batch(corpus[: workers * 2])  # spawn workers outside the timing
+        start = time.perf_counter()
+        results = await pool.analyze_batch(corpus)
+        return time.perf_counter() - start, results
+    finally:
+        pool.shutdown()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--dir", help="directory of *.html files instead of the database")
+    parser.add_argument("--synthetic", type=int, help="generate this many pages instead of the database")
+    parser.add_argument("--workers", default=",".join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})),
+                        help="comma-separated process pool sizes")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        corpus = synthetic_corpus(args.synthetic)
+    elif args.dir:
+        corpus = load_dir_corpus(args.dir)
+    else:
+        corpus = await load_db_corpus(args.limit)
+    total_mb = sum(len(html) for _, _, html in corpus) / 1e6
+
+    inline_s, inline = await run(corpus, 0)
+    expected = comparable(inline)
+    print(f"pages={len(corpus)} size={total_mb:.1f}MB cores={os.cpu_count()}")
+    print(f"inline     | {inline_s:.2f}s | {len(corpus) / inline_s:.1f} pages/s")
+    for workers in (int(n) for n in args.workers.split(",") if n.strip()):
+        elapsed, results = await run(corpus, workers)
+        mismatches = sum(1 for a, b in zip(expected, comparable(results)) if a != b)
+        print(
+            f"workers={workers:<3} | {elapsed:.2f}s | {len(corpus) / elapsed:.1f} pages/s | "
+            f"{inline_s / elapsed:.2f}x | mismatches={mismatches}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
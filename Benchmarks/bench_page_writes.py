@@ -0,0 +1,57 @@
+"""
+Compare per-row page persistence with the batched write-behind buffer.
+
+Needs the PostgreSQL database from Essentials.configs.DB_CONFIG. Synthetic
+rows are written under a throwaway site and removed afterwards.
+
+    python -m Benchmarks.bench_page_writes --pages 2000 --size 20000
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+
+import asyncpg
+
+from Crawler.linkmanager import LinkManager
+from Essentials.configs import DB_CONFIG
+
+BENCH_SITE = "http://benchmarkwritebehind0000000000000000000000000000000000.onion/"
+
+
+async def write_pages(link_manager: LinkManager, pages: int, size: int, tag: str):
+    body = os.urandom(size // 2).hex()
+    start = time.perf_counter()
+    for i in range(pages):
+        url = f"{BENCH_SITE}{tag}/{i}"
+        await link_manager.add_html_page(url, f"<html><body>{i}{body}</body></html>")
+        await link_manager.update_status_in_DB(BENCH_SITE, "Alive")
+    await link_manager.flush_writes()
+    elapsed = time.perf_counter() - start
+    rows = pages * 2
+    print(f"{tag:>10} | {rows} rows in {elapsed:.2f}s | {rows / elapsed:,.0f} rows/sec")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=20000, help="approximate HTML bytes per page")
+    args = parser.parse_args()
+
+    pool = await asyncpg.create_pool(**DB_CONFIG)
+    site_id = hashlib.sha256(BENCH_SITE.encode()).hexdigest()
+    try:
+        direct = LinkManager(pool, persist_frontier=False, buffered_writes=False)
+        await direct.add_url_to_DB(BENCH_SITE, "Benchmark")
+
+        await write_pages(direct, args.pages, args.size, "per-row")
+        await write_pages(LinkManager(pool, persist_frontier=False), args.pages, args.size, "batched")
+    finally:
+        async with pool.acquire() as conn:
+            await conn.execute("DELETE FROM OnionSites WHERE site_id = $1;", site_id)
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
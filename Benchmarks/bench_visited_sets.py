@@ -0,0 +1,56 @@
+"""
+Compare visited-set backends used by LinkManager / SeedCollector.
+
+Reports insert and lookup speed, memory per million URLs and the observed
+false-positive rate for the exact set and the fixed-size Bloom filter.
+
+    python -m Benchmarks.bench_visited_sets --count 1000000
+"""
+import argparse
+import hashlib
+import time
+
+from Crawler.visited import BloomVisitedSet, ExactVisitedSet, memory_per_million
+
+
+def synthetic_urls(count: int, salt: str = ""):
+    for i in range(count):
+        host = hashlib.sha256(f"{salt}{i // 50}".encode()).hexdigest()[:56]
+        yield f"http://{host}.onion/listing/{i}?page={i % 7}"
+
+
+def run(visited, count: int):
+    start = time.perf_counter()
+    for url in synthetic_urls(count):
+        visited.add(url)
+    insert_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    misses = sum(1 for url in synthetic_urls(count) if url not in visited)
+    lookup_s = time.perf_counter() - start
+
+    probes = min(count, 200_000)
+    false_positives = sum(1 for url in synthetic_urls(probes, salt="unseen") if url in visited)
+
+    print(
+        f"{visited.backend:>6} | "
+        f"insert {count / insert_s:>10,.0f}/s | "
+        f"lookup {count / lookup_s:>10,.0f}/s | "
+        f"{memory_per_million(visited):>8.2f} MiB per 1M URLs | "
+        f"false negatives {misses} | "
+        f"false positives {false_positives / probes:.5f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--error-rate", type=float, default=0.001)
+    args = parser.parse_args()
+
+    run(ExactVisitedSet(), args.count)
+    run(BloomVisitedSet(capacity=args.count, error_rate=args.error_rate), args.count)
+
+
+if __name__ == "__main__":
+    main()
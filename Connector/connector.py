@@ -7,24 +7,31 @@ from stem.control import Controller
 from stem.process import launch_tor_with_config
 
 import asyncio
+import re
+import secrets
 import shutil
+import threading
+import time
+from collections import deque
 from contextlib import asynccontextmanager
 from typing import Optional
 
 import aiohttp
-from aiohttp_socks import ProxyConnector
+from aiohttp_socks import ProxyConnectionError, ProxyConnector, ProxyError, ProxyTimeoutError
+
+from Logging_Mechanism.logger import info, warning
 
 
 class Connector:
     def __init__(self) -> None:
         self.default_port = configs.TOR_SOCKS_DEFAULT
-        self.default_control_port = configs.TOR_SOCKS_DEFAULT # int
+        self.default_control_port = configs.TOR_SOCKS_CONTROL_DEFAULT # int
         self.control_password = configs.TOR_CONTROL_PASSWORD
-        self.controller = None
+        self._controller = None
 
 
-    def connect(self):
-        self._controller = Controller.from_port(port=int(control_port))
+    def connect(self, control_port: Optional[int] = None):
+        self._controller = Controller.from_port(port=int(control_port or self.default_control_port))
         
         if self.control_password :
             self._controller.authenticate(password=self.control_password)
@@ -40,13 +47,364 @@ class Connector:
 
     def get_version(self):
         return self._controller.get_version() if self._controller else None
-    
+
+
+class AsyncTorController:
+    """
+    Async-safe wrapper around stem's blocking Controller.
+    - Every stem call runs in a worker thread (`asyncio.to_thread`), serialized
+      by a lock, so the event loop never blocks on the control socket.
+    - Reads circuit and bandwidth stats and sends NEWNYM (honouring Tor's rate limit).
+    - A missing or unreachable control port is not fatal: `connected` stays False
+      and every call becomes a no-op.
+    """
+
+    def __init__(self, control_port: int = configs.TOR_SOCKS_CONTROL_DEFAULT,
+                 password: str = configs.TOR_CONTROL_PASSWORD, host: str = configs.SOCKS_HOST):
+        self.host = host
+        self.control_port = control_port
+        self.password = password
+        self._controller = None
+        self._lock = threading.Lock()
+        self.newnym_sent = 0
+        self.last_newnym = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return self._controller is not None
+
+    def _blocking(self, method: str, *args):
+        with self._lock:
+            return getattr(self._controller, method)(*args)
+
+    async def _call(self, method: str, *args, default=None):
+        if self._controller is None:
+            return default
+        try:
+            return await asyncio.to_thread(self._blocking, method, *args)
+        except Exception as e:
+            warning(f"Tor control call {method} failed: {e}")
+            return default
+
+    async def connect(self, quiet: bool = False) -> bool:
+        def _connect():
+            controller = Controller.from_port(address=self.host, port=int(self.control_port))
+            if self.password:
+                controller.authenticate(password=self.password)
+            else:
+                controller.authenticate()
+            return controller
+
+        try:
+            self._controller = await asyncio.to_thread(_connect)
+            info(f"🧅 Tor control port connected ({self.host}:{self.control_port})")
+        except Exception as e:
+            self._controller = None
+            if not quiet:
+                warning(f"Tor control port unavailable ({self.host}:{self.control_port}): {e}")
+        return self.connected
+
+    async def close(self):
+        if self._controller is not None:
+            controller, self._controller = self._controller, None
+            await asyncio.to_thread(controller.close)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def newnym(self) -> bool:
+        """Ask Tor for fresh circuits for new streams. Returns False if rate-limited or not connected."""
+        if not await self._call("is_newnym_available", default=False):
+            return False
+        await self._call("signal", Signal.NEWNYM)
+        self.newnym_sent += 1
+        self.last_newnym = time.monotonic()
+        info("🔄 Sent NEWNYM — new streams will use fresh circuits")
+        return True
+
+    async def get_info(self, key: str, default=None):
+        return await self._call("get_info", key, default=default)
+
+    async def bootstrap_status(self) -> dict:
+        """Parsed `status/bootstrap-phase`, e.g. {"progress": 100, "tag": "done", "summary": "Done"}."""
+        phase = await self.get_info("status/bootstrap-phase")
+        if not phase:
+            return {"progress": 0, "tag": None, "summary": None}
+        fields = dict(re.findall(r'(\w+)=("[^"]*"|\S+)', phase))
+        return {
+            "progress": int(fields.get("PROGRESS", 0)),
+            "tag": fields.get("TAG"),
+            "summary": fields.get("SUMMARY", "").strip('"') or None,
+        }
+
+    async def is_ready(self) -> bool:
+        """Fully bootstrapped and able to build circuits."""
+        if (await self.bootstrap_status())["progress"] < 100:
+            return False
+        return await self.get_info("status/circuit-established") == "1"
+
+    async def wait_until_ready(self, timeout: float = configs.TOR_BOOTSTRAP_TIMEOUT,
+                               poll_interval: float = 0.5) -> bool:
+        """
+        Poll the control port until Tor reports a complete bootstrap, (re)connecting
+        while the port is still coming up. Returns False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        last_progress = -1
+        while time.monotonic() < deadline:
+            if self.connected or await self.connect(quiet=True):
+                status = await self.bootstrap_status()
+                if status["progress"] != last_progress:
+                    last_progress = status["progress"]
+                    info(f"🧅 Tor bootstrap {status['progress']}% ({status['summary']})")
+                if await self.is_ready():
+                    return True
+            await asyncio.sleep(poll_interval)
+        warning(f"Tor not bootstrapped after {timeout:.0f}s (last progress {max(last_progress, 0)}%)")
+        return False
+
+    async def circuit_stats(self) -> dict:
+        circuits = await self._call("get_circuits", default=[]) or []
+        by_status = {}
+        for circuit in circuits:
+            by_status[circuit.status] = by_status.get(circuit.status, 0) + 1
+        return {"total": len(circuits), "by_status": by_status}
+
+    async def bandwidth(self) -> dict:
+        read = await self.get_info("traffic/read")
+        written = await self.get_info("traffic/written")
+        return {
+            "bytes_read": int(read) if read else None,
+            "bytes_written": int(written) if written else None,
+        }
+
+    async def stats(self) -> dict:
+        if not self.connected:
+            return {"connected": False}
+        return {
+            "connected": True,
+            "circuits": await self.circuit_stats(),
+            "bandwidth": await self.bandwidth(),
+            "newnym_sent": self.newnym_sent,
+        }
+
+
+class NewnymPolicy:
+    """
+    Decides when bad circuits are worth replacing.
+    - Keeps the outcome of the last `window` requests through the pool.
+    - Rotates once at least `min_samples` are in and the error/timeout rate
+      reaches `max_error_rate`, at most once per `min_interval` seconds.
+    """
+
+    def __init__(self, window: int = 50, min_samples: int = 20, max_error_rate: float = 0.5,
+                 min_interval: float = 60.0):
+        self.outcomes = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.min_interval = min_interval
+        self._last_rotation = 0.0
+
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def record(self, ok: bool) -> bool:
+        """Add an outcome; True means "rotate now"."""
+        self.outcomes.append(ok)
+        if len(self.outcomes) < self.min_samples or self.error_rate() < self.max_error_rate:
+            return False
+        if time.monotonic() - self._last_rotation < self.min_interval:
+            return False
+        self._last_rotation = time.monotonic()
+        self.outcomes.clear()
+        return True
+
+
+class TorEndpoint:
+    """
+    One SOCKS route into Tor: a SOCKS port, optionally with IsolateSOCKSAuth
+    credentials so Tor keeps its traffic on a separate circuit.
+    Tracks health as an EWMA of success rate and latency.
+    """
+
+    EWMA_ALPHA = 0.2
+    COOLDOWN_AFTER_FAILURES = 3
+    COOLDOWN_SECONDS = 30.0
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.success_rate = 1.0
+        self.latency = 1.0
+        self.cooldown_until = 0.0
+
+    @property
+    def url(self) -> str:
+        auth = f"{self.username}:{self.password}@" if self.username else ""
+        return f"socks5://{auth}{self.host}:{self.port}"
+
+    def score(self) -> float:
+        """Higher is better: healthy, fast and lightly loaded routes win."""
+        if time.monotonic() < self.cooldown_until:
+            return 0.0
+        return self.success_rate / (self.latency * (1 + self.in_flight))
+
+    def record(self, ok: bool, latency: Optional[float] = None):
+        self.requests += 1
+        self.success_rate += self.EWMA_ALPHA * ((1.0 if ok else 0.0) - self.success_rate)
+        if ok:
+            self.consecutive_failures = 0
+            if latency is not None:
+                self.latency += self.EWMA_ALPHA * (latency - self.latency)
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.COOLDOWN_AFTER_FAILURES:
+                self.cooldown_until = time.monotonic() + self.COOLDOWN_SECONDS
+
+    def as_dict(self) -> dict:
+        return {
+            "endpoint": f"{self.host}:{self.port}" + (f"#{self.username}" if self.username else ""),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "success_rate": round(self.success_rate, 3),
+            "latency": round(self.latency, 3),
+            "score": round(self.score(), 4),
+        }
+
+
+class CircuitPool:
+    """
+    Pool of Tor SOCKS endpoints (several SocksPorts and/or IsolateSOCKSAuth
+    credentials), each with its own aiohttp session. Requests go to the
+    healthiest, least-loaded endpoint so throughput scales with circuit count.
+    """
+
+    # aiohttp_socks errors (proxy down, SOCKS-level refusal) do not derive from ClientError/OSError
+    NETWORK_ERRORS = (asyncio.TimeoutError, aiohttp.ClientError, OSError,
+                      ProxyConnectionError, ProxyError, ProxyTimeoutError)
+
+    def __init__(self, endpoints: list[TorEndpoint], timeout: Optional[aiohttp.ClientTimeout] = None,
+                 limit_per_endpoint: int = 10, limit_per_host: int = configs.TOR_LIMIT_PER_HOST,
+                 keepalive_timeout: float = configs.TOR_KEEPALIVE_SECONDS):
+        if not endpoints:
+            raise ValueError("CircuitPool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.timeout = timeout
+        self.limit_per_endpoint = limit_per_endpoint
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.controller: Optional[AsyncTorController] = None
+        self.rotation_policy: Optional[NewnymPolicy] = None
+        self._rotation_task = None
+        self.rotations = 0
+
+    def attach_controller(self, controller: "AsyncTorController", policy: Optional["NewnymPolicy"] = None):
+        """Let request outcomes trigger NEWNYM through `controller` when `policy` says circuits went bad."""
+        self.controller = controller
+        self.rotation_policy = policy or NewnymPolicy()
+
+    def _observe(self, ok: bool):
+        if self.controller is None or not self.controller.connected:
+            return
+        if self.rotation_policy.record(ok) and (self._rotation_task is None or self._rotation_task.done()):
+            self._rotation_task = asyncio.ensure_future(self._rotate())
+
+    async def _rotate(self):
+        if await self.controller.newnym():
+            self.rotations += 1
+            # Fresh circuits: forget the failure streaks that were caused by the old ones
+            for endpoint in self.endpoints:
+                endpoint.consecutive_failures = 0
+                endpoint.cooldown_until = 0.0
+
+    @classmethod
+    def from_config(cls, socks_host: str = configs.SOCKS_HOST, socks_ports: Optional[list[int]] = None,
+                    isolation_slots: int = configs.TOR_ISOLATION_SLOTS, **kwargs) -> "CircuitPool":
+        """
+        One endpoint per SOCKS port, or `isolation_slots` endpoints per port with
+        random SOCKS credentials (Tor isolates circuits by credentials by default).
+        """
+        endpoints = []
+        for port in socks_ports or configs.TOR_SOCKS_PORTS:
+            if isolation_slots > 0:
+                for _ in range(isolation_slots):
+                    token = secrets.token_hex(8)
+                    endpoints.append(TorEndpoint(socks_host, port, username=token, password=token))
+            else:
+                endpoints.append(TorEndpoint(socks_host, port))
+        return cls(endpoints, **kwargs)
+
+    async def open(self):
+        for endpoint in self.endpoints:
+            if endpoint.session is None or endpoint.session.closed:
+                # Keep-alive per onion host: a reused connection skips the rendezvous handshake
+                connector = ProxyConnector.from_url(
+                    endpoint.url,
+                    limit=self.limit_per_endpoint,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                )
+                endpoint.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, trust_env=False)
+        return self
+
+    async def close(self):
+        for endpoint in self.endpoints:
+            if endpoint.session is not None:
+                await endpoint.session.close()
+                endpoint.session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def pick(self) -> TorEndpoint:
+        return max(self.endpoints, key=lambda e: e.score())
+
+    @asynccontextmanager
+    async def get(self, url: str, **kwargs):
+        """`session.get()` routed through the best endpoint; network errors lower its score."""
+        endpoint = self.pick()
+        endpoint.in_flight += 1
+        start = time.monotonic()
+        try:
+            async with cast(aiohttp.ClientSession, endpoint.session).get(url, **kwargs) as resp:
+                yield resp
+            endpoint.record(True, time.monotonic() - start)
+            self._observe(True)
+        except self.NETWORK_ERRORS:
+            endpoint.record(False)
+            self._observe(False)
+            raise
+        finally:
+            endpoint.in_flight -= 1
+
+    def stats(self) -> list[dict]:
+        return [endpoint.as_dict() for endpoint in self.endpoints]
+
 
 class TorProcessManager:
 
-    def __init__(self, socks_port=configs.TOR_SOCKS_DEFAULT, control_port=configs.TOR_SOCKS_CONTROL_DEFAULT, tor_binary: Optional[str]=None):
+    def __init__(self, socks_port=configs.TOR_SOCKS_DEFAULT, control_port=configs.TOR_SOCKS_CONTROL_DEFAULT, tor_binary: Optional[str]=None,
+                 socks_ports: Optional[list[int]] = None):
         self.socks_port = socks_port
         self.control_port = control_port
+        self.socks_ports = socks_ports  # extra SocksPorts for a CircuitPool
         self.tor_binary = tor_binary or shutil.which("tor")  # sys tor
         self.process = None
 
@@ -54,7 +412,8 @@ class TorProcessManager:
     def can_launch(self) -> bool:
         return self.tor_binary is not None
     
-    def launch(self):
+    def launch(self, completion_percent: int = 100):
+        """Start tor; returns once it logs `completion_percent`% bootstrap (0 = as soon as it runs)."""
 
         if not self.can_launch():
             raise RuntimeError("No tor binary available to launch !")
@@ -66,8 +425,14 @@ class TorProcessManager:
             "Log": "notice stdout"
         }
 
+        if self.socks_ports:
+            # Fixed ports so a CircuitPool can spread requests across them
+            config["SocksPort"] = [f"{port} IsolateSOCKSAuth" for port in self.socks_ports]
+            config["ControlPort"] = str(self.control_port)
+
         tor_cmd = cast(str, self.tor_binary)
-        self.process = launch_tor_with_config(config=config, take_ownership=True, tor_cmd=tor_cmd)
+        self.process = launch_tor_with_config(config=config, take_ownership=True, tor_cmd=tor_cmd,
+                                              completion_percent=completion_percent)
 
         return self.process
     
@@ -77,6 +442,90 @@ class TorProcessManager:
             self.process = None
 
 
+class TorNetwork:
+    """
+    Long-lived Tor network layer shared by every crawl job in a process.
+    - One CircuitPool whose keep-alive connections (per endpoint and onion host)
+      outlive individual jobs, so revisited hosts skip rendezvous setup.
+    - One AsyncTorController; readiness comes from the control port's bootstrap
+      phase rather than a fixed sleep, and it drives NEWNYM rotation.
+    - Optionally launches tor when nothing answers on the control port.
+    - `start()` is idempotent: the first caller bootstraps, later callers reuse
+      the outcome until `close()`. Crawl jobs are counted by `job_started()`.
+    """
+
+    def __init__(self, circuit_pool: Optional[CircuitPool] = None, controller: Optional[AsyncTorController] = None,
+                 policy: Optional[NewnymPolicy] = None, launch_if_missing: bool = configs.TOR_LAUNCH_IF_MISSING,
+                 bootstrap_timeout: float = configs.TOR_BOOTSTRAP_TIMEOUT):
+        self.circuits = circuit_pool or CircuitPool.from_config(limit_per_endpoint=configs.TOR_LIMIT_PER_ENDPOINT)
+        self.controller = controller or AsyncTorController()
+        self.policy = policy or NewnymPolicy()
+        self.launch_if_missing = launch_if_missing
+        self.bootstrap_timeout = bootstrap_timeout
+        self.process_manager: Optional[TorProcessManager] = None
+        self.ready = False
+        self.bootstrap_seconds: Optional[float] = None
+        self.jobs_served = 0
+        self._started = False
+        self._start_lock = asyncio.Lock()
+
+    async def start(self) -> bool:
+        """Bootstrap once (launching tor if configured) and open the shared pool. Returns readiness."""
+        async with self._start_lock:
+            if self._started:
+                await self.circuits.open()
+                return self.ready
+
+            started = time.monotonic()
+            if not await self.controller.connect(quiet=True) and self.launch_if_missing:
+                self.process_manager = TorProcessManager(socks_ports=configs.TOR_SOCKS_PORTS)
+                if self.process_manager.can_launch():
+                    info("🧅 No Tor control port answering, launching tor")
+                    await asyncio.to_thread(self.process_manager.launch, 0)
+                else:
+                    warning("No tor binary available to launch")
+                    self.process_manager = None
+
+            if self.controller.connected or self.process_manager:
+                self.ready = await self.controller.wait_until_ready(timeout=self.bootstrap_timeout)
+                if self.ready:
+                    self.bootstrap_seconds = round(time.monotonic() - started, 2)
+                    self.circuits.attach_controller(self.controller, self.policy)
+                    info(f"🧅 Tor network ready in {self.bootstrap_seconds}s")
+            else:
+                # No control port: the SOCKS ports may still work, just without readiness checks or NEWNYM
+                warning("Tor control port unreachable, using SOCKS endpoints without bootstrap detection")
+
+            await self.circuits.open()
+            self._started = True
+            return self.ready
+
+    def job_started(self):
+        """Count one crawl job served by this network layer."""
+        self.jobs_served += 1
+
+    async def close(self):
+        await self.circuits.close()
+        await self.controller.close()
+        self.ready = False
+        self._started = False
+        if self.process_manager:
+            self.process_manager.kill()
+            self.process_manager = None
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "control_port": self.controller.connected,
+            "bootstrap_seconds": self.bootstrap_seconds,
+            "jobs_served": self.jobs_served,
+            "launched_tor": self.process_manager is not None,
+            "rotations": self.circuits.rotations,
+            "error_rate": round(self.policy.error_rate(), 3),
+            "endpoints": self.circuits.stats(),
+        }
+
+
 @asynccontextmanager
 async def tor_session(socks_host=configs.SOCKS_HOST, socks_port=configs.TOR_SOCKS_DEFAULT, launch_tor_if_missing=False,
                       control_port=configs.TOR_SOCKS_CONTROL_DEFAULT, control_password=configs.TOR_CONTROL_PASSWORD):
@@ -89,29 +538,23 @@ async def tor_session(socks_host=configs.SOCKS_HOST, socks_port=configs.TOR_SOCK
     connector = ProxyConnector.from_url(f"socks5://{socks_host}:{socks_port}")
     session = aiohttp.ClientSession(connector=connector, trust_env=False)
     tor_proc_mgr = None
-    controller = None
+    controller = AsyncTorController(control_port=control_port, password=control_password, host=socks_host)
 
     try:
-        # try to connect to control port (non-blocking attempt)
-        try:
-            controller = Controller.from_port(port=str(control_port))
-            controller.authenticate(password=control_password) if control_password else controller.authenticate()
-        except Exception:
-            controller = None
+        # Control port is optional; stem runs in a worker thread so the loop is never blocked
+        await controller.connect()
 
         # Optionally start tor if no controller and launch requested
-        if controller is None and launch_tor_if_missing:
-            tor_proc_mgr = TorProcessManager(socks_port=socks_port, control_port=control_port)
+        if not controller.connected and launch_tor_if_missing:
+            tor_proc_mgr = TorProcessManager(socks_port=socks_port, control_port=control_port, socks_ports=[socks_port])
             if tor_proc_mgr.can_launch():
-                tor_proc_mgr.launch()
-                # wait a bit for tor to boot
-                await asyncio.sleep(4)
-                controller = Controller.from_port(port=str(control_port))
-                controller.authenticate(password=control_password) if control_password else controller.authenticate()
+                await asyncio.to_thread(tor_proc_mgr.launch, 0)
+                await controller.wait_until_ready()
 
         yield session, controller
 
     finally:
         await session.close()
+        await controller.close()
         if tor_proc_mgr:
-            tor_proc_mgr.kill()
\ No newline at end of file
+            tor_proc_mgr.kill()
@@ -0,0 +1,396 @@
+import argparse
+import asyncio
+import os
+import random
+import socket
+import time
+import asyncpg
+
+from Crawler.linkmanager import LinkManager
+from Essentials.utils import remove_path_from_url
+from Logging_Mechanism.logger import info, warning, error
+
+
+class DistributedFrontier:
+    """
+    Crawl frontier shared by several crawler processes through PostgreSQL.
+    Drop-in for FrontierScheduler (same put / get / release / snapshot surface).
+    - URLs live in CrawlFrontier; a worker leases one with
+      SELECT ... FOR UPDATE SKIP LOCKED, so nodes never hand out the same URL.
+    - Each onion domain has a CrawlDomains row holding its lock and next allowed
+      fetch time (database clock), so politeness holds across nodes.
+    - Leases and domain locks expire after `lease_seconds`: a crashed node's work
+      goes back to the queue on the next heartbeat; live nodes renew theirs.
+    - New URLs and releases are buffered and flushed in batches.
+    """
+
+    INNER = "InnerLink"
+    MAX_BACKOFF = 32.0
+
+    def __init__(self, pool: asyncpg.Pool, node_id: str | None = None, polite_delay: float = 2.0,
+                 lease_seconds: float = 120.0, poll_interval: float = 1.0, flush_interval: float = 0.5,
+                 heartbeat_interval: float = 5.0, requeue_after_hours: float = 6.0):
+        self.pool = pool
+        self.node_id = node_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.polite_delay = polite_delay
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.flush_interval = flush_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.requeue_after_hours = requeue_after_hours
+
+        self._puts = {}       # url -> (url, site_root, source, depth, priority, domain)
+        self._releases = []   # (domain, ok, url)
+        self._leased = {}     # domain -> url leased by this node
+        self._queued = {}     # domain -> queued URLs, as of the last heartbeat (+ local puts / leases)
+        self._flush_lock = asyncio.Lock()
+        self._pending_cache = {"inner": 0, "outer": 0}
+        self.leases_granted = 0
+        self.completed = 0
+        self.empty_polls = 0
+
+    # ---------- Producers ----------
+    def put(self, domain: str, url: str, source: str, depth: int = 0, priority: float = 0.0):
+        """Buffer a URL for the shared frontier; URLs another node already queued are ignored."""
+        if url not in self._puts:
+            self._puts[url] = (url, remove_path_from_url(url), source, depth, priority, domain)
+            self._queued[domain] = self._queued.get(domain, 0) + 1
+
+    # ---------- Consumers ----------
+    async def get(self, timeout: float | None = None):
+        """
+        Lease the best ready URL from any node's queue.
+        Returns (url, source, depth, domain), or None if nothing was leasable within `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            entry = await self._lease()
+            if entry is not None:
+                return entry
+            self.empty_polls += 1
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return None
+            # Jitter so idle workers on many nodes don't poll in lockstep
+            wait = self.poll_interval * random.uniform(0.5, 1.5)
+            await asyncio.sleep(wait if deadline is None else max(0.0, min(wait, deadline - now)))
+
+    async def _lease(self):
+        await self.flush()
+        try:
+            async with self.pool.acquire() as connection:
+                async with connection.transaction():
+                    # Walks idx_frontier_lease_order (the ORDER BY must match its expressions)
+                    # instead of sorting the whole queue; expired leases are re-queued by heartbeat()
+                    row = await connection.fetchrow(
+                        """
+                        SELECT f.url, f.source, f.depth, f.domain
+                        FROM CrawlFrontier f
+                        JOIN CrawlDomains d ON d.domain = f.domain
+                        WHERE f.state = 'queued'
+                          AND d.next_fetch_at <= NOW()
+                          AND (d.locked_by IS NULL OR d.lock_expires < NOW())
+                        ORDER BY (f.source = 'InnerLink') DESC, f.priority DESC, f.updated_at
+                        LIMIT 1
+                        FOR UPDATE OF f, d SKIP LOCKED;
+                        """
+                    )
+                    if row is None:
+                        return None
+                    await connection.execute(
+                        """
+                        UPDATE CrawlDomains
+                        SET locked_by = $2, lock_expires = NOW() + make_interval(secs => $3)
+                        WHERE domain = $1;
+                        """,
+                        row["domain"], self.node_id, self.lease_seconds,
+                    )
+                    await connection.execute(
+                        """
+                        UPDATE CrawlFrontier
+                        SET state = 'leased', lease_owner = $2,
+                            lease_expires = NOW() + make_interval(secs => $3), updated_at = NOW()
+                        WHERE url = $1;
+                        """,
+                        row["url"], self.node_id, self.lease_seconds,
+                    )
+        except Exception as e:
+            error(f"Frontier lease failed: {e}")
+            return None
+
+        domain = row["domain"]
+        self._leased[domain] = row["url"]
+        # A domain first seen through a lease is assumed to have more until the heartbeat recounts it
+        self._queued[domain] = self._queued[domain] - 1 if domain in self._queued else 1
+        self.leases_granted += 1
+        return row["url"], row["source"], row["depth"], row["domain"]
+
+    def release(self, domain: str, ok: bool = True):
+        """Finish the URL leased for `domain`; the domain unlocks after `polite_delay` (backed off on errors)."""
+        url = self._leased.pop(domain, None)
+        if url is not None:
+            self._releases.append((domain, ok, url))
+            self.completed += 1
+
+    # ---------- Flushing / heartbeat ----------
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._puts and not self._releases:
+                return
+            puts, self._puts = list(self._puts.values()), {}
+            releases, self._releases = self._releases, []
+            try:
+                async with self.pool.acquire() as connection:
+                    async with connection.transaction():
+                        if puts:
+                            await connection.executemany(
+                                """
+                                INSERT INTO CrawlDomains (domain) VALUES ($1)
+                                ON CONFLICT (domain) DO NOTHING;
+                                """,
+                                [(domain,) for domain in {row[5] for row in puts}],
+                            )
+                            # Stale 'done' rows are re-queued (recrawl); everything else is already known
+                            await connection.executemany(
+                                """
+                                INSERT INTO CrawlFrontier (url, site_root, source, depth, priority, domain, state, updated_at)
+                                VALUES ($1, $2, $3, $4, $5, $6, 'queued', NOW())
+                                ON CONFLICT (url) DO UPDATE
+                                SET state = 'queued', priority = EXCLUDED.priority, updated_at = NOW()
+                                WHERE CrawlFrontier.state = 'done'
+                                  AND CrawlFrontier.updated_at < NOW() - make_interval(hours => $7::int);
+                                """,
+                                [row + (int(self.requeue_after_hours),) for row in puts],
+                            )
+                            # Rows checkpointed without a domain (older single-process runs) are
+                            # invisible to the lease join until they get one
+                            await connection.execute(
+                                """
+                                UPDATE CrawlFrontier f SET domain = v.domain
+                                FROM unnest($1::text[], $2::text[]) AS v(url, domain)
+                                WHERE f.url = v.url AND f.domain IS NULL;
+                                """,
+                                [row[0] for row in puts], [row[5] for row in puts],
+                            )
+                        if releases:
+                            await connection.executemany(
+                                """
+                                UPDATE CrawlDomains
+                                SET locked_by = NULL, lock_expires = NULL,
+                                    backoff = CASE WHEN $2 THEN 1 ELSE LEAST(backoff * 2, $4) END,
+                                    next_fetch_at = NOW() + make_interval(
+                                        secs => $3 * CASE WHEN $2 THEN 1 ELSE LEAST(backoff * 2, $4) END)
+                                WHERE domain = $1 AND locked_by = $5;
+                                """,
+                                [(domain, ok, self.polite_delay, self.MAX_BACKOFF, self.node_id)
+                                 for domain, ok, _ in releases],
+                            )
+                            await connection.executemany(
+                                """
+                                UPDATE CrawlFrontier
+                                SET state = 'done', lease_owner = NULL, lease_expires = NULL, updated_at = NOW()
+                                WHERE url = $1 AND lease_owner = $2;
+                                """,
+                                [(url, self.node_id) for _, _, url in releases],
+                            )
+            except Exception as e:
+                # Keep them for the next attempt; expired leases are recovered by other nodes anyway
+                for row in puts:
+                    self._puts.setdefault(row[0], row)
+                self._releases[:0] = releases
+                error(f"Shared frontier flush failed: {e}")
+
+    async def heartbeat(self):
+        """
+        Renew this node's leases and locks, re-queue leases that expired on
+        any node (crashed workers) and publish this node's status in CrawlNodes.
+        """
+        try:
+            async with self.pool.acquire() as connection:
+                await connection.execute(
+                    """
+                    UPDATE CrawlFrontier SET lease_expires = NOW() + make_interval(secs => $2)
+                    WHERE lease_owner = $1 AND state = 'leased';
+                    """,
+                    self.node_id, self.lease_seconds,
+                )
+                await connection.execute(
+                    """
+                    UPDATE CrawlDomains SET lock_expires = NOW() + make_interval(secs => $2)
+                    WHERE locked_by = $1;
+                    """,
+                    self.node_id, self.lease_seconds,
+                )
+                await connection.execute(
+                    """
+                    UPDATE CrawlFrontier
+                    SET state = 'queued', lease_owner = NULL, lease_expires = NULL
+                    WHERE state = 'leased' AND lease_expires < NOW();
+                    """
+                )
+                await connection.execute(
+                    """
+                    INSERT INTO CrawlNodes (node_id, host, pid, started_at, heartbeat_at, leases_granted, in_flight, completed)
+                    VALUES ($1, $2, $3, NOW(), NOW(), $4, $5, $6)
+                    ON CONFLICT (node_id) DO UPDATE
+                    SET heartbeat_at = NOW(),
+                        leases_granted = EXCLUDED.leases_granted,
+                        in_flight = EXCLUDED.in_flight,
+                        completed = EXCLUDED.completed;
+                    """,
+                    self.node_id, socket.gethostname(), os.getpid(),
+                    self.leases_granted, len(self._leased), self.completed,
+                )
+                rows = await connection.fetch(
+                    """
+                    SELECT source = $1 AS inner, COUNT(*) AS n
+                    FROM CrawlFrontier
+                    WHERE state = 'queued'
+                    GROUP BY 1;
+                    """,
+                    self.INNER,
+                )
+                domains = await connection.fetch(
+                    """
+                    SELECT domain, COUNT(*) AS n
+                    FROM CrawlFrontier
+                    WHERE state = 'queued' AND domain = ANY($1::text[])
+                    GROUP BY domain;
+                    """,
+                    list(self._queued),
+                )
+            counts = {row["inner"]: row["n"] for row in rows}
+            self._pending_cache = {"inner": counts.get(True, 0), "outer": counts.get(False, 0)}
+            # Domains with nothing queued drop out; puts still buffered locally keep theirs
+            queued = {row["domain"]: row["n"] for row in domains}
+            for _, _, _, _, _, domain in self._puts.values():
+                queued[domain] = queued.get(domain, 0) + 1
+            self._queued = queued
+        except Exception as e:
+            warning(f"Frontier heartbeat failed: {e}")
+
+    async def run(self, stop_event: asyncio.Event):
+        """Flush buffered puts/releases and heartbeat until `stop_event` is set; final flush on stop."""
+        last_beat = 0.0
+        try:
+            while not stop_event.is_set():
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                await self.flush()
+                if time.monotonic() - last_beat >= self.heartbeat_interval:
+                    await self.heartbeat()
+                    last_beat = time.monotonic()
+        finally:
+            await self.flush()
+            await self.heartbeat()
+
+    # ---------- Introspection ----------
+    def pending_count(self, inner: bool | None = None) -> int:
+        """Cluster-wide queued URLs as of the last heartbeat."""
+        if inner is None:
+            return self._pending_cache["inner"] + self._pending_cache["outer"]
+        return self._pending_cache["inner" if inner else "outer"]
+
+    def in_flight_count(self) -> int:
+        return len(self._leased)
+
+    def has_work(self, domain: str) -> bool:
+        """True while the domain has a URL leased here or queued rows (cluster-wide, as of the last heartbeat)."""
+        return domain in self._leased or self._queued.get(domain, 0) > 0
+
+    def snapshot(self) -> dict:
+        return {
+            "node_id": self.node_id,
+            "pending": self.pending_count() + len(self._puts),
+            "in_flight": len(self._leased),
+            "leases_granted": self.leases_granted,
+            "completed": self.completed,
+            "empty_polls": self.empty_polls,
+            "domains": {},
+        }
+
+    async def cluster_status(self) -> dict:
+        """Coordinator view: queue states, live nodes and domain locks across the cluster."""
+        async with self.pool.acquire() as connection:
+            summary = await connection.fetchrow("SELECT * FROM CrawlClusterStatus;")
+            nodes = await connection.fetch(
+                """
+                SELECT node_id, host, pid, started_at, heartbeat_at, leases_granted, in_flight, completed,
+                       heartbeat_at > NOW() - make_interval(secs => $1) AS alive
+                FROM CrawlNodes
+                ORDER BY heartbeat_at DESC;
+                """,
+                self.lease_seconds,
+            )
+        return {
+            "summary": dict(summary) if summary else {},
+            "nodes": [
+                {**dict(row), "started_at": row["started_at"].isoformat(), "heartbeat_at": row["heartbeat_at"].isoformat()}
+                for row in nodes
+            ],
+        }
+
+
+class DistributedLinkManager(LinkManager):
+    """
+    LinkManager whose frontier is the shared CrawlFrontier table.
+    - Dedup across nodes comes from the table's primary key; local visited
+      sets only save round-trips.
+    - The shared table is the checkpoint, so the local FrontierStore is off.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, node_id: str | None = None, lease_seconds: float = 120.0, **kwargs):
+        kwargs["persist_frontier"] = False
+        super().__init__(pool, **kwargs)
+        self.frontier = DistributedFrontier(
+            pool, node_id=node_id, polite_delay=self.frontier.polite_delay, lease_seconds=lease_seconds
+        )
+
+    async def checkpoint_frontier(self, stop_event: asyncio.Event):
+        """Shared-frontier flushing and node heartbeat (replaces the local checkpoint)."""
+        await self.frontier.run(stop_event)
+
+    def complete(self, entry, ok: bool = True):
+        """Release the lease; the shared table records the URL as done."""
+        self.frontier.release(domain=entry[3], ok=ok)
+
+
+async def run_node(args):
+    """One crawler node: seeds (optional) + a UnifiedCrawler on the shared frontier."""
+    from Crawler.unified_crawler import UnifiedCrawler
+    from Essentials.configs import DB_CONFIG
+
+    pool = await asyncpg.create_pool(**DB_CONFIG, min_size=1, max_size=max(4, args.workers + 2))
+    link_manager = DistributedLinkManager(pool, node_id=args.node_id, max_depth=args.depth, keywords=args.keywords)
+    for url in args.seed:
+        await link_manager.add_url_to_DB(url, "manual", "manual")
+        await link_manager.add_url_LinksQueue(url)
+
+    crawler = UnifiedCrawler(link_manager, max_depth=args.depth, polite_delay=args.polite_delay, workers=args.workers)
+    info(f"🛰️ Crawler node {link_manager.frontier.node_id} joining the shared frontier")
+    task = asyncio.create_task(crawler.start())
+    try:
+        if args.duration:
+            await asyncio.sleep(args.duration)
+            await crawler.stop()
+        await task
+    finally:
+        await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a crawler node against the shared PostgreSQL frontier.")
+    parser.add_argument("--node-id", default=None)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--polite-delay", type=float, default=2.0)
+    parser.add_argument("--duration", type=float, default=0, help="Stop after N seconds (0 = run until killed)")
+    parser.add_argument("--seed", action="append", default=[], help="Onion URL to queue (repeatable)")
+    parser.add_argument("--keywords", nargs="*", default=[])
+    asyncio.run(run_node(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class DomainStats:
+    """Per-domain frontier counters (queue depth and politeness wait times)."""
+
+    __slots__ = ("queued", "dispatched", "total_wait", "max_wait", "backoff")
+
+    def __init__(self):
+        self.queued = 0          # URLs currently waiting for this domain
+        self.dispatched = 0      # URLs handed to workers
+        self.total_wait = 0.0    # seconds between enqueue and dispatch
+        self.max_wait = 0.0
+        self.backoff = 1.0       # multiplier applied to polite_delay
+
+    def as_dict(self) -> dict:
+        return {
+            "queued": self.queued,
+            "dispatched": self.dispatched,
+            "avg_wait": round(self.total_wait / self.dispatched, 3) if self.dispatched else 0.0,
+            "max_wait": round(self.max_wait, 3),
+            "backoff": self.backoff,
+        }
+
+
+class FrontierScheduler:
+    """
+    Per-domain politeness scheduler for the crawl frontier.
+    - Every domain keeps its own priority queue of pending URLs (inner links
+      before site roots, then highest score, FIFO among equal scores) and a
+      next-allowed fetch time.
+    - Domains wait in a min-heap keyed on that ready time; once ready they move
+      to a heap keyed on their best URL, so workers get the most valuable URL
+      among all domains that politeness allows right now.
+    - The key is lexicographic (is_inner, score): inner links of sites already
+      being crawled always come before fresh site roots, whatever their depth,
+      and the score only orders URLs within each of the two groups.
+    - A domain is checked out while one of its URLs is in flight; `release()`
+      re-arms it after `polite_delay`, backing off on timeouts and errors.
+    - Once a drained domain's politeness delay has passed its state is
+      dropped, so memory follows the active domains, not every domain seen.
+    - Not thread-safe: other threads read it through the event loop
+      (see API `on_crawler_loop`).
+    """
+
+    INNER = "InnerLink"
+    MAX_BACKOFF = 32.0
+
+    def __init__(self, polite_delay: float = 2.0):
+        self.polite_delay = polite_delay
+        self._pending = {}        # domain -> heap[(key, seq, url, source, depth, enqueued_at)]
+        self._ready_at = {}       # domain -> monotonic time of next allowed fetch
+        self._waiting = []        # (ready_at, seq, domain) for domains still in their politeness delay
+        self._ready = []          # (domain_key, seq, domain) for domains that may be fetched now
+        self._ready_key = {}      # domain -> its live _ready entry key (older entries are stale)
+        self._scheduled = set()   # domains currently present in one of the heaps
+        self._in_flight = set()
+        self._idle = []           # (ready_at, domain) for drained domains, pruned once ready
+        self._pending_total = 0
+        self._pending_inner = 0
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self.stats = {}           # domain -> DomainStats
+
+    # ---------- Producers ----------
+    def put(self, domain: str, url: str, source: str, depth: int = 0, priority: float = 0.0):
+        queue = self._pending.setdefault(domain, [])
+        heapq.heappush(queue, (self.url_key(source, priority), next(self._seq), url, source, depth, time.monotonic()))
+        self._domain_stats(domain).queued += 1
+        self._pending_total += 1
+        if source == self.INNER:
+            self._pending_inner += 1
+        if domain in self._ready_key:
+            # Already ready: re-key it if the new URL outranks its best one
+            if self._domain_key(domain) < self._ready_key[domain]:
+                self._make_ready(domain)
+        elif domain not in self._scheduled and domain not in self._in_flight:
+            self._schedule(domain)
+        self._wakeup.set()
+
+    # ---------- Consumers ----------
+    async def get(self, timeout: float | None = None):
+        """
+        Wait for the highest-priority URL among domains whose politeness delay has passed.
+        Returns (url, source, depth, domain), or None if nothing became ready within `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            self._prune(now)
+            while self._waiting and self._waiting[0][0] <= now:
+                _, _, domain = heapq.heappop(self._waiting)
+                self._make_ready(domain)
+            while self._ready:
+                key, _, domain = heapq.heappop(self._ready)
+                if self._ready_key.get(domain) == key:
+                    del self._ready_key[domain]
+                    return self._dispatch(domain, now)
+
+            wake_at = self._waiting[0][0] if self._waiting else None
+            if deadline is not None:
+                if now >= deadline:
+                    return None
+                wake_at = deadline if wake_at is None else min(wake_at, deadline)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    None if wake_at is None else max(0.0, wake_at - now),
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, domain: str, ok: bool = True):
+        """Mark the in-flight URL of `domain` as done and re-arm the domain."""
+        self._in_flight.discard(domain)
+        stats = self._domain_stats(domain)
+        stats.backoff = 1.0 if ok else min(stats.backoff * 2, self.MAX_BACKOFF)
+        self._ready_at[domain] = time.monotonic() + self.polite_delay * stats.backoff
+
+        if self._pending.get(domain):
+            self._schedule(domain)
+            self._wakeup.set()
+        else:
+            # Nothing left for this domain — drop its queue, politeness state goes once it expires
+            self._pending.pop(domain, None)
+            heapq.heappush(self._idle, (self._ready_at[domain], domain))
+
+    # ---------- Introspection ----------
+    def pending_count(self, inner: bool | None = None) -> int:
+        if inner is None:
+            return self._pending_total
+        return self._pending_inner if inner else self._pending_total - self._pending_inner
+
+    def in_flight_count(self) -> int:
+        return len(self._in_flight)
+
+    def has_work(self, domain: str) -> bool:
+        """True while the domain still has queued URLs or one in flight."""
+        return bool(self._pending.get(domain)) or domain in self._in_flight
+
+    def snapshot(self) -> dict:
+        """Queue depth and wait-time stats per domain."""
+        return {
+            "pending": self._pending_total,
+            "in_flight": len(self._in_flight),
+            "domains_waiting": len(self._scheduled),
+            "domains": {domain: s.as_dict() for domain, s in self.stats.items()},
+        }
+
+    # ---------- Internals ----------
+    def _domain_stats(self, domain: str) -> DomainStats:
+        stats = self.stats.get(domain)
+        if stats is None:
+            stats = self.stats[domain] = DomainStats()
+        return stats
+
+    @classmethod
+    def url_key(cls, source: str, priority: float) -> tuple[int, float]:
+        """Heap key of a URL (smaller is served first): inner links, then score."""
+        return (0 if source == cls.INNER else 1, -priority)
+
+    def _domain_key(self, domain: str) -> tuple[int, float]:
+        return self._pending[domain][0][0]
+
+    def _prune(self, now: float):
+        """Forget drained domains whose politeness delay has passed."""
+        while self._idle and self._idle[0][0] <= now:
+            _, domain = heapq.heappop(self._idle)
+            if domain in self._pending or domain in self._in_flight or self._ready_at.get(domain, 0.0) > now:
+                continue  # busy again, or re-armed with a later ready time
+            self._ready_at.pop(domain, None)
+            self.stats.pop(domain, None)
+
+    def _schedule(self, domain: str):
+        heapq.heappush(self._waiting, (self._ready_at.get(domain, 0.0), next(self._seq), domain))
+        self._scheduled.add(domain)
+
+    def _make_ready(self, domain: str):
+        key = self._domain_key(domain)
+        self._ready_key[domain] = key
+        heapq.heappush(self._ready, (key, next(self._seq), domain))
+
+    def _dispatch(self, domain: str, now: float):
+        self._scheduled.discard(domain)
+        self._in_flight.add(domain)
+        _, _, url, source, depth, enqueued_at = heapq.heappop(self._pending[domain])
+
+        self._pending_total -= 1
+        if source == self.INNER:
+            self._pending_inner -= 1
+
+        stats = self._domain_stats(domain)
+        waited = now - enqueued_at
+        stats.queued -= 1
+        stats.dispatched += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+        return url, source, depth, domain
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+import asyncpg
+
+from Crawler.write_buffer import DB_FLUSH_SECONDS, DB_ROWS_FLUSHED
+from Essentials.utils import onion_domain
+from Logging_Mechanism.logger import info, error
+
+
+class FrontierStore:
+    """
+    Durable checkpoint of the crawl frontier in the CrawlFrontier table.
+    - Every queued URL is recorded as 'queued', every crawled URL as 'done'.
+    - Rows carry their onion domain, so a later distributed run can lease them.
+    - Writes are buffered in memory and flushed in batches (by size or time).
+    - `load()` returns what a restarted crawler needs to resume where it left off.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, batch_size: int = 500, flush_interval: float = 5.0):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = {}  # url -> (url, site_root, source, depth, state, updated_at, priority, domain)
+        self._flush_lock = asyncio.Lock()
+        self._batch_full = asyncio.Event()
+
+    def record(self, url: str, site_root: str, source: str, depth: int, state: str, priority: float = 0.0):
+        """Buffer a state change; the latest state per URL wins within a batch."""
+        self._buffer[url] = (url, site_root, source, depth, state, datetime.now(timezone.utc), priority, onion_domain(url))
+        if len(self._buffer) >= self.batch_size:
+            self._batch_full.set()
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = list(self._buffer.values()), {}
+            self._batch_full.clear()
+            start = time.perf_counter()
+            try:
+                async with self.pool.acquire() as connection:
+                    await connection.executemany(
+                        """
+                        INSERT INTO CrawlFrontier (url, site_root, source, depth, state, updated_at, priority, domain)
+                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                        ON CONFLICT (url) DO UPDATE
+                        SET state = EXCLUDED.state,
+                            depth = EXCLUDED.depth,
+                            updated_at = EXCLUDED.updated_at,
+                            priority = EXCLUDED.priority,
+                            domain = COALESCE(CrawlFrontier.domain, EXCLUDED.domain);
+                        """,
+                        rows,
+                    )
+                DB_FLUSH_SECONDS.observe(time.perf_counter() - start, store="frontier")
+                DB_ROWS_FLUSHED.inc(len(rows), store="frontier")
+                info(f"💾 Frontier checkpoint: {len(rows)} rows flushed.")
+            except Exception as e:
+                # Keep the rows for the next attempt unless newer states replaced them
+                for row in rows:
+                    self._buffer.setdefault(row[0], row)
+                error(f"Frontier checkpoint failed: {e}")
+
+    async def run(self, stop_event: asyncio.Event):
+        """Flush every `flush_interval` seconds or whenever a batch fills up; final flush on stop."""
+        try:
+            while not stop_event.is_set():
+                waiters = [
+                    asyncio.ensure_future(stop_event.wait()),
+                    asyncio.ensure_future(self._batch_full.wait()),
+                ]
+                try:
+                    await asyncio.wait(waiters, timeout=self.flush_interval, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for waiter in waiters:
+                        waiter.cancel()
+                await self.flush()
+        finally:
+            await self.flush()
+
+    async def load(self, hours_threshold: int = 6) -> list:
+        """
+        Return frontier rows worth resuming: everything still queued plus URLs
+        crawled within `hours_threshold`. Older 'done' rows are pruned so those
+        sites become eligible for a fresh crawl.
+        """
+        threshold_time = datetime.now(timezone.utc) - timedelta(hours=hours_threshold)
+        async with self.pool.acquire() as connection:
+            await connection.execute(
+                "DELETE FROM CrawlFrontier WHERE state = 'done' AND updated_at < $1;",
+                threshold_time,
+            )
+            return await connection.fetch(
+                """
+                SELECT url, site_root, source, depth, state, priority
+                FROM CrawlFrontier
+                ORDER BY updated_at;
+                """
+            )
@@ -0,0 +1,88 @@
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from Logging_Mechanism.logger import warning
+
+ONION_PATTERN = re.compile(r"https?://[a-zA-Z0-9]{16,56}\.onion")
+# Cheap prefilter: the tokenizer only matters if the page has at least one <a> tag
+ANCHOR_TAG_PATTERN = re.compile(r"<a[\s/>\x00]", re.IGNORECASE)
+
+
+class _AnchorHrefParser(HTMLParser):
+    """
+    Streaming tokenizer that only looks at <a href> start tags (and, with
+    `anchors=True`, the text inside them).
+    Uses the same tokenizer as BeautifulSoup's "html.parser" builder (entity
+    handling, script/style CDATA, duplicate attributes: last wins) but never
+    builds a tree.
+    """
+
+    MAX_ANCHOR_CHARS = 200
+
+    def __init__(self, anchors: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.hrefs = []
+        self.texts = []
+        self._anchors = anchors
+        self._open = None  # text parts of the <a> currently open
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a":
+            return
+        href = None
+        for name, value in attrs:
+            if name == "href":
+                href = "" if value is None else value
+        if href is not None:
+            self.hrefs.append(href)
+            if self._anchors:
+                self._open = []
+                self.texts.append(self._open)
+
+    def handle_endtag(self, tag):
+        if tag == "a":
+            self._open = None
+
+    def handle_data(self, data):
+        if self._open is not None and sum(map(len, self._open)) < self.MAX_ANCHOR_CHARS:
+            self._open.append(data)
+
+
+def extract_onion_links(html: str, base_url: str = "") -> set[str]:
+    """
+    Extract .onion links from HTML: every <a href> resolved against `base_url`
+    that contains ".onion", plus bare onion URLs anywhere in the document.
+    Output matches the previous BeautifulSoup-based extractor.
+    """
+    return set(extract_onion_anchors(html, base_url, anchors=False))
+
+
+def extract_onion_anchors(html: str, base_url: str = "", anchors: bool = True) -> dict[str, str]:
+    """
+    Same links as `extract_onion_links`, mapped to their anchor text (all
+    anchors pointing at a URL joined; "" for bare URLs found in the text).
+    """
+    links = {}
+    try:
+        if ANCHOR_TAG_PATTERN.search(html):
+            parser = _AnchorHrefParser(anchors=anchors)
+            parser.feed(html)
+            parser.close()
+            for i, href in enumerate(parser.hrefs):
+                full = urljoin(base_url, href.strip())
+                if ".onion" in full:
+                    full = full.rstrip("/")
+                    text = " ".join("".join(parser.texts[i]).split()) if anchors else ""
+                    if text and links.get(full):
+                        links[full] = f"{links[full]} {text}"
+                    elif text:
+                        links[full] = text
+                    else:
+                        links.setdefault(full, "")
+    except Exception as e:
+        warning(f"Link tokenizer error: {e}")
+
+    for url in ONION_PATTERN.findall(html):
+        links.setdefault(url.rstrip("/"), "")
+    return links
@@ -1,9 +1,17 @@
 import asyncio
 import hashlib
-from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from datetime import datetime, timezone
 import asyncpg
 
-from Essentials.utils import remove_path_from_url
+from Crawler.frontier import FrontierScheduler
+from Crawler.frontier_store import FrontierStore
+from Crawler.priority import LinkScorer
+from Crawler.revisit import RevisitPolicy
+from Crawler.visited import make_visited_set, memory_per_million
+from Crawler.write_buffer import CrawlWriteBuffer
+from Essentials.html_store import HtmlStore, PAGE_BLOB_COLUMNS, PAGE_BLOB_JOIN
+from Essentials.utils import is_valid_onion_address, onion_domain, remove_path_from_url
 from Logging_Mechanism.logger import info, warning, error
 
 
@@ -13,54 +21,174 @@ class LinkManager:
     - Separates visited sets for sites vs pages.
     - Limits number of inner links per site.
     - Enforces maximum crawl depth.
+    - Schedules URLs through a per-domain politeness frontier.
+    - Checkpoints the frontier to the DB so a restarted crawler can resume.
+    - Page dedup uses a pluggable visited-set backend ("exact" or fixed-size "bloom");
+      site roots always use an exact set.
+    - Crawler writes (pages, exploratory sites, statuses) can go through a
+      batched write-behind buffer instead of one round-trip each.
+    - Keeps ETag / Last-Modified / html_hash per page for conditional recrawls.
+    - Known sites are re-queued by a change-rate driven revisit policy rather
+      than a fixed age threshold.
+    - URLs carry a relevance score (`scorer`) that orders the frontier.
     """
 
-    def __init__(self, pool: asyncpg.Pool, max_depth: int = 2, max_inner_links_per_site: int = 50):
+    VALIDATOR_SITES_CACHED = 256
+
+    def __init__(self, pool: asyncpg.Pool, max_depth: int = 2, max_inner_links_per_site: int = 50,
+                 polite_delay: float = 2.0, persist_frontier: bool = True,
+                 visited_backend: str = "exact", visited_capacity: int = 10_000_000,
+                 buffered_writes: bool = True, revisit_budget_per_hour: float = 200.0,
+                 keywords=()):
         self.pool = pool
-        self.LinksQueue = asyncio.Queue()          # Outer (site-level): (root_url, "OuterLink")
-        self.InnerLinksQueue = asyncio.Queue()     # Inner (page-level): (full_url, depth)
+        # Outer (site roots, "OuterLink") and inner (pages, "InnerLink") URLs share one frontier
+        self.frontier = FrontierScheduler(polite_delay=polite_delay)
+        self.frontier_store = FrontierStore(pool) if persist_frontier else None
+        self._frontier_restored = False
+        self.write_buffer = CrawlWriteBuffer(pool) if buffered_writes else None
+        self.html_store = HtmlStore(pool)
+        if self.write_buffer is not None:
+            self.write_buffer.on_flushed(self._on_writes_flushed)
+        self.revisit = RevisitPolicy(pool, budget_per_hour=revisit_budget_per_hour)
+        self._root_hashes = {}  # site_id -> html_hash of the root page fetched this visit
+        self.scorer = LinkScorer(keywords)
+        self._site_relevance = OrderedDict()  # site_id -> 0..1, small LRU
+
+        # Conditional recrawl: site_id -> {page_url: (etag, last_modified, html_hash, size)}
+        self._validators = OrderedDict()
+        # page_id -> (site_id, page_url, validators) for buffered pages not yet committed
+        self._unflushed_validators = {}
+        self.recrawl_stats = {
+            "conditional_requests": 0,
+            "not_modified": 0,         # 304 responses
+            "unchanged_content": 0,    # 200 responses whose html_hash matched
+            "writes_skipped": 0,
+            "bytes_saved": 0,          # body bytes not downloaded or not rewritten
+        }
         self.visited_sites = set()
-        self.visited_pages = set()
+        self.visited_pages = make_visited_set(visited_backend, capacity=visited_capacity)
 
         # Control limits
         self.max_depth = max_depth
         self.max_inner_links_per_site = max_inner_links_per_site
 
-        # Track how many inner pages we've queued per domain
+        # Track how many inner pages we've queued per onion domain
         self.domain_inner_counts = {}
 
-    async def init_LinksQueue(self, hours_threshold: int = 6):
-        """Initialize queue from DB (site roots)."""
-        threshold_time = datetime.now(timezone.utc) - timedelta(hours=hours_threshold)
+    async def init_LinksQueue(self, hours_threshold: int = 6, limit: int | None = None):
+        """
+        Initialize queue from DB (site roots), resuming any checkpointed frontier first.
+        Which known sites are due is decided by the revisit policy (estimated
+        change rate and liveness against the fetch budget); `limit` caps how
+        many are queued in this run.
+        """
+        await self.restore_frontier(hours_threshold)
 
         try:
-            async with self.pool.acquire() as connection:
-                rows = await connection.fetch(
-                    "SELECT url FROM OnionSites WHERE last_seen IS NULL OR last_seen < $1;",
-                    threshold_time,
-                )
-
-                for row in rows:
-                    site_root = remove_path_from_url(row["url"])
-                    if site_root not in self.visited_sites:
-                        await self.LinksQueue.put((site_root, "OuterLink"))
-                        self.visited_sites.add(site_root)
+            urls = await self.revisit.due_sites(limit=limit)
+            queued = 0
+            for url in urls:
+                site_root = remove_path_from_url(url)
+                if site_root not in self.visited_sites:
+                    self._enqueue(site_root, "OuterLink", 0)
+                    self.visited_sites.add(site_root)
+                    queued += 1
 
-            info(f"✅ Initialized LinksQueue with {len(rows)} URLs.")
+            info(f"✅ Initialized LinksQueue with {queued} URLs.")
         except Exception as e:
             error(f"init_LinksQueue failed: {e}")
 
+    async def restore_frontier(self, hours_threshold: int = 6):
+        """
+        Rebuild visited sets, per-domain counts and pending URLs from the
+        CrawlFrontier checkpoint. Runs at most once per LinkManager.
+        """
+        if self.frontier_store is None or self._frontier_restored:
+            return
+        self._frontier_restored = True
+
+        try:
+            rows = await self.frontier_store.load(hours_threshold)
+        except Exception as e:
+            error(f"Frontier restore failed: {e}")
+            return
+
+        requeued = 0
+        for row in rows:
+            url, site_root, source, depth = row["url"], row["site_root"], row["source"], row["depth"]
+            if source == "InnerLink":
+                if url in self.visited_pages:
+                    continue
+                self.visited_pages.add(url)
+                domain = onion_domain(url)
+                self.domain_inner_counts[domain] = self.domain_inner_counts.get(domain, 0) + 1
+            else:
+                if site_root in self.visited_sites:
+                    continue
+                self.visited_sites.add(site_root)
+
+            if row["state"] == "queued":
+                self.frontier.put(onion_domain(url), url, source, depth, row["priority"] or 0.0)
+                requeued += 1
+
+        info(f"♻️ Restored frontier: {len(rows)} checkpointed URLs, {requeued} re-queued.")
+
+    def _enqueue(self, url: str, source: str, depth: int, priority: float = 0.0):
+        # Politeness is per onion service, so subdomains share one frontier domain
+        self.frontier.put(onion_domain(url), url, source, depth, priority)
+        if self.frontier_store is not None:
+            self.frontier_store.record(url, remove_path_from_url(url), source, depth, "queued", priority)
+
+    # ---------- Relevance ----------
+    def set_keywords(self, keywords):
+        """Keywords of this run; they drive the frontier priority of discovered URLs."""
+        self.scorer.set_keywords(keywords)
+        self._site_relevance.clear()
+
+    async def site_relevance(self, url: str) -> float:
+        """0..1 relevance of a URL's site (classifier label or seed keyword), cached per site."""
+        if not self.scorer.keywords:
+            return 0.0
+        site_id = hashlib.sha256(remove_path_from_url(url).encode()).hexdigest()
+        if site_id in self._site_relevance:
+            self._site_relevance.move_to_end(site_id)
+            return self._site_relevance[site_id]
+        relevance = 0.0
+        try:
+            async with self.pool.acquire() as connection:
+                row = await connection.fetchrow(
+                    """
+                    SELECT o.keyword, c.predicted_keyword, c.confidence
+                    FROM OnionSites o
+                    LEFT JOIN SiteClassification c ON c.site_id = o.site_id
+                    WHERE o.site_id = $1
+                    LIMIT 1;
+                    """,
+                    site_id
+                )
+            if row is not None:
+                relevance = self.scorer.site_relevance(row["keyword"], row["predicted_keyword"], row["confidence"])
+        except Exception as e:
+            error(f"Site relevance lookup failed for {url}: {e}")
+        self._site_relevance[site_id] = relevance
+        if len(self._site_relevance) > 10_000:
+            self._site_relevance.popitem(last=False)
+        return relevance
+
     # ---------- Site-level (outer) queue ----------
-    async def add_url_LinksQueue(self, url: str):
-        """Add a new site root to LinksQueue."""
+    async def add_url_LinksQueue(self, url: str, priority: float = 0.0):
+        """Add a new site root to LinksQueue (malformed onion addresses are never fetchable)."""
         site_root = remove_path_from_url(url)
         if site_root not in self.visited_sites:
-            await self.LinksQueue.put((site_root, "OuterLink"))
+            if not is_valid_onion_address(site_root):
+                warning(f"⛔ Skipping malformed onion address: {site_root}")
+                return
+            self._enqueue(site_root, "OuterLink", 0, priority)
             self.visited_sites.add(site_root)
             info(f"🌍 Added to LinksQueue (site root): {site_root}")
 
     # ---------- Page-level (inner) queue ----------
-    async def add_url_InnerLinksQueue(self, page_url: str, depth: int):
+    async def add_url_InnerLinksQueue(self, page_url: str, depth: int, priority: float = 0.0):
         """
         Add full page URL to InnerLinksQueue if:
         - Not visited.
@@ -73,14 +201,14 @@ class LinkManager:
             return
 
         # Track domain count
-        domain = remove_path_from_url(normalized)
+        domain = onion_domain(normalized)
         count = self.domain_inner_counts.get(domain, 0)
         if count >= self.max_inner_links_per_site:
             warning(f"🚫 Skipping inner link — limit {self.max_inner_links_per_site} reached for {domain}")
             return
 
         if normalized not in self.visited_pages:
-            await self.InnerLinksQueue.put((normalized, depth))
+            self._enqueue(normalized, "InnerLink", depth, priority)
             self.visited_pages.add(normalized)
             self.domain_inner_counts[domain] = count + 1
             info(f"↳ Added to InnerLinksQueue (depth={depth}) [{count+1}/{self.max_inner_links_per_site}]: {normalized}")
@@ -119,11 +247,106 @@ class LinkManager:
             return False
 
 
+    async def add_urls_to_DB(self, rows: list[tuple[str, str, str]]) -> list[str]:
+        """
+        Bulk variant of `add_url_to_DB` for (url, source, keyword) rows: one
+        INSERT ... SELECT FROM unnest(...) round-trip.
+        Returns:
+            list[str]: site roots that were newly inserted
+        """
+        sites = {}
+        for url, source, keyword in rows:
+            site_root = remove_path_from_url(url)
+            sites.setdefault(site_root, (source, keyword or ""))
+        if not sites:
+            return []
+
+        roots = list(sites)
+        now = datetime.now(timezone.utc)
+        try:
+            async with self.pool.acquire() as connection:
+                inserted = await connection.fetch(
+                    """
+                    INSERT INTO OnionSites (site_id, url, source, keyword, current_status, first_seen, last_seen)
+                    SELECT site_id, url, source, keyword, 'Alive', $5, $5
+                    FROM unnest($1::text[], $2::text[], $3::text[], $4::text[])
+                         AS s(site_id, url, source, keyword)
+                    ON CONFLICT (site_id) DO NOTHING
+                    RETURNING url;
+                    """,
+                    [hashlib.sha256(root.encode()).hexdigest() for root in roots],
+                    roots,
+                    [sites[root][0] for root in roots],
+                    [sites[root][1] for root in roots],
+                    now,
+                )
+        except Exception as e:
+            error(f"Bulk site insert failed ({len(roots)} sites): {e}")
+            return []
+
+        info(f"🗃️ Added {len(inserted)}/{len(roots)} new site roots to DB")
+        return [row["url"] for row in inserted]
+
+    async def copy_sites_to_DB(self, sites: dict[str, str], source: str, keyword: str = "") -> list[str]:
+        """
+        Bulk upsert for large seed imports: `sites` maps site_id -> site root.
+        Rows are COPY'd into a temp staging table and merged with one INSERT ... SELECT.
+        Returns:
+            list[str]: site roots that were newly inserted
+        """
+        if not sites:
+            return []
+        now = datetime.now(timezone.utc)
+        records = [(site_id, url, source, keyword, "Alive", now, now) for site_id, url in sites.items()]
+        try:
+            async with self.pool.acquire() as connection:
+                async with connection.transaction():
+                    await connection.execute(
+                        """
+                        CREATE TEMP TABLE IF NOT EXISTS sites_staging
+                        (LIKE OnionSites INCLUDING DEFAULTS) ON COMMIT DELETE ROWS;
+                        """
+                    )
+                    await connection.copy_records_to_table(
+                        "sites_staging",
+                        records=records,
+                        columns=["site_id", "url", "source", "keyword", "current_status", "first_seen", "last_seen"],
+                    )
+                    inserted = await connection.fetch(
+                        """
+                        INSERT INTO OnionSites (site_id, url, source, keyword, current_status, first_seen, last_seen)
+                        SELECT site_id, url, source, keyword, current_status, first_seen, last_seen
+                        FROM sites_staging
+                        ON CONFLICT (site_id) DO NOTHING
+                        RETURNING url;
+                        """
+                    )
+        except Exception as e:
+            error(f"Bulk site import failed ({len(records)} sites): {e}")
+            return []
+        return [row["url"] for row in inserted]
+
+    async def queue_url_to_DB(self, url: str, source: str, keyword: str = ""):
+        """
+        Insert a site root through the write-behind buffer (no result is returned).
+        Falls back to `add_url_to_DB` when buffering is disabled.
+        """
+        if self.write_buffer is None:
+            await self.add_url_to_DB(url, source, keyword)
+            return
+        site_root = remove_path_from_url(url)
+        url_hash = hashlib.sha256(site_root.encode()).hexdigest()
+        self.write_buffer.add_site(url_hash, site_root, source, keyword, datetime.now(timezone.utc))
+
     async def update_status_in_DB(self, url: str, status: str):
         """Update liveness for a site root."""
         site_root = remove_path_from_url(url)
         url_hash = hashlib.sha256(site_root.encode()).hexdigest()
         now = datetime.now(timezone.utc)
+        self.revisit.observe(url_hash, self._root_hashes.pop(url_hash, None), status == "Alive")
+        if self.write_buffer is not None:
+            self.write_buffer.update_status(url_hash, status, now)
+            return
         try:
             async with self.pool.acquire() as connection:
                 result = await connection.execute(
@@ -141,12 +364,18 @@ class LinkManager:
         except Exception as e:
             error(f"DB update failed for {site_root}: {e}")
 
-    async def add_html_page(self, page_url: str, html: str):
+    async def add_html_page(self, page_url: str, html: bytes | str, etag: str | None = None,
+                            last_modified: str | None = None) -> bool:
         """
-        Inserts a crawled HTML page into the Pages table (BYTEA compatible).
+        Stores a crawled HTML page: compressed content goes to HtmlBlobs once per
+        html_hash, the Pages row only references it. Skipped entirely when the
+        content hash and validators match what is already stored.
         Args:
             page_url: Full page URL
-            html: Raw HTML content as string
+            html: Raw HTML body as received (str is encoded as UTF-8)
+            etag / last_modified: Response validators for the next conditional GET
+        Returns:
+            bool: True if a write was issued, False if the page was unchanged
         """
         try:
             # Normalize & compute identifiers
@@ -154,39 +383,216 @@ class LinkManager:
             site_id = hashlib.sha256(site_root.encode()).hexdigest()
             page_id = hashlib.sha256(page_url.encode()).hexdigest()
 
-            html_bytes = html.encode("utf-8", errors="ignore")  # store as BYTEA
+            html_bytes = html if isinstance(html, bytes) else html.encode("utf-8", errors="ignore")
             html_hash = hashlib.sha256(html_bytes).hexdigest()
             crawl_date = datetime.now(timezone.utc)
+            if page_url == site_root:
+                self._root_hashes[site_id] = html_hash
+
+            previous = await self.get_page_validators(page_url)
+            if previous is not None and previous[2] == html_hash:
+                self.recrawl_stats["unchanged_content"] += 1
+                if previous[:2] == (etag, last_modified):
+                    self.recrawl_stats["writes_skipped"] += 1
+                    self.recrawl_stats["bytes_saved"] += len(html_bytes)
+                    return False
+            validators = (etag, last_modified, html_hash, len(html_bytes))
+
+            await self.html_store.load_dictionaries()
+            # zstd at level 10 costs milliseconds per page; keep it off the event loop
+            blob = await asyncio.to_thread(self.html_store.encode_blob, html_hash, html_bytes)
+
+            if self.write_buffer is not None:
+                # Validators are cached once the page is committed (see _on_writes_flushed)
+                self._unflushed_validators[page_id] = (site_id, page_url, validators)
+                self.write_buffer.add_page(page_id, site_id, page_url, html_hash, crawl_date, blob,
+                                           etag, last_modified)
+                return True
 
-            # Insert into Pages table
             async with self.pool.acquire() as connection:
-                await connection.execute(
-                    """
-                    INSERT INTO Pages (page_id, site_id, url, html_hash, raw_html, crawl_date)
-                    VALUES ($1, $2, $3, $4, $5, $6)
-                    ON CONFLICT (page_id) DO UPDATE
-                    SET html_hash = EXCLUDED.html_hash,
-                        raw_html = EXCLUDED.raw_html,
-                        crawl_date = EXCLUDED.crawl_date;
-                    """,
-                    page_id, site_id, page_url, html_hash, html_bytes, crawl_date
-                )
+                async with connection.transaction():
+                    if blob is not None:
+                        await connection.execute(
+                            """
+                            INSERT INTO HtmlBlobs (html_hash, codec, raw_size, data)
+                            VALUES ($1, $2, $3, $4)
+                            ON CONFLICT (html_hash) DO NOTHING;
+                            """,
+                            *blob
+                        )
+                    await connection.execute(
+                        """
+                        INSERT INTO Pages (page_id, site_id, url, html_hash, raw_html, crawl_date, etag, last_modified)
+                        VALUES ($1, $2, $3, $4, NULL, $5, $6, $7)
+                        ON CONFLICT (page_id) DO UPDATE
+                        SET html_hash = EXCLUDED.html_hash,
+                            raw_html = NULL,
+                            crawl_date = EXCLUDED.crawl_date,
+                            etag = EXCLUDED.etag,
+                            last_modified = EXCLUDED.last_modified;
+                        """,
+                        page_id, site_id, page_url, html_hash, crawl_date, etag, last_modified
+                    )
+            if blob is not None:
+                self.html_store.remember(html_hash)
+            self._remember_validators(site_id, page_url, validators)
 
             info(f"📝 Page stored successfully: {page_url}")
+            return True
 
         except Exception as e:
             error(f"❌ Page insert failed for {page_url}: {e}")
+            return False
+
+    def _on_writes_flushed(self, pages: list, blobs: list, dropped_pages: list):
+        """
+        Write-behind callback: only committed blobs count as stored for dedup, and
+        only committed pages get validators (a lost write must not turn the next
+        visit into a 304 or an "unchanged" skip).
+        """
+        for blob in blobs:
+            self.html_store.remember(blob[0])
+        for page in pages:
+            pending = self._unflushed_validators.pop(page[0], None)
+            if pending is not None:
+                self._remember_validators(*pending)
+        for page in dropped_pages:
+            self._unflushed_validators.pop(page[0], None)
+
+    # ---------- Conditional recrawl ----------
+    async def get_page_validators(self, page_url: str):
+        """
+        (etag, last_modified, html_hash, size) stored for a page, or None.
+        Validators are loaded once per site and kept in a small LRU.
+        """
+        site_id = hashlib.sha256(remove_path_from_url(page_url).encode()).hexdigest()
+        site = self._validators.get(site_id)
+        if site is None:
+            site = await self._load_site_validators(site_id)
+        else:
+            self._validators.move_to_end(site_id)
+        return site.get(page_url)
+
+    async def _load_site_validators(self, site_id: str) -> dict:
+        site = {}
+        try:
+            async with self.pool.acquire() as connection:
+                rows = await connection.fetch(
+                    f"""
+                    SELECT p.url, p.etag, p.last_modified, p.html_hash,
+                           COALESCE(b.raw_size, octet_length(p.raw_html)) AS size
+                    FROM Pages p
+                    {PAGE_BLOB_JOIN}
+                    WHERE p.site_id = $1;
+                    """,
+                    site_id
+                )
+            site = {r["url"]: (r["etag"], r["last_modified"], r["html_hash"], r["size"] or 0) for r in rows}
+        except Exception as e:
+            error(f"Validator lookup failed for site {site_id[:12]}: {e}")
+        self._validators[site_id] = site
+        if len(self._validators) > self.VALIDATOR_SITES_CACHED:
+            self._validators.popitem(last=False)
+        return site
+
+    def _remember_validators(self, site_id: str, page_url: str, validators: tuple):
+        site = self._validators.get(site_id)
+        if site is not None:
+            site[page_url] = validators
+
+    def conditional_headers(self, validators) -> dict:
+        """Request headers for a conditional GET (empty when nothing is stored)."""
+        headers = {}
+        if validators:
+            etag, last_modified = validators[0], validators[1]
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        if headers:
+            self.recrawl_stats["conditional_requests"] += 1
+        return headers
+
+    async def load_page_html(self, page_url: str, validators) -> bytes:
+        """Stored HTML for a 304 response, so its links can still be followed."""
+        self.recrawl_stats["not_modified"] += 1
+        self.recrawl_stats["writes_skipped"] += 1
+        self.recrawl_stats["bytes_saved"] += validators[3]
+        site_root = remove_path_from_url(page_url)
+        if page_url == site_root:
+            self._root_hashes[hashlib.sha256(site_root.encode()).hexdigest()] = validators[2]
+        page_id = hashlib.sha256(page_url.encode()).hexdigest()
+        async with self.pool.acquire() as connection:
+            row = await connection.fetchrow(
+                f"""
+                SELECT {PAGE_BLOB_COLUMNS}
+                FROM Pages p
+                {PAGE_BLOB_JOIN}
+                WHERE p.page_id = $1;
+                """,
+                page_id
+            )
+        if row is None:
+            return b""
+        try:
+            return await self.html_store.page_html(row)
+        except LookupError as e:
+            # Stored row without content: forget its validators so the next visit refetches it
+            warning(f"⚠️ Stored copy of {page_url} is missing ({e}); it will be fetched in full next time")
+            site = self._validators.get(hashlib.sha256(site_root.encode()).hexdigest())
+            if site is not None:
+                site.pop(page_url, None)
+            return b""
 
 
     # ---------- Queue helpers ----------
     async def has_inner_links(self) -> bool:
-        return not self.InnerLinksQueue.empty()
-
-    async def get_next_inner_link(self):
-        return await self.InnerLinksQueue.get()
+        return self.frontier.pending_count(inner=True) > 0
 
     async def has_links(self) -> bool:
-        return not self.LinksQueue.empty()
+        return self.frontier.pending_count(inner=False) > 0
+
+    async def next_ready(self, timeout: float | None = None):
+        """
+        Wait for the earliest-ready URL from any domain (inner links first).
+        Returns (url, source, depth, domain) or None on timeout.
+        The caller must hand the entry back with `complete()` once the fetch is done.
+        """
+        return await self.frontier.get(timeout=timeout)
+
+    def complete(self, entry, ok: bool = True):
+        """Hand a dispatched (url, source, depth, domain) entry back and checkpoint it as done."""
+        url, source, depth, domain = entry
+        self.frontier.release(domain, ok)
+        if self.frontier_store is not None:
+            self.frontier_store.record(url, remove_path_from_url(url), source, depth, "done")
+
+    async def checkpoint_frontier(self, stop_event: asyncio.Event):
+        """Background batched checkpointing until `stop_event` is set (final flush included)."""
+        if self.frontier_store is not None:
+            await self.frontier_store.run(stop_event)
+
+    async def run_write_behind(self, stop_event: asyncio.Event):
+        """Background flushing of buffered crawler writes until `stop_event` is set (drains on stop)."""
+        tasks = [self.revisit.run(stop_event)]
+        if self.write_buffer is not None:
+            tasks.append(self.write_buffer.run(stop_event))
+        await asyncio.gather(*tasks)
+
+    async def flush_writes(self):
+        if self.write_buffer is not None:
+            await self.write_buffer.flush()
+        await self.revisit.flush()
+
+    def frontier_stats(self) -> dict:
+        return self.frontier.snapshot()
 
-    async def get_next_link(self):
-        return await self.LinksQueue.get()
+    def visited_stats(self) -> dict:
+        """Size and memory footprint of the visited-page backend."""
+        return {
+            "backend": self.visited_pages.backend,
+            "pages": len(self.visited_pages),
+            "sites": len(self.visited_sites),
+            "memory_bytes": self.visited_pages.memory_bytes(),
+            "mib_per_million": round(memory_per_million(self.visited_pages), 2),
+        }
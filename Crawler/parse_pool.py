@@ -0,0 +1,68 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from Crawler.link_extractor import extract_onion_anchors
+from Crawler.priority import keyword_hits, keyword_pattern
+from Essentials.metrics import REGISTRY
+from Essentials.utils import onion_domain
+
+PARSE_SECONDS = REGISTRY.histogram(
+    "crawler_parse_seconds", "Parse + link extraction time per page, including pool queueing", ("mode",)
+)
+
+_keyword_pattern = lru_cache(maxsize=8)(keyword_pattern)
+
+
+def parse_page(html: str | bytes, base_url: str, keywords: tuple = ()):
+    """
+    CPU-bound part of processing a fetched page. Runs in a worker process.
+    Returns (page_domain, [(link, link_domain, anchor_keyword_hits), ...], page_keyword_hits).
+    """
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="ignore")
+    pattern = _keyword_pattern(keywords)
+    anchors = extract_onion_anchors(html, base_url, anchors=pattern is not None)
+    links = [
+        (link, onion_domain(link), keyword_hits(f"{text} {link}", pattern))
+        for link, text in anchors.items()
+    ]
+    return onion_domain(base_url), links, keyword_hits(html, pattern)
+
+
+class ParsePool:
+    """
+    Optional process-pool stage for HTML parsing and link extraction.
+    - `workers=0` parses inline on the event loop (previous behaviour).
+    - Otherwise pages go to a ProcessPoolExecutor; at most `max_backlog`
+      pages are queued or being parsed, so slow parsing applies back-pressure
+      to fetch workers instead of growing memory.
+    """
+
+    def __init__(self, workers: int = 0, max_backlog: int | None = None):
+        self.workers = max(0, int(workers))
+        self.max_backlog = max_backlog or max(1, self.workers * 4)
+        self._backlog = asyncio.Semaphore(self.max_backlog)
+        self._executor = None
+
+    def start(self):
+        if self.workers and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def parse(self, html: str | bytes, base_url: str, keywords: tuple = ()):
+        started = time.perf_counter()
+        if self._executor is None:
+            result = parse_page(html, base_url, keywords)
+            PARSE_SECONDS.observe(time.perf_counter() - started, mode="inline")
+            return result
+        async with self._backlog:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, parse_page, html, base_url, keywords)
+        PARSE_SECONDS.observe(time.perf_counter() - started, mode="process")
+        return result
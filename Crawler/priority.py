@@ -0,0 +1,58 @@
+import math
+import re
+
+
+def keyword_pattern(keywords) -> re.Pattern | None:
+    """One case-insensitive alternation for all keywords (None when there are none)."""
+    words = sorted({k.strip().lower() for k in keywords if k and k.strip()}, key=len, reverse=True)
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(w) for w in words), re.IGNORECASE)
+
+
+def keyword_hits(text: str, pattern: re.Pattern | None) -> int:
+    """Number of keyword occurrences in `text`."""
+    if pattern is None or not text:
+        return 0
+    return sum(1 for _ in pattern.finditer(text))
+
+
+class LinkScorer:
+    """
+    Cheap relevance score for a candidate URL, used as its frontier priority.
+    - Keyword hits in the anchor text / URL of the link itself.
+    - Keyword hits in the parent page (log-damped, long pages don't dominate).
+    - Parent site relevance: its classification or seed keyword matches the run's keywords.
+    - Depth penalty, so shallow pages of a relevant site come before deep ones.
+    With no keywords every URL scores by depth only; the frontier still serves
+    inner links before site roots, so the previous order is kept.
+    """
+
+    def __init__(self, keywords=(), anchor_weight: float = 3.0, parent_weight: float = 1.0,
+                 site_weight: float = 2.0, depth_penalty: float = 0.5):
+        self.anchor_weight = anchor_weight
+        self.parent_weight = parent_weight
+        self.site_weight = site_weight
+        self.depth_penalty = depth_penalty
+        self.set_keywords(keywords)
+
+    def set_keywords(self, keywords):
+        self.keywords = tuple(sorted({k.strip().lower() for k in keywords if k and k.strip()}))
+        self.pattern = keyword_pattern(self.keywords)
+
+    def site_relevance(self, seed_keyword: str | None, predicted: str | None, confidence: float | None) -> float:
+        """0..1 relevance of a site from its classifier label or the keyword that found it."""
+        if predicted and predicted.lower() in self.keywords:
+            return float(confidence or 1.0)
+        if seed_keyword and seed_keyword.lower() in self.keywords:
+            return 0.5
+        return 0.0
+
+    def score(self, anchor_hits: int = 0, parent_hits: int = 0, site_relevance: float = 0.0,
+              depth: int = 0) -> float:
+        return (
+            self.anchor_weight * min(anchor_hits, 3)
+            + self.parent_weight * math.log1p(parent_hits)
+            + self.site_weight * site_relevance
+            - self.depth_penalty * depth
+        )
@@ -0,0 +1,240 @@
+import asyncio
+import bisect
+import math
+from datetime import datetime, timedelta, timezone
+import asyncpg
+
+from Logging_Mechanism.logger import info, error
+
+
+# ---------- Change-rate model ----------
+def estimate_change_rate(intervals: int, changes: int, observed_hours: float,
+                         prior_rate: float = 1 / 24) -> float:
+    """
+    Changes per hour from `intervals` comparisons of successive content hashes,
+    `changes` of which differed, over `observed_hours` in total.
+    Uses the bias-reduced estimator -log((n - X + 0.5) / (n + 0.5)) / I, which
+    stays finite when every visit saw a change. Falls back to `prior_rate`
+    until there is something to compare.
+    """
+    if intervals <= 0 or observed_hours <= 0:
+        return prior_rate
+    mean_interval = observed_hours / intervals
+    ratio = (intervals - changes + 0.5) / (intervals + 0.5)
+    return max(-math.log(ratio) / mean_interval, 1e-6)
+
+
+def freshness(rate: float, frequency: float) -> float:
+    """Expected fraction of time our copy is up to date when revisiting `frequency` times per hour."""
+    if frequency <= 0:
+        return 0.0
+    r = rate / frequency
+    return (1 - math.exp(-r)) / r if r > 1e-9 else 1.0
+
+
+# g(r) = 1 - (1 + r) e^-r: marginal freshness of one more visit is g(rate / frequency) / rate
+_R_GRID = [10 ** (-4 + i * 6 / 1999) for i in range(2000)]  # 1e-4 .. 1e2
+_G_GRID = [1 - (1 + r) * math.exp(-r) for r in _R_GRID]
+
+
+def _inverse_g(value: float) -> float:
+    i = bisect.bisect_left(_G_GRID, value)
+    if i <= 0:
+        return _R_GRID[0]
+    if i >= len(_G_GRID):
+        return _R_GRID[-1]
+    g0, g1 = _G_GRID[i - 1], _G_GRID[i]
+    r0, r1 = _R_GRID[i - 1], _R_GRID[i]
+    return r0 + (r1 - r0) * (value - g0) / (g1 - g0)
+
+
+def optimal_frequencies(sites: list[tuple[float, float]], budget: float,
+                        min_frequency: float, max_frequency: float) -> list[float]:
+    """
+    Split `budget` fetches per hour over sites given as (change_rate, weight)
+    so that total weighted freshness is maximal (Lagrange condition
+    weight * dF/df = mu, found by bisection on mu). Sites that change faster
+    than the budget can follow get the floor rate rather than a share of it.
+    """
+    if not sites:
+        return []
+
+    def allocate(mu: float) -> list[float]:
+        freqs = []
+        for rate, weight in sites:
+            if weight <= 0 or weight / rate <= mu:
+                f = 0.0
+            else:
+                f = rate / _inverse_g(mu * rate / weight)
+            freqs.append(min(max(f, min_frequency), max_frequency))
+        return freqs
+
+    floor = min_frequency * len(sites)
+    if budget <= floor:
+        return [min_frequency] * len(sites)
+
+    lo, hi = 0.0, max(weight / rate for rate, weight in sites)
+    for _ in range(50):
+        mid = (lo + hi) / 2
+        if sum(allocate(mid)) > budget:
+            lo = mid
+        else:
+            hi = mid
+    return allocate(hi)
+
+
+class RevisitPolicy:
+    """
+    Decides which known sites are due for a recrawl.
+    - Every root-page visit is recorded: liveness plus the content hash, so
+      SiteRevisit accumulates how often successive hashes differed.
+    - Change rates are estimated per site; liveness (crawler visits plus
+      SiteLiveness checks) weights how much a fresh copy is worth.
+    - A fixed budget of fetches per hour is split to maximise expected
+      freshness; a site is due once 1 / frequency has passed since its last visit.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, budget_per_hour: float = 200.0,
+                 min_interval_hours: float = 1.0, max_interval_hours: float = 24 * 14,
+                 flush_interval: float = 10.0):
+        self.pool = pool
+        self.budget_per_hour = budget_per_hour
+        self.min_interval_hours = min_interval_hours
+        self.max_interval_hours = max_interval_hours
+        self.flush_interval = flush_interval
+        self._observations = []  # (site_id, html_hash, alive, seen_at, hashed_at)
+        self._flush_lock = asyncio.Lock()
+        self.last_plan = {}
+
+    # ---------- Observations ----------
+    def observe(self, site_id: str, html_hash: str | None, alive: bool):
+        """Record one visit to a site root; `html_hash` is None when no content was fetched."""
+        now = datetime.now(timezone.utc)
+        if not alive:
+            html_hash = None
+        self._observations.append((site_id, html_hash, int(alive), now, now if html_hash else None))
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._observations:
+                return
+            rows, self._observations = self._observations, []
+            try:
+                async with self.pool.acquire() as connection:
+                    # Sequential executemany: several visits of one site in a batch apply in order
+                    await connection.executemany(
+                        """
+                        INSERT INTO SiteRevisit (site_id, visits, alive_visits, last_hash, hashed_at, last_visit)
+                        VALUES ($1, 1, $3, $2, $5, $4)
+                        ON CONFLICT (site_id) DO UPDATE
+                        SET visits = SiteRevisit.visits + 1,
+                            alive_visits = SiteRevisit.alive_visits + EXCLUDED.alive_visits,
+                            intervals = SiteRevisit.intervals
+                                + (EXCLUDED.last_hash IS NOT NULL AND SiteRevisit.last_hash IS NOT NULL)::int,
+                            changes = SiteRevisit.changes
+                                + (EXCLUDED.last_hash IS NOT NULL AND SiteRevisit.last_hash IS NOT NULL
+                                   AND EXCLUDED.last_hash <> SiteRevisit.last_hash)::int,
+                            observed_hours = SiteRevisit.observed_hours
+                                + CASE WHEN EXCLUDED.last_hash IS NOT NULL AND SiteRevisit.hashed_at IS NOT NULL
+                                       THEN EXTRACT(EPOCH FROM EXCLUDED.last_visit - SiteRevisit.hashed_at) / 3600.0
+                                       ELSE 0 END,
+                            last_hash = COALESCE(EXCLUDED.last_hash, SiteRevisit.last_hash),
+                            hashed_at = COALESCE(EXCLUDED.hashed_at, SiteRevisit.hashed_at),
+                            last_visit = EXCLUDED.last_visit;
+                        """,
+                        rows,
+                    )
+            except Exception as e:
+                self._observations[:0] = rows
+                error(f"Revisit history flush failed: {e}")
+
+    async def run(self, stop_event: asyncio.Event):
+        """Flush observations every `flush_interval` seconds; final flush on stop."""
+        try:
+            while not stop_event.is_set():
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                await self.flush()
+        finally:
+            await self.flush()
+
+    # ---------- Planning ----------
+    async def due_sites(self, limit: int | None = None) -> list[str]:
+        """
+        Site root URLs to recrawl now, most overdue first. Sites the crawler
+        never visited (no SiteRevisit row, e.g. imported seeds) are always due,
+        whatever their OnionSites.last_seen; `limit` caps the result (e.g. one
+        planning window's budget).
+        """
+        await self.flush()
+        now = datetime.now(timezone.utc)
+        async with self.pool.acquire() as connection:
+            rows = await connection.fetch(
+                """
+                SELECT s.url,
+                       r.last_visit,
+                       r.site_id IS NULL AS never_visited,
+                       COALESCE(r.intervals, 0) AS intervals,
+                       COALESCE(r.changes, 0) AS changes,
+                       COALESCE(r.observed_hours, 0) AS observed_hours,
+                       COALESCE(r.visits, 0) + COALESCE(l.checks, 0) AS checks,
+                       COALESCE(r.alive_visits, 0) + COALESCE(l.alive, 0) AS alive
+                FROM OnionSites s
+                LEFT JOIN SiteRevisit r ON r.site_id = s.site_id
+                LEFT JOIN (
+                    SELECT site_id, COUNT(*) AS checks, COUNT(*) FILTER (WHERE status = 'Alive') AS alive
+                    FROM SiteLiveness
+                    WHERE check_time > $1
+                    GROUP BY site_id
+                ) l ON l.site_id = s.site_id;
+                """,
+                now - timedelta(days=30),
+            )
+
+        new_sites, known = [], []
+        for row in rows:
+            if row["never_visited"]:
+                new_sites.append(row["url"])
+                continue
+            rate = estimate_change_rate(row["intervals"], row["changes"], row["observed_hours"])
+            # Laplace-smoothed probability the site is up when we come back
+            weight = (row["alive"] + 1) / (row["checks"] + 2)
+            known.append((row, rate, weight))
+
+        freqs = optimal_frequencies(
+            [(rate, weight) for _, rate, weight in known],
+            self.budget_per_hour,
+            min_frequency=1 / self.max_interval_hours,
+            max_frequency=1 / self.min_interval_hours,
+        )
+
+        due = []
+        expected = 0.0
+        for (row, rate, weight), freq in zip(known, freqs):
+            expected += weight * freshness(rate, freq)
+            last_visit = row["last_visit"] or now
+            hours_since = (now - last_visit).total_seconds() / 3600
+            overdue = hours_since * freq  # >= 1 once a full revisit interval has passed
+            if overdue >= 1:
+                due.append((overdue, row["url"]))
+        due.sort(reverse=True)
+
+        urls = new_sites + [url for _, url in due]
+        if limit is not None:
+            urls = urls[:limit]
+
+        self.last_plan = {
+            "planned_at": now.isoformat(),
+            "sites": len(rows),
+            "never_crawled": len(new_sites),
+            "due": len(urls),
+            "budget_per_hour": self.budget_per_hour,
+            "expected_freshness": round(expected / len(known), 4) if known else None,
+        }
+        info(
+            f"🗓️ Revisit plan: {len(urls)} of {len(rows)} sites due "
+            f"(expected freshness {self.last_plan['expected_freshness']})"
+        )
+        return urls
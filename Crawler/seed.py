@@ -1,57 +1,85 @@
 import asyncio
 import hashlib
 import re
+import time
 from collections import deque
-from aiohttp import ClientSession, ClientTimeout
-from aiohttp_socks import ProxyConnector
+from itertools import islice
+from urllib.parse import quote_plus
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
 
+from Crawler.visited import make_visited_set
+from Essentials.configs import SEED_FAN_OUT, SEED_SOURCES
+from Essentials.utils import is_valid_onion_address, remove_path_from_url
 from Logging_Mechanism.logger import info, warning, error
 
 
-class SeedCollector:
-    """Collects initial onion seeds via Ahmia or file."""
+# Onion host anywhere in a seed-list line: bare, with scheme, or with a path. The left
+# boundary keeps an over-long (malformed) host from being cut down to a valid-looking one.
+SEED_LINE_PATTERN = re.compile(
+    r"(?<![\w-])(?:(https?)://)?((?:[a-z0-9-]+\.)*[a-z2-7]{16}(?:[a-z2-7]{40})?)\.onion\b", re.IGNORECASE
+)
+
 
-    def __init__(self, link_manager, tor_proxy="socks5://127.0.0.1:9050", max_depth=2, max_pages=8):
+class SeedCollector:
+    """
+    Collects initial onion seeds via clearnet search sources or file.
+    - Sources are URL templates (`SEED_SOURCES`), so a local stand-in can replace them.
+    - All keyword x source requests run concurrently on one pooled session,
+      bounded by `fan_out`; discovered seeds are stored with one bulk insert.
+    """
+
+    def __init__(self, link_manager, max_depth=2, max_pages=8,
+                 visited_backend="exact", sources=None, fan_out=SEED_FAN_OUT):
         self.link_manager = link_manager
-        self.tor_proxy = tor_proxy
+        self.sources = dict(sources or SEED_SOURCES)
+        self.fan_out = fan_out
+        self._fan_out = asyncio.Semaphore(fan_out)
+        self._session = None
         self.max_depth = max_depth
         self.max_pages = max_pages
-        self.timeout = ClientTimeout(total=30)
-        self.visited_hashes = set()
-        self.sem = asyncio.Semaphore(5)
+        self.visited_hashes = make_visited_set(visited_backend)  # site_ids (sha256 of the site root)
 
-    def _hash_url(self, url: str) -> str:
-        return hashlib.sha256(url.encode()).hexdigest()
+    def _site_id(self, url: str) -> str:
+        return hashlib.sha256(remove_path_from_url(url).encode()).hexdigest()
 
     def _extract_onion_links(self, html: str) -> list[str]:
         pattern = re.compile(r"http[s]?://[a-zA-Z0-9\-\.]{16,56}\.onion\b")
         return list(set(pattern.findall(html)))
     
 
-    async def _fetch(self, session: ClientSession, url: str) -> str:
-        for _ in range(3):
-            try:
-                async with self.sem:
-                    async with session.get(url, timeout=self.timeout) as resp:
-                        if resp.status == 200:
-                            return await resp.text(errors="ignore")
-            except Exception as e:
-                warning(f"Fetch failed for {url}: {e}")
-                await asyncio.sleep(2)
-        return ""
+    def _seed_priority(self, keyword: str) -> float:
+        """Frontier priority of a seed found for `keyword` (sites found by a run keyword go first)."""
+        scorer = self.link_manager.scorer
+        return scorer.score(site_relevance=scorer.site_relevance(keyword, None, None))
+
+    # ---------- Clearnet search sources ----------
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _clearnet_session(self) -> ClientSession:
+        """One pooled keep-alive session shared by every clearnet source request."""
+        if self._session is None or self._session.closed:
+            headers = {
+                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64)",
+                "Accept": "text/html,application/xhtml+xml",
+                "Accept-Language": "en-US,en;q=0.9",
+            }
+            connector = TCPConnector(limit=self.fan_out, limit_per_host=self.fan_out, ttl_dns_cache=300)
+            self._session = ClientSession(timeout=ClientTimeout(total=20), headers=headers, connector=connector)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
     async def _fetch_clearnet(self, url: str) -> str:
-        timeout = ClientTimeout(total=20)
-        headers = {
-            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64)",
-            "Accept": "text/html,application/xhtml+xml",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Connection": "close",
-        }
-
         try:
-            async with ClientSession(timeout=timeout, headers=headers) as session:
-                async with session.get(url) as resp:
+            async with self._fan_out:
+                async with self._clearnet_session().get(url) as resp:
                     if resp.status == 200:
                         return await resp.text(errors="ignore")
         except Exception as e:
@@ -59,88 +87,117 @@ class SeedCollector:
 
         return ""
 
+    async def _search_source(self, source: str, template: str, keyword: str) -> tuple[str, str, list[str]]:
+        html = await self._fetch_clearnet(template.format(query=quote_plus(keyword)))
+        if not html:
+            warning(f"{source} returned no data for keyword: {keyword}")
+        return source, keyword, self._extract_onion_links(html) if html else []
 
-    async def collect_from_ahmia_and_duckduckgo(self, keyword: str):
+    async def collect_keywords(self, keywords: list[str]) -> int:
         """
-        Reliable seed collection using:
-        - Ahmia (clearnet, primary)
-        - DuckDuckGo (clearnet references)
+        Query every source for every keyword concurrently (at most `fan_out`
+        requests in flight on the shared session), then store all new seeds
+        with one bulk insert. Every discovered site not seen in this run is
+        queued, including sites already in OnionSites. Returns the number of new sites.
         """
-
-        discovered = set()  # (url, source)
-
-        # ---------------- Ahmia (PRIMARY SOURCE) ----------------
-        ahmia_url = f"https://ahmia.fi/search/?q={keyword}&c7e83b=742c7e"
-        ahmia_html = await self._fetch_clearnet(ahmia_url)
-
-        if ahmia_html:
-            for u in self._extract_onion_links(ahmia_html):
-                discovered.add((u, "Ahmia"))
-                info("ahmia discoverd")
-        else:
-            warning(f"Ahmia returned no data for keyword: {keyword}")
-
-        # ---------------- DuckDuckGo (SECONDARY SOURCE) ----------------
-        ddg_url = f"https://duckduckgo.com/html/?q={keyword}+site:.onion"
-        ddg_html = await self._fetch_clearnet(ddg_url)
-
-        if ddg_html:
-            for u in self._extract_onion_links(ddg_html):
-                discovered.add((u, "DuckDuckGo"))
-        else:
-            warning(f"DuckDuckGo returned no data for keyword: {keyword}")
-
-        # ---------------- Deduplication + Storage ----------------
-        stored = 0
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            self._search_source(source, template, keyword)
+            for keyword in keywords
+            for source, template in self.sources.items()
+        ))
+
+        discovered = {}  # url -> (url, source, keyword); first source wins
         skipped = 0
-
-        for url, source in discovered:
-            h = self._hash_url(url)
-            if h not in self.visited_hashes:
-                self.visited_hashes.add(h)
-                await self.link_manager.add_url_to_DB(url, source, keyword)
-                await self.link_manager.add_url_LinksQueue(url)
-                stored += 1
-            else:
-                skipped += 1
+        for source, keyword, urls in results:
+            for url in urls:
+                site_id = self._site_id(url)
+                if site_id in self.visited_hashes:
+                    skipped += 1
+                    continue
+                self.visited_hashes.add(site_id)
+                discovered[url] = (url, source, keyword)
+
+        inserted = await self.link_manager.add_urls_to_DB(list(discovered.values()))
+        for url, _, keyword in discovered.values():
+            await self.link_manager.add_url_LinksQueue(remove_path_from_url(url), self._seed_priority(keyword))
 
         info(
-            f"[SeedCollector] Keyword='{keyword}' | "
-            f"Stored={stored}, Skipped(Duplicates)={skipped}, "
-            f"Sources=Ahmia+DuckDuckGo"
+            f"[SeedCollector] Keywords={len(keywords)} | Requests={len(results)} | "
+            f"Found={len(discovered)}, New={len(inserted)}, Skipped(Duplicates)={skipped} | "
+            f"Sources={'+'.join(self.sources)} | {time.perf_counter() - started:.1f}s"
         )
+        return len(inserted)
+
+    async def collect_from_ahmia_and_duckduckgo(self, keyword: str):
+        """Seed collection for a single keyword from all configured search sources."""
+        await self.collect_keywords([keyword])
 
     async def collect_from_file(self, file_path: str):
-        """Load seeds from a file."""
+        """Load seeds from a file (streamed, bulk upserted) and queue them."""
+        await self.import_file(file_path, queue=True)
+
+    async def import_file(self, file_path: str, source: str = "File", keyword: str = "",
+                          chunk_lines: int = 100_000, queue: bool = False) -> dict:
+        """
+        Bulk-import a seed list of any size.
+        - Lines are read in chunks off the event loop; every onion host in a line
+          is normalized to its site root and validated.
+        - Duplicates are dropped in memory (visited set) before they reach the DB.
+        - Each chunk is upserted into OnionSites through COPY + one INSERT ... SELECT.
+        - `queue=True` also puts every site not seen in this run on the crawl
+          frontier, whether it was inserted or already stored.
+        Returns throughput stats.
+        """
+        stats = {"lines": 0, "found": 0, "malformed": 0, "duplicates": 0, "inserted": 0, "seconds": 0.0}
+        priority = self._seed_priority(keyword)
+        started = time.perf_counter()
+
         try:
-            with open(file_path, "r") as f:
-                lines = [l.strip() for l in f.readlines() if ".onion" in l]
-            deduped = [u for u in lines if self._hash_url(u) not in self.visited_hashes]
-            for u in deduped:
-                self.visited_hashes.add(self._hash_url(u))
-            info(f"[File] Loaded {len(deduped)} new onion links.")
-            await self._store_links(deduped, "File", "")
+            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                while True:
+                    lines = await asyncio.to_thread(lambda: list(islice(f, chunk_lines)))
+                    if not lines:
+                        break
+                    stats["lines"] += len(lines)
+
+                    chunk = {}  # site_id -> site root
+                    for line in lines:
+                        if ".onion" not in line:
+                            continue
+                        for scheme, host in SEED_LINE_PATTERN.findall(line):
+                            stats["found"] += 1
+                            site_root = f"{(scheme or 'http').lower()}://{host.lower()}.onion/"
+                            site_id = hashlib.sha256(site_root.encode()).hexdigest()
+                            if site_id in self.visited_hashes:
+                                stats["duplicates"] += 1
+                                continue
+                            if not is_valid_onion_address(site_root):
+                                stats["malformed"] += 1
+                                continue
+                            self.visited_hashes.add(site_id)
+                            chunk[site_id] = site_root
+
+                    inserted = await self.link_manager.copy_sites_to_DB(chunk, source, keyword)
+                    stats["inserted"] += len(inserted)
+                    stats["duplicates"] += len(chunk) - len(inserted)
+                    if queue:
+                        for site_root in chunk.values():
+                            await self.link_manager.add_url_LinksQueue(site_root, priority)
+
+                    elapsed = time.perf_counter() - started
+                    info(
+                        f"[File] {stats['lines']:,} lines, {stats['inserted']:,} new sites "
+                        f"({stats['lines'] / elapsed:,.0f} lines/s)"
+                    )
         except Exception as e:
-            error(f"File read error: {e}")
-
-    async def _store_links(self, urls: list[str], source: str, keyword: str):
-        """Store discovered URLs into DB and queue, counting new vs duplicate."""
-        inserted_count = 0
-        duplicate_count = 0
-
-        for url in urls:
-            try:
-                added = await self.link_manager.add_url_to_DB(url, source, keyword)
-                if added:
-                    await self.link_manager.add_url_LinksQueue(url)
-                    inserted_count += 1
-                else:
-                    duplicate_count += 1
-            except Exception as e:
-                error(f"Error storing link {url}: {e}")
+            error(f"File import error: {e}")
 
+        stats["seconds"] = round(time.perf_counter() - started, 2)
+        stats["lines_per_second"] = round(stats["lines"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+        stats["sites_per_second"] = round(stats["inserted"] / stats["seconds"], 1) if stats["seconds"] else 0.0
         info(
-            f"✅ [{source}] Stored {inserted_count}/{len(urls)} new unique links "
-            f"({duplicate_count} duplicates skipped) into DB & queue."
+            f"✅ [{source}] Imported {stats['inserted']:,} new sites from {stats['lines']:,} lines in "
+            f"{stats['seconds']}s ({stats['duplicates']:,} duplicates, {stats['malformed']:,} malformed)"
         )
-
+        return stats
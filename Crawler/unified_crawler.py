@@ -1,63 +1,231 @@
 import asyncio
-import re
-from bs4 import BeautifulSoup, Tag
-from aiohttp import ClientError, ClientSession, ClientTimeout
-from aiohttp_socks import ProxyConnector
-from urllib.parse import urljoin
-import tldextract
-
-from Essentials.utils import remove_path_from_url
+import codecs
+import time
+from aiohttp import ClientError, ClientTimeout
+
+from Connector.connector import AsyncTorController, CircuitPool, NewnymPolicy, TorNetwork
+from Crawler.parse_pool import ParsePool
+from Essentials.configs import MAX_PAGE_BYTES
+from Essentials.metrics import REGISTRY
+from Essentials.utils import onion_domain, remove_path_from_url
 from Logging_Mechanism.logger import info, warning, error
 
+# Bodies we parse; a missing Content-Type is common on onion services and treated as HTML
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+# ---------- Metrics ----------
+FETCH_SECONDS = REGISTRY.histogram("crawler_fetch_seconds", "Fetch latency (request + body) by outcome", ("status",))
+PAGES_TOTAL = REGISTRY.counter("crawler_pages_total", "Fetch attempts by outcome", ("status",))
+BYTES_TOTAL = REGISTRY.counter("crawler_bytes_downloaded_total", "Response body bytes read")
+DOMAIN_FETCHES = REGISTRY.counter(
+    "crawler_domain_fetches_total", "Fetch attempts per onion domain", ("domain", "status"), max_series=5000
+)
+PAGES_PER_SECOND = REGISTRY.gauge("crawler_pages_per_second", "Pages fetched per second since the crawl started")
+FRONTIER_PENDING = REGISTRY.gauge("crawler_frontier_pending", "URLs waiting in the frontier", ("queue",))
+FRONTIER_IN_FLIGHT = REGISTRY.gauge("crawler_frontier_in_flight", "Domains with a fetch in progress")
+WRITES_PENDING = REGISTRY.gauge("crawler_write_buffer_pending", "Rows waiting in the write-behind buffer")
+
+
+async def read_capped(resp, max_bytes: int, chunk_size: int = 64 * 1024) -> tuple[bytes, bool]:
+    """
+    Read a response body in chunks, stopping at `max_bytes`.
+    Returns (body, truncated). Memory per fetch is bounded by the cap no
+    matter how large (or endless) the body is.
+    """
+    declared = resp.content_length
+    if declared is not None and declared <= max_bytes:
+        chunk_size = max(chunk_size, declared)
+    chunks, size = [], 0
+    async for chunk in resp.content.iter_chunked(chunk_size):
+        room = max_bytes - size
+        if len(chunk) > room:
+            chunks.append(chunk[:room])
+            return b"".join(chunks), True
+        chunks.append(chunk)
+        size += len(chunk)
+    return b"".join(chunks), False
+
+
+def to_utf8(body: bytes, charset: str | None) -> bytes:
+    """
+    Re-encode a body in the charset its Content-Type declared as UTF-8, so
+    everything downstream (parser, store, analyser) can decode it as UTF-8.
+    Unknown or missing charsets are assumed to be UTF-8 already.
+    """
+    if not charset:
+        return body
+    try:
+        codec = codecs.lookup(charset).name
+    except LookupError:
+        return body
+    if codec == "utf-8":
+        return body
+    # A truncated body may end mid-character; replace it rather than fail
+    return body.decode(codec, errors="replace").encode("utf-8")
+
 
 class UnifiedCrawler:
     """
     Unified depth-aware dark web crawler.
-    - Crawls through Tor using SOCKS5 proxy.
+    - Crawls through Tor using a pool of SOCKS5 endpoints / isolated circuits.
     - Respects per-domain inner crawl limits and global depth restrictions.
-    - Prioritizes inner links before moving to outer domains.
+    - Crawls the highest-scoring URL (keyword relevance, depth) that politeness allows;
+      unscored inner links still come before outer domains.
+    - Runs N concurrent workers pulling from LinkManager's per-domain frontier,
+      so politeness is enforced per onion domain rather than globally.
+    - Optionally hands HTML parsing to a process pool (`parse_workers`), so
+      network concurrency and parse throughput scale independently.
+    - Streams bodies up to `max_page_bytes` and skips non-HTML responses, so a
+      hostile site cannot grow worker memory.
+    - When the Tor control port is reachable, a rising error/timeout rate
+      triggers NEWNYM so workers move off bad circuits.
+    - Given a shared `network` (TorNetwork), reuses its warm circuits and
+      keep-alive connections and leaves them open for the next job.
     """
 
-    def __init__(self, link_manager, max_depth=2, polite_delay=2.0):
+    def __init__(self, link_manager, max_depth=2, polite_delay=2.0, workers=1, report_interval=30.0,
+                 circuit_pool=None, parse_workers=0, parse_backlog=None, max_page_bytes=MAX_PAGE_BYTES,
+                 tor_controller=None, newnym_policy=None, network: TorNetwork | None = None):
         self.link_manager = link_manager
+        self.network = network
+        if network is not None:
+            circuit_pool, tor_controller, newnym_policy = network.circuits, network.controller, network.policy
+        self.circuit_pool = circuit_pool or CircuitPool.from_config(limit_per_endpoint=max(2, workers))
         self.max_depth = max_depth
         self.polite_delay = polite_delay
+        self.workers = max(1, int(workers))
+        self.report_interval = report_interval
         self.stop_event = asyncio.Event()
         self.active_domains = {}  # Track stats per domain: crawled pages count
+        self.link_manager.frontier.polite_delay = polite_delay
+        self.parse_pool = ParsePool(workers=parse_workers, max_backlog=parse_backlog)
+        self.max_page_bytes = max_page_bytes
+        self.tor_controller = tor_controller or AsyncTorController()
+        self.newnym_policy = newnym_policy or NewnymPolicy()
+        self.tor_stats = {"connected": False}
+
+        # Throughput counters
+        self.pages_fetched = 0
+        self.bytes_fetched = 0
+        self.pages_truncated = 0
+        self.non_html_skipped = 0
+        self._register_gauges()
+        self.started_at = None
 
     async def start(self):
-        info("🕷️ UnifiedCrawler started.")
-        connector = ProxyConnector.from_url("socks5://127.0.0.1:9050")
-        async with ClientSession(connector=connector) as session:
-            await self._crawl_loop(session)
+        info(f"🕷️ UnifiedCrawler started with {self.workers} worker(s), {self.parse_pool.workers} parse process(es).")
+        self.parse_pool.start()
+        if self.network is not None:
+            await self.network.start()
+            self.network.job_started()
+        elif self.tor_controller.connected or await self.tor_controller.connect():
+            self.circuit_pool.attach_controller(self.tor_controller, self.newnym_policy)
+        circuits = await self.circuit_pool.open()
+        try:
+            self.started_at = time.monotonic()
+            workers = [
+                asyncio.create_task(self._crawl_loop(circuits, worker_id))
+                for worker_id in range(self.workers)
+            ]
+            reporter = asyncio.create_task(self._report_throughput())
+            background = asyncio.gather(
+                self.link_manager.checkpoint_frontier(self.stop_event),
+                self.link_manager.run_write_behind(self.stop_event),
+            )
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                reporter.cancel()
+                for task in workers:
+                    task.cancel()
+                # Let the checkpointer and write-behind buffer drain before the sessions close
+                self.stop_event.set()
+                await asyncio.shield(background)
+                self.parse_pool.shutdown()
+                info(f"📈 Crawl finished: {self._throughput_line()}")
+        finally:
+            # A shared network stays warm for the next job
+            if self.network is None:
+                await self.circuit_pool.close()
+                await self.tor_controller.close()
 
     async def stop(self):
         info("🛑 Stopping crawler gracefully...")
         self.stop_event.set()
 
-    async def _crawl_loop(self, session: ClientSession):
-        """Main crawl loop — always exhaust inner links before moving to outer ones."""
+    async def _crawl_loop(self, circuits: CircuitPool, worker_id: int = 0):
+        """Worker loop — take the earliest-ready URL, inner links before outer ones."""
         while not self.stop_event.is_set():
-            # Inner links take priority
-            while not self.stop_event.is_set() and await self.link_manager.has_inner_links():
-                url, depth = await self.link_manager.get_next_inner_link()
-                await self._process_url(session, url, "InnerLink", depth)
-                await asyncio.sleep(self.polite_delay)
-
-            # Process outer domain only if no inner links are left
-            if await self.link_manager.has_links():
-                url, source = await self.link_manager.get_next_link()
-                await self._process_url(session, url, source, depth=0)
-                await asyncio.sleep(self.polite_delay)
+            entry = await self.link_manager.next_ready(timeout=5)
+            if entry is None:
+                if worker_id == 0:
+                    info("🕸️ No links left in queues — waiting for refill...")
                 continue
 
-            info("🕸️ No links left in queues — waiting for refill...")
-            await asyncio.sleep(5)
+            url, source, depth, frontier_domain = entry
+            status = "Error"
+            try:
+                status = await self._process_url(circuits, url, source, depth)
+            finally:
+                # Timeouts and errors back the domain off instead of stalling a worker
+                self.link_manager.complete(entry, ok=status not in ("Timeout", "Error"))
+                # Site root is already in visited_sites, so a drained domain's counter can go
+                if not self.link_manager.frontier.has_work(frontier_domain):
+                    self.active_domains.pop(frontier_domain, None)
 
-    async def _process_url(self, session: ClientSession, url: str, source: str, depth: int):
-        """Fetch and parse a page; add discovered links."""
+    # ---------- Throughput ----------
+    def _register_gauges(self):
+        frontier = self.link_manager.frontier
+        write_buffer = self.link_manager.write_buffer
+        PAGES_PER_SECOND.set_function(lambda: self.throughput_rate())
+        FRONTIER_PENDING.set_function(lambda: {
+            ("inner",): frontier.pending_count(inner=True),
+            ("outer",): frontier.pending_count(inner=False),
+        })
+        FRONTIER_IN_FLIGHT.set_function(lambda: frontier.in_flight_count())
+        WRITES_PENDING.set_function(lambda: write_buffer.pending() if write_buffer else 0)
+
+    def throughput_rate(self) -> float:
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return self.pages_fetched / elapsed if elapsed > 0 else 0.0
+
+    def throughput(self) -> dict:
+        """Return crawl throughput counters (pages/sec since start)."""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "workers": self.workers,
+            "pages_fetched": self.pages_fetched,
+            "elapsed_seconds": round(elapsed, 2),
+            "pages_per_second": round(self.pages_fetched / elapsed, 3) if elapsed > 0 else 0.0,
+            "bytes_fetched": self.bytes_fetched,
+            "pages_truncated": self.pages_truncated,
+            "non_html_skipped": self.non_html_skipped,
+            "frontier_pending": self.link_manager.frontier.snapshot()["pending"],
+            "visited": self.link_manager.visited_stats(),
+            "circuits": self.circuit_pool.stats(),
+            "writes": self.link_manager.write_buffer.stats() if self.link_manager.write_buffer else None,
+            "recrawl": dict(self.link_manager.recrawl_stats),
+            "tor": {**self.tor_stats, "rotations": self.circuit_pool.rotations,
+                    "error_rate": round(self.newnym_policy.error_rate(), 3)},
+        }
+
+    def _throughput_line(self) -> str:
+        stats = self.throughput()
+        return (
+            f"{stats['pages_fetched']} pages in {stats['elapsed_seconds']}s "
+            f"({stats['pages_per_second']} pages/sec, workers={stats['workers']})"
+        )
+
+    async def _report_throughput(self):
+        while not self.stop_event.is_set():
+            await asyncio.sleep(self.report_interval)
+            self.tor_stats = await self.tor_controller.stats()
+            info(f"📈 Throughput: {self._throughput_line()}")
+
+    async def _process_url(self, circuits: CircuitPool, url: str, source: str, depth: int) -> str:
+        """Fetch and parse a page; add discovered links. Returns the fetch status."""
         clean_url = remove_path_from_url(url)
-        html = ""
+        html = b""
         status = "Unknown"
 
         # Check domain stats (for inner link cap)
@@ -67,15 +235,41 @@ class UnifiedCrawler:
 
         if domain_crawled >= max_inner:
             warning(f"🚫 Domain crawl limit reached ({domain_crawled}/{max_inner}) for {domain}")
-            return
+            return "Skipped"
 
+        fetch_started = time.perf_counter()
         try:
             info(f"🌐 Fetching {url} via Tor [{source}] (depth={depth})")
             timeout = ClientTimeout(total=25)
-            async with session.get(url, timeout=timeout) as resp:
-                html = await resp.text(errors="ignore")
-                await self.link_manager.add_html_page(url, html)
+            validators = await self.link_manager.get_page_validators(url)
+            headers = self.link_manager.conditional_headers(validators)
+            async with circuits.get(url, timeout=timeout, headers=headers) as resp:
                 status = "Alive" if 200 <= resp.status < 400 else "Dead"
+                content_type = resp.headers.get("Content-Type", "").lower()
+                if resp.status == 304 and validators:
+                    # Unchanged since last crawl: no body, no write; links come from the stored copy
+                    html = await self.link_manager.load_page_html(url, validators)
+                elif content_type and not content_type.startswith(HTML_CONTENT_TYPES):
+                    # Images, archives, dumps: the site is alive but there is nothing to parse
+                    self.non_html_skipped += 1
+                    resp.close()
+                    info(f"⏭️ Skipping non-HTML body ({content_type.split(';')[0]}) at {url}")
+                else:
+                    html, truncated = await read_capped(resp, self.max_page_bytes)
+                    self.bytes_fetched += len(html)
+                    BYTES_TOTAL.inc(len(html))
+                    html = to_utf8(html, resp.charset)
+                    if truncated:
+                        # Drop the connection instead of draining the rest of the body
+                        self.pages_truncated += 1
+                        resp.close()
+                        warning(f"✂️ Body of {url} truncated at {self.max_page_bytes:,} bytes")
+                    await self.link_manager.add_html_page(
+                        url, html,
+                        etag=resp.headers.get("ETag"),
+                        last_modified=resp.headers.get("Last-Modified"),
+                    )
+                self.pages_fetched += 1
         except asyncio.TimeoutError:
             status = "Timeout"
         except ClientError as e:
@@ -85,56 +279,44 @@ class UnifiedCrawler:
             status = "Error"
             error(f"Unexpected error for {url}: {e}")
 
+        FETCH_SECONDS.observe(time.perf_counter() - fetch_started, status=status)
+        PAGES_TOTAL.inc(status=status)
+        DOMAIN_FETCHES.inc(domain=domain, status=status)
+
         # Update DB for top-level crawls
         if source == "OuterLink":
             await self.link_manager.update_status_in_DB(url, status)
 
         if status != "Alive" or not html:
-            return
+            return status
 
         # Track domain crawl count
         self.active_domains[domain] = self.active_domains.get(domain, 0) + 1
 
-        # Extract new links
-        found_links = self._extract_onion_links(html, clean_url)
-        current_domain = self._get_domain(clean_url)
-
-        for new_url in found_links:
-            new_domain = self._get_domain(new_url)
+        # Extract new links (inline or in the parse process pool)
+        scorer = self.link_manager.scorer
+        current_domain, found_links, page_hits = await self.parse_pool.parse(html, clean_url, scorer.keywords)
+        relevance = await self.link_manager.site_relevance(clean_url)
 
+        for new_url, new_domain, anchor_hits in found_links:
             if new_domain == current_domain:
                 # Depth limit check
                 if depth < self.max_depth:
-                    await self.link_manager.add_url_InnerLinksQueue(new_url, depth + 1)
+                    priority = scorer.score(anchor_hits, page_hits, relevance, depth + 1)
+                    await self.link_manager.add_url_InnerLinksQueue(new_url, depth + 1, priority)
                 else:
                     warning(f"⚠️ Reached max depth ({self.max_depth}) for {new_url}")
             else:
-                # Cross-domain link → outer queue
-                await self.link_manager.add_url_to_DB(new_url, "Exploratory")
-                await self.link_manager.add_url_LinksQueue(new_url)
+                # Cross-domain link → outer queue (a new site: only the link and its parent page count)
+                priority = scorer.score(anchor_hits, page_hits)
+                await self.link_manager.queue_url_to_DB(new_url, "Exploratory")
+                await self.link_manager.add_url_LinksQueue(new_url, priority)
 
         # Log completion summary per domain
         crawled_pages = self.active_domains.get(domain, 0)
         info(f"✅ [{domain}] crawled {crawled_pages}/{max_inner} pages (depth={depth})")
-
-    def _extract_onion_links(self, html: str, base_url: str = "") -> set[str]:
-        """Extract .onion links from HTML."""
-        ONION_PATTERN = re.compile(r"https?://[a-zA-Z0-9]{16,56}\.onion")
-        links = set()
-        try:
-            soup = BeautifulSoup(html, "html.parser")
-            for a in soup.find_all("a", href=True):
-                if isinstance(a, Tag):
-                    full = urljoin(base_url, a.get("href", "").strip()) # type: ignore
-                    if ".onion" in full:
-                        links.add(full)
-        except Exception as e:
-            warning(f"BeautifulSoup parse error: {e}")
-
-        links.update(ONION_PATTERN.findall(html))
-        return {url.rstrip("/") for url in links}
+        return status
 
     def _get_domain(self, url: str) -> str:
-        """Extract registered domain from .onion URL."""
-        parsed = tldextract.extract(url)
-        return parsed.registered_domain or url
+        """Onion service domain of a URL (no public suffix list lookup)."""
+        return onion_domain(url)
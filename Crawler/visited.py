@@ -0,0 +1,96 @@
+import hashlib
+import math
+import sys
+
+
+class ExactVisitedSet:
+    """Exact visited set backed by a Python set (memory grows with every entry)."""
+
+    backend = "exact"
+
+    def __init__(self):
+        self._items = set()
+        self._item_bytes = 0  # running total of sys.getsizeof over stored strings
+
+    def add(self, item: str):
+        if item not in self._items:
+            self._items.add(item)
+            self._item_bytes += sys.getsizeof(item)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint: the set table plus every stored string (O(1))."""
+        return sys.getsizeof(self._items) + self._item_bytes
+
+
+class BloomVisitedSet:
+    """
+    Fixed-size Bloom filter visited set.
+    - Memory is allocated once from `capacity` and `error_rate` and never grows.
+    - No false negatives; a false positive means a URL is wrongly treated as
+      visited (skipped) with probability ~error_rate once `capacity` is reached.
+    """
+
+    backend = "bloom"
+
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, item: str):
+        # Kirsch–Mitzenmacher double hashing from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self._bits[pos >> 3] & mask:
+                self._bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self._count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self) -> int:
+        """Approximate number of distinct items added."""
+        return self._count
+
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self._bits)
+
+
+def make_visited_set(backend: str = "exact", capacity: int = 10_000_000, error_rate: float = 0.001):
+    """Build a visited-set backend by name ("exact" or "bloom")."""
+    if backend == "exact":
+        return ExactVisitedSet()
+    if backend == "bloom":
+        return BloomVisitedSet(capacity=capacity, error_rate=error_rate)
+    raise ValueError(f"Unknown visited-set backend: {backend}")
+
+
+def memory_per_million(visited) -> float:
+    """
+    Memory in MiB per million entries. A Bloom filter's allocation is fixed,
+    so it is reported against its configured capacity; an exact set against
+    the entries it currently holds.
+    """
+    count = getattr(visited, "capacity", None) or len(visited)
+    if not count:
+        return 0.0
+    return visited.memory_bytes() / count * 1_000_000 / (1024 * 1024)
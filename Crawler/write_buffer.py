@@ -0,0 +1,279 @@
+import asyncio
+import time
+import asyncpg
+
+from Essentials.metrics import REGISTRY
+from Logging_Mechanism.logger import info, warning, error
+
+DB_FLUSH_SECONDS = REGISTRY.histogram("crawler_db_flush_seconds", "Duration of batched DB flushes", ("store",))
+DB_ROWS_FLUSHED = REGISTRY.counter("crawler_db_rows_flushed_total", "Rows written by batched flushes", ("store",))
+DB_ROWS_DROPPED = REGISTRY.counter(
+    "crawler_db_rows_dropped_total", "Rows the database rejected after batch retries", ("store",)
+)
+
+# Errors caused by the row itself (constraint violations, invalid data); anything else is retried
+ROW_ERRORS = (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError)
+
+SITE_INSERT = """
+    INSERT INTO OnionSites (site_id, url, source, keyword, current_status, first_seen, last_seen)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+    ON CONFLICT (site_id) DO NOTHING;
+"""
+BLOB_INSERT = """
+    INSERT INTO HtmlBlobs (html_hash, codec, raw_size, data)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT (html_hash) DO NOTHING;
+"""
+PAGE_UPSERT = """
+    INSERT INTO Pages (page_id, site_id, url, html_hash, raw_html, crawl_date, etag, last_modified)
+    VALUES ($1, $2, $3, $4, NULL, $5, $6, $7)
+    ON CONFLICT (page_id) DO UPDATE
+    SET html_hash = EXCLUDED.html_hash,
+        raw_html = NULL,
+        crawl_date = EXCLUDED.crawl_date,
+        etag = EXCLUDED.etag,
+        last_modified = EXCLUDED.last_modified;
+"""
+STATUS_UPDATE = """
+    UPDATE OnionSites
+    SET current_status = $1, last_seen = $2
+    WHERE site_id = $3;
+"""
+
+
+class CrawlWriteBuffer:
+    """
+    Write-behind buffer for the crawler's hot-path DB writes.
+    - Site inserts, status updates and page upserts are collected in memory.
+    - A flush writes them in one transaction: executemany for OnionSites and
+      HtmlBlobs, COPY into a temp staging table + one INSERT ... SELECT for Pages.
+    - Flushes happen when `batch_size` rows or `max_buffer_bytes` of HTML are
+      buffered, every `flush_interval` seconds, and once more on stop.
+    - A failed flush puts its rows back (newer buffered rows win) and is
+      retried; after `max_retries` failures the batch is written row by row,
+      so only rows the database rejects are dropped.
+    - `on_flushed` callbacks learn which pages and blobs are persisted, so
+      caches are only updated for data that actually reached the database.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, batch_size: int = 200, flush_interval: float = 2.0,
+                 max_buffer_bytes: int = 32 * 1024 * 1024, max_retries: int = 3):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer_bytes = max_buffer_bytes
+        self.max_retries = max_retries
+
+        self._sites = {}     # site_id -> (site_id, url, source, keyword, status, first_seen, last_seen)
+        self._statuses = {}  # site_id -> (status, last_seen, site_id)
+        self._pages = {}     # page_id -> (page_id, site_id, url, html_hash, crawl_date, etag, last_modified)
+        self._blobs = {}     # html_hash -> (html_hash, codec, raw_size, data)
+        self._page_bytes = 0
+        self._flush_lock = asyncio.Lock()
+        self._batch_full = asyncio.Event()
+        self._failures = 0   # consecutive failed flushes
+        self._listeners = []
+
+        # Flush stats
+        self.rows_flushed = 0
+        self.rows_dropped = 0
+        self.flush_seconds = 0.0
+        self.flushes = 0
+
+    def on_flushed(self, callback):
+        """Register `callback(pages, blobs, dropped_pages)`, called with the rows each flush persisted or dropped."""
+        self._listeners.append(callback)
+
+    # ---------- Producers ----------
+    def add_site(self, site_id: str, url: str, source: str, keyword: str, now):
+        self._sites.setdefault(site_id, (site_id, url, source, keyword, "Alive", now, now))
+        self._check_full()
+
+    def update_status(self, site_id: str, status: str, now):
+        self._statuses[site_id] = (status, now, site_id)
+        self._check_full()
+
+    def add_page(self, page_id: str, site_id: str, url: str, html_hash: str, crawl_date, blob=None,
+                 etag=None, last_modified=None):
+        """Buffer a page row; `blob` is its HtmlBlobs row when the content is new."""
+        self._pages[page_id] = (page_id, site_id, url, html_hash, crawl_date, etag, last_modified)
+        if blob is not None and blob[0] not in self._blobs:
+            self._blobs[blob[0]] = blob
+            self._page_bytes += len(blob[3])
+        self._check_full()
+
+    def pending(self) -> int:
+        return len(self._sites) + len(self._statuses) + len(self._pages) + len(self._blobs)
+
+    def _check_full(self):
+        if self.pending() >= self.batch_size or self._page_bytes >= self.max_buffer_bytes:
+            self._batch_full.set()
+
+    # ---------- Flushing ----------
+    async def flush(self):
+        async with self._flush_lock:
+            if not self.pending():
+                return
+            sites, self._sites = list(self._sites.values()), {}
+            statuses, self._statuses = list(self._statuses.values()), {}
+            pages, self._pages = list(self._pages.values()), {}
+            blobs, self._blobs = list(self._blobs.values()), {}
+            self._page_bytes = 0
+            self._batch_full.clear()
+
+            start = time.perf_counter()
+            dropped_pages = []
+            try:
+                await self._write_batch(sites, blobs, pages, statuses)
+            except Exception as e:
+                self._failures += 1
+                if self._failures < self.max_retries:
+                    self._requeue(sites, blobs, pages, statuses)
+                    error(
+                        f"❌ Write-behind flush failed ({len(sites)} sites, {len(pages)} pages, "
+                        f"{len(statuses)} statuses), retry {self._failures}/{self.max_retries - 1}: {e}"
+                    )
+                    return
+                warning(f"⚠️ Write-behind flush failed {self._failures} times, writing rows one by one: {e}")
+                try:
+                    dropped = await self._write_rows(sites, blobs, pages, statuses)
+                except Exception as e:
+                    error(f"❌ Row-by-row write-behind flush failed: {e}")
+                    return
+                dropped_pages = dropped[2]
+                sites, blobs, pages, statuses = (
+                    [row for row in rows if all(row is not bad for bad in rejected)]
+                    for rows, rejected in zip((sites, blobs, pages, statuses), dropped)
+                )
+            self._failures = 0
+
+            elapsed = time.perf_counter() - start
+            rows = len(sites) + len(pages) + len(statuses) + len(blobs)
+            DB_FLUSH_SECONDS.observe(elapsed, store="write_buffer")
+            DB_ROWS_FLUSHED.inc(rows, store="write_buffer")
+            self.rows_flushed += rows
+            self.flush_seconds += elapsed
+            self.flushes += 1
+            self._notify(pages, blobs, dropped_pages)
+            info(
+                f"📝 Flushed {len(pages)} pages, {len(sites)} sites, {len(statuses)} statuses "
+                f"in {elapsed:.3f}s ({rows / elapsed if elapsed else 0:,.0f} rows/sec)"
+            )
+
+    async def _write_batch(self, sites: list, blobs: list, pages: list, statuses: list):
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                if sites:
+                    await connection.executemany(SITE_INSERT, sites)
+                if blobs:
+                    await connection.executemany(BLOB_INSERT, blobs)
+                if pages:
+                    await self._copy_pages(connection, pages)
+                if statuses:
+                    await connection.executemany(STATUS_UPDATE, statuses)
+
+    async def _write_rows(self, sites: list, blobs: list, pages: list, statuses: list) -> tuple[list, ...]:
+        """
+        Fallback for a batch that keeps failing: one autocommitted statement per
+        row, in dependency order. Rows rejected for their own content are dropped
+        and returned (sites, blobs, pages, statuses); on any other error the rows
+        not yet written are put back and the error is raised.
+        """
+        groups = ((SITE_INSERT, sites), (BLOB_INSERT, blobs), (PAGE_UPSERT, pages), (STATUS_UPDATE, statuses))
+        dropped = ([], [], [], [])
+        done = [0, 0, 0, 0]
+        try:
+            async with self.pool.acquire() as connection:
+                for i, (query, rows) in enumerate(groups):
+                    for row in rows:
+                        try:
+                            await connection.execute(query, *row)
+                        except ROW_ERRORS as e:
+                            dropped[i].append(row)
+                            warning(f"⚠️ Dropping row rejected by the database ({row[0]}): {e}")
+                        done[i] += 1
+        except Exception:
+            self._requeue(*(rows[n:] for (_, rows), n in zip(groups, done)))
+            raise
+        count = sum(len(rows) for rows in dropped)
+        DB_ROWS_DROPPED.inc(count, store="write_buffer")
+        self.rows_dropped += count
+        return dropped
+
+    def _requeue(self, sites: list, blobs: list, pages: list, statuses: list):
+        """Put unwritten rows back; rows buffered since the flush started are newer and win."""
+        for row in sites:
+            self._sites.setdefault(row[0], row)
+        for row in statuses:
+            self._statuses.setdefault(row[2], row)
+        for row in pages:
+            self._pages.setdefault(row[0], row)
+        for row in blobs:
+            if row[0] not in self._blobs:
+                self._blobs[row[0]] = row
+                self._page_bytes += len(row[3])
+
+    def _notify(self, pages: list, blobs: list, dropped_pages: list):
+        for callback in self._listeners:
+            try:
+                callback(pages, blobs, dropped_pages)
+            except Exception as e:
+                error(f"Write-behind flush callback failed: {e}")
+
+    async def _copy_pages(self, connection, pages: list):
+        await connection.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS pages_staging
+            (LIKE Pages INCLUDING DEFAULTS) ON COMMIT DELETE ROWS;
+            """
+        )
+        await connection.copy_records_to_table(
+            "pages_staging",
+            records=pages,
+            columns=["page_id", "site_id", "url", "html_hash", "crawl_date", "etag", "last_modified"],
+        )
+        # raw_html stays NULL: content lives in HtmlBlobs (legacy inline rows are cleared on update)
+        await connection.execute(
+            """
+            INSERT INTO Pages (page_id, site_id, url, html_hash, raw_html, crawl_date, etag, last_modified)
+            SELECT page_id, site_id, url, html_hash, NULL, crawl_date, etag, last_modified
+            FROM pages_staging
+            ON CONFLICT (page_id) DO UPDATE
+            SET html_hash = EXCLUDED.html_hash,
+                raw_html = NULL,
+                crawl_date = EXCLUDED.crawl_date,
+                etag = EXCLUDED.etag,
+                last_modified = EXCLUDED.last_modified;
+            """
+        )
+
+    async def run(self, stop_event: asyncio.Event):
+        """Flush by time or batch size until `stop_event` is set, then drain."""
+        try:
+            while not stop_event.is_set():
+                waiters = [asyncio.ensure_future(stop_event.wait())]
+                if not self._failures:
+                    # After a failed flush the next attempt waits for the interval, even if the batch is full
+                    waiters.append(asyncio.ensure_future(self._batch_full.wait()))
+                try:
+                    await asyncio.wait(waiters, timeout=self.flush_interval, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for waiter in waiters:
+                        waiter.cancel()
+                await self.flush()
+        finally:
+            # Retries included, so a batch that keeps failing still reaches the row-by-row fallback
+            for _ in range(self.max_retries):
+                await self.flush()
+                if not self.pending():
+                    break
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "rows_dropped": self.rows_dropped,
+            "failed_attempts": self._failures,
+            "rows_per_second": round(self.rows_flushed / self.flush_seconds, 1) if self.flush_seconds else 0.0,
+        }
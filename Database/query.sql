@@ -38,9 +38,31 @@ CREATE TABLE IF NOT EXISTS Pages (
     page_id CHAR(64) PRIMARY KEY,             -- SHA-256(page URL)
     site_id CHAR(64) REFERENCES OnionSites(site_id) ON DELETE CASCADE,
     url TEXT NOT NULL,
-    html_hash CHAR(64),
-    raw_html BYTEA,
-    crawl_date TIMESTAMPTZ DEFAULT NOW()
+    html_hash CHAR(64),                       -- → HtmlBlobs(html_hash)
+    raw_html BYTEA,                           -- Legacy inline HTML (NULL for blob-backed pages)
+    crawl_date TIMESTAMPTZ DEFAULT NOW(),
+    etag TEXT,                                -- Validators for conditional recrawls
+    last_modified TEXT
+);
+
+ALTER TABLE Pages ADD COLUMN IF NOT EXISTS etag TEXT;
+ALTER TABLE Pages ADD COLUMN IF NOT EXISTS last_modified TEXT;
+
+-- =====================================
+-- 4️⃣b HTML BLOBS (CONTENT-ADDRESSED, COMPRESSED)
+-- =====================================
+CREATE TABLE IF NOT EXISTS HtmlBlobs (
+    html_hash CHAR(64) PRIMARY KEY,           -- SHA-256(raw HTML bytes)
+    codec TEXT NOT NULL,                      -- zstd / zstd-dict:<dict_id> / zlib
+    raw_size INT,
+    data BYTEA NOT NULL,
+    first_seen TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS HtmlDictionaries (
+    dict_id SERIAL PRIMARY KEY,               -- Shared zstd dictionaries trained on onion HTML
+    data BYTEA NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
 -- =====================================
@@ -57,6 +79,49 @@ CREATE TABLE IF NOT EXISTS Metadata (
     translated_text TEXT
 );
 
+-- Written by PageAnalyzer, read by Vendor_Analysis
+ALTER TABLE Metadata ADD COLUMN IF NOT EXISTS pgp_fingerprints JSONB;
+ALTER TABLE Metadata ADD COLUMN IF NOT EXISTS xmr_addresses JSONB;
+ALTER TABLE Metadata ADD COLUMN IF NOT EXISTS vendor_handles JSONB;
+
+-- Analysis results per distinct HTML content: pages sharing an html_hash reuse them
+CREATE TABLE IF NOT EXISTS AnalysisCache (
+    html_hash CHAR(64) PRIMARY KEY,           -- → HtmlBlobs(html_hash)
+    title TEXT,
+    meta_tags JSONB,
+    emails JSONB,
+    pgp_keys JSONB,
+    pgp_fingerprints JSONB,
+    xmr_addresses JSONB,
+    vendor_handles JSONB,
+    language TEXT,
+    translated_text TEXT,
+    btc_addresses JSONB,                      -- [[address, valid], ...]
+    analyzed_at TIMESTAMPTZ DEFAULT NOW(),
+    reuse_count INT DEFAULT 0                 -- Pages served from this row without re-parsing
+);
+ALTER TABLE AnalysisCache ADD COLUMN IF NOT EXISTS translated_text TEXT;
+
+-- Pages PageAnalyzer could not analyse or store; skipped until the page is crawled again
+CREATE TABLE IF NOT EXISTS AnalysisFailures (
+    page_id CHAR(64) PRIMARY KEY REFERENCES Pages(page_id) ON DELETE CASCADE,
+    html_hash CHAR(64),                       -- Content that failed
+    stage TEXT,                               -- extract / write
+    error TEXT,
+    attempts INT DEFAULT 1,
+    failed_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Translated text segments (sentences), shared by every page containing them
+CREATE TABLE IF NOT EXISTS TranslationSegments (
+    segment_hash CHAR(64) PRIMARY KEY,        -- SHA-256(backend, source, target, segment)
+    source_lang TEXT,
+    target_lang TEXT,
+    backend TEXT,
+    translated TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- =====================================
 -- 6️⃣ BITCOIN ADDRESSES
 -- =====================================
@@ -113,16 +178,87 @@ CREATE TABLE IF NOT EXISTS Reports (
     generated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- =====================================
+-- 1️⃣1️⃣ CRAWL FRONTIER (RESUMABLE CHECKPOINT)
+-- =====================================
+CREATE TABLE IF NOT EXISTS CrawlFrontier (
+    url TEXT PRIMARY KEY,                     -- Site root or full page URL
+    site_root TEXT NOT NULL,
+    source TEXT NOT NULL,                     -- OuterLink / InnerLink
+    depth INT DEFAULT 0,
+    state TEXT NOT NULL,                      -- queued / done
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    priority REAL DEFAULT 0                   -- Relevance score used by the frontier
+);
+
+ALTER TABLE CrawlFrontier ADD COLUMN IF NOT EXISTS priority REAL DEFAULT 0;
+
+-- Distributed mode: nodes lease URLs from CrawlFrontier (state 'leased')
+ALTER TABLE CrawlFrontier ADD COLUMN IF NOT EXISTS domain TEXT;            -- Onion service (politeness key)
+ALTER TABLE CrawlFrontier ADD COLUMN IF NOT EXISTS lease_owner TEXT;       -- node_id holding the lease
+ALTER TABLE CrawlFrontier ADD COLUMN IF NOT EXISTS lease_expires TIMESTAMPTZ;
+
+CREATE TABLE IF NOT EXISTS CrawlDomains (
+    domain TEXT PRIMARY KEY,
+    next_fetch_at TIMESTAMPTZ DEFAULT NOW(),  -- Politeness: earliest next fetch on any node
+    backoff REAL DEFAULT 1,
+    locked_by TEXT,                           -- node_id with a fetch in flight
+    lock_expires TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS CrawlNodes (
+    node_id TEXT PRIMARY KEY,                 -- host:pid unless set explicitly
+    host TEXT,
+    pid INT,
+    started_at TIMESTAMPTZ DEFAULT NOW(),
+    heartbeat_at TIMESTAMPTZ DEFAULT NOW(),
+    leases_granted BIGINT DEFAULT 0,
+    in_flight INT DEFAULT 0,
+    completed BIGINT DEFAULT 0
+);
+
+CREATE OR REPLACE VIEW CrawlClusterStatus AS
+SELECT
+    (SELECT COUNT(*) FROM CrawlFrontier WHERE state = 'queued') AS queued,
+    (SELECT COUNT(*) FROM CrawlFrontier WHERE state = 'leased' AND lease_expires >= NOW()) AS leased,
+    (SELECT COUNT(*) FROM CrawlFrontier WHERE state = 'leased' AND lease_expires < NOW()) AS expired_leases,
+    (SELECT COUNT(*) FROM CrawlFrontier WHERE state = 'done') AS done,
+    (SELECT COUNT(*) FROM CrawlDomains WHERE locked_by IS NOT NULL AND lock_expires >= NOW()) AS domains_locked,
+    (SELECT COUNT(*) FROM CrawlDomains WHERE next_fetch_at > NOW()) AS domains_cooling_down,
+    (SELECT COUNT(*) FROM CrawlNodes WHERE heartbeat_at > NOW() - INTERVAL '2 minutes') AS nodes_alive;
+
+-- =====================================
+-- 1️⃣2️⃣ SITE REVISIT HISTORY (CHANGE-RATE ESTIMATION)
+-- =====================================
+CREATE TABLE IF NOT EXISTS SiteRevisit (
+    site_id CHAR(64) PRIMARY KEY,             -- → OnionSites(site_id)
+    visits INT DEFAULT 0,                     -- Root-page visits by the crawler
+    alive_visits INT DEFAULT 0,
+    intervals INT DEFAULT 0,                  -- Successive content hashes compared
+    changes INT DEFAULT 0,                    -- ... of which differed
+    observed_hours DOUBLE PRECISION DEFAULT 0,
+    last_hash CHAR(64),
+    hashed_at TIMESTAMPTZ,
+    last_visit TIMESTAMPTZ
+);
+
 -- =====================================
 -- ⚡ PERFORMANCE INDEXES
 -- =====================================
 CREATE INDEX IF NOT EXISTS idx_onionsites_url ON OnionSites (url);
 CREATE INDEX IF NOT EXISTS idx_pages_site_id ON Pages (site_id);
+CREATE INDEX IF NOT EXISTS idx_pages_html_hash ON Pages (html_hash);
 CREATE INDEX IF NOT EXISTS idx_metadata_page_id ON Metadata (page_id);
 CREATE INDEX IF NOT EXISTS idx_bitcoin_site_id ON BitcoinAddresses (site_id);
 CREATE INDEX IF NOT EXISTS idx_tx_address_id ON Transactions (address_id);
 CREATE INDEX IF NOT EXISTS idx_class_page_id ON Classification (page_id);
 CREATE INDEX IF NOT EXISTS idx_liveness_site_id ON SiteLiveness (site_id);
+CREATE INDEX IF NOT EXISTS idx_frontier_state ON CrawlFrontier (state, updated_at);
+CREATE INDEX IF NOT EXISTS idx_frontier_domain_state ON CrawlFrontier (domain, state);
+CREATE INDEX IF NOT EXISTS idx_frontier_lease_owner ON CrawlFrontier (lease_owner) WHERE state = 'leased';
+-- Lease order of DistributedFrontier._lease (inner links first, then priority, then age)
+CREATE INDEX IF NOT EXISTS idx_frontier_lease_order
+    ON CrawlFrontier ((source = 'InnerLink') DESC, priority DESC, updated_at) WHERE state = 'queued';
 
 -- =====================================
 -- 🔄 AUTO UPDATE last_seen WHEN STATUS CHANGES
@@ -6,6 +6,14 @@ TOR_SOCKS_DEFAULT = 9050
 TOR_SOCKS_CONTROL_DEFAULT = 9051
 TOR_CONTROL_PASSWORD = ""
 SOCKS_HOST = "127.0.0.1"
+TOR_SOCKS_PORTS = [TOR_SOCKS_DEFAULT]   # one CircuitPool endpoint group per port
+TOR_ISOLATION_SLOTS = 4                # IsolateSOCKSAuth credentials per port (0 = none)
+TOR_LIMIT_PER_ENDPOINT = 16            # Open connections per SOCKS endpoint (shared network layer)
+TOR_LIMIT_PER_HOST = 4                 # Keep-alive connections per onion host and endpoint
+TOR_KEEPALIVE_SECONDS = 120.0          # Idle connections kept open, rendezvous circuits are costly to rebuild
+TOR_BOOTSTRAP_TIMEOUT = 120.0          # Seconds to wait for Tor to report a full bootstrap
+TOR_LAUNCH_IF_MISSING = False          # Launch a tor process when nothing answers on the control port
+TOR_WARM_ON_STARTUP = True             # API: bootstrap the shared Tor network layer at startup
 
 #================DATABASE================
 DB_CONFIG = {
@@ -15,3 +23,22 @@ DB_CONFIG = {
     "host": "127.0.0.1",
     "port": 5432,
 }
+
+#================CRAWLER=================
+VISITED_BACKEND = "exact"        # "exact" or "bloom" (fixed memory, ~0.1% false positives)
+VISITED_CAPACITY = 10_000_000    # Bloom filter sizing (expected distinct pages)
+REVISIT_BUDGET_PER_HOUR = 200.0  # Recrawl fetches per hour shared by known sites (revisit policy)
+MAX_PAGE_BYTES = 5 * 1024 * 1024  # Bodies are streamed and truncated beyond this size
+
+#================SEEDS===================
+# Clearnet search sources: name -> URL template ({query} is the URL-encoded keyword)
+SEED_SOURCES = {
+    "Ahmia": "https://ahmia.fi/search/?q={query}&c7e83b=742c7e",
+    "DuckDuckGo": "https://duckduckgo.com/html/?q={query}+site:.onion",
+}
+SEED_FAN_OUT = 8                 # Concurrent clearnet search requests
+
+#================TRANSLATION=============
+TRANSLATION_BACKEND = "google"   # "google" (deep_translator) or "local" (offline stand-in, no network)
+TRANSLATION_CONCURRENCY = 4      # Backend calls in flight, each on a worker thread
+TRANSLATION_CACHE_SIZE = 50_000  # Segments kept in memory in front of the TranslationSegments table
@@ -0,0 +1,145 @@
+import asyncio
+import zlib
+from collections import OrderedDict
+
+try:
+    import zstandard
+except ImportError:  # optional: fall back to zlib
+    zstandard = None
+
+
+# Joined into page queries so readers get either the blob or the legacy inline column
+PAGE_BLOB_JOIN = "LEFT JOIN HtmlBlobs b ON b.html_hash = p.html_hash"
+PAGE_BLOB_COLUMNS = "p.html_hash, p.raw_html, b.codec, b.data AS blob, b.raw_size"
+
+
+class HtmlStore:
+    """
+    Content-addressed, compressed storage for crawled HTML.
+    - One HtmlBlobs row per distinct html_hash; Pages only reference the hash.
+    - zstd (optionally with a shared dictionary trained on onion HTML) when
+      `zstandard` is installed, zlib otherwise.
+    - `page_html()` is the decompressing accessor for readers; it also serves
+      legacy Pages rows that still carry raw_html inline.
+    - A hash counts as stored only once the writer confirms its blob was
+      committed (`remember()`), so a lost write is never deduplicated against.
+    """
+
+    def __init__(self, pool, level: int = 10, known_hashes: int = 100_000):
+        self.pool = pool
+        self.level = level
+        self._dictionaries = {}       # dict_id -> zstandard.ZstdCompressionDict
+        self._active_dict_id = None   # newest dictionary, used for compression
+        self._loaded = False
+        self._known = OrderedDict()   # LRU of hashes whose blob is committed
+        self._known_limit = known_hashes
+
+    # ---------- Dictionaries ----------
+    async def load_dictionaries(self, force: bool = False):
+        if (self._loaded and not force) or zstandard is None:
+            self._loaded = True
+            return
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("SELECT dict_id, data FROM HtmlDictionaries ORDER BY dict_id;")
+        for row in rows:
+            self._dictionaries[row["dict_id"]] = zstandard.ZstdCompressionDict(bytes(row["data"]))
+            self._active_dict_id = row["dict_id"]
+        self._loaded = True
+
+    async def train_dictionary(self, sample_limit: int = 2000, dict_size: int = 112_640) -> int | None:
+        """
+        Train a shared zstd dictionary on stored pages and make it the active one
+        (exposed as POST /api/storage/dictionary). Returns the new dict_id, or
+        None without zstandard or stored pages.
+        """
+        if zstandard is None:
+            return None
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"""
+                SELECT {PAGE_BLOB_COLUMNS}
+                FROM Pages p
+                {PAGE_BLOB_JOIN}
+                WHERE b.data IS NOT NULL OR p.raw_html IS NOT NULL
+                ORDER BY p.crawl_date DESC
+                LIMIT $1;
+                """,
+                sample_limit,
+            )
+        samples = [await self.page_html(row) for row in rows]
+        samples = [s for s in samples if s]
+        if not samples:
+            return None
+
+        trained = await asyncio.to_thread(zstandard.train_dictionary, dict_size, samples)
+        async with self.pool.acquire() as conn:
+            dict_id = await conn.fetchval(
+                "INSERT INTO HtmlDictionaries (data) VALUES ($1) RETURNING dict_id;",
+                trained.as_bytes(),
+            )
+        self._dictionaries[dict_id] = trained
+        self._active_dict_id = dict_id
+        return dict_id
+
+    # ---------- Codec ----------
+    def compress(self, html_bytes: bytes) -> tuple[str, bytes]:
+        if zstandard is None:
+            return "zlib", zlib.compress(html_bytes, 6)
+        if self._active_dict_id is not None:
+            dict_data = self._dictionaries[self._active_dict_id]
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dict_data)
+            return f"zstd-dict:{self._active_dict_id}", compressor.compress(html_bytes)
+        return "zstd", zstandard.ZstdCompressor(level=self.level).compress(html_bytes)
+
+    async def decompress(self, codec: str, data: bytes) -> bytes:
+        data = bytes(data)
+        if codec == "identity":
+            return data
+        if codec == "zlib":
+            return zlib.decompress(data)
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {codec} blobs")
+        if codec == "zstd":
+            return zstandard.ZstdDecompressor().decompress(data)
+        if codec.startswith("zstd-dict:"):
+            dict_id = int(codec.split(":", 1)[1])
+            if dict_id not in self._dictionaries:
+                await self.load_dictionaries(force=True)
+            decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionaries[dict_id])
+            return decompressor.decompress(data)
+        raise ValueError(f"Unknown HTML blob codec: {codec}")
+
+    async def page_html(self, row) -> bytes:
+        """
+        Raw HTML bytes for a row selected with PAGE_BLOB_COLUMNS.
+        Raises LookupError when the page references a blob that was never stored.
+        """
+        if row["blob"] is not None:
+            return await self.decompress(row["codec"], row["blob"])
+        if row["raw_html"] is None:
+            raise LookupError(f"No HtmlBlobs row for html_hash {row.get('html_hash')}")
+        return bytes(row["raw_html"])
+
+    # ---------- Write-side dedup ----------
+    def seen(self, html_hash: str) -> bool:
+        """True if this hash's blob was committed recently (skip re-compressing it)."""
+        if html_hash in self._known:
+            self._known.move_to_end(html_hash)
+            return True
+        return False
+
+    def remember(self, html_hash: str):
+        """Mark a hash as stored; call only after the transaction writing its blob committed."""
+        self._known[html_hash] = None
+        if len(self._known) > self._known_limit:
+            self._known.popitem(last=False)
+
+    def encode_blob(self, html_hash: str, html_bytes: bytes):
+        """
+        Return an HtmlBlobs row (html_hash, codec, raw_size, data), or None if already stored.
+        The writer calls `remember()` once the row is committed.
+        """
+        if self.seen(html_hash):
+            return None
+        codec, data = self.compress(html_bytes)
+        return html_hash, codec, len(html_bytes), data
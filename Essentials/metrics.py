@@ -0,0 +1,219 @@
+import bisect
+import threading
+import time
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+OVERFLOW_LABEL = "_other"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """
+    Base for labelled metrics. Series are keyed by label values; past
+    `max_series` distinct label sets new ones are folded into "_other" so a
+    per-domain label cannot grow without bound. Updates come from the crawler
+    loop, reads from API threads, hence the lock.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels=(), max_series: int = 1000):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.max_series = max_series
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, label_values: dict) -> tuple:
+        key = tuple(str(label_values.get(name, "")) for name in self.labels)
+        if key not in self._series and len(self._series) >= self.max_series:
+            key = (OVERFLOW_LABEL,) * len(self.labels)
+        return key
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(tuple(str(labels.get(n, "")) for n in self.labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, "", value) for key, value in self._series.items()]
+
+    def snapshot(self):
+        with self._lock:
+            return {",".join(key) or "total": value for key, value in self._series.items()}
+
+
+class Gauge(_Metric):
+    """Gauge that is either set explicitly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels=(), max_series: int = 1000):
+        super().__init__(name, help_text, labels, max_series)
+        self._function = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = float(value)
+
+    def set_function(self, function):
+        """`function()` returns a number, or a {label_value_tuple: number} dict for labelled gauges."""
+        self._function = function
+
+    def _current(self) -> dict:
+        if self._function is None:
+            with self._lock:
+                return dict(self._series)
+        try:
+            result = self._function()
+        except Exception:
+            return {}
+        return result if isinstance(result, dict) else {(): float(result)}
+
+    def samples(self):
+        return [(self.name, key, "", value) for key, value in self._current().items()]
+
+    def snapshot(self):
+        return {",".join(key) or "value": value for key, value in self._current().items()}
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=DEFAULT_BUCKETS, max_series: int = 1000):
+        super().__init__(name, help_text, labels, max_series)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed wall time of its body."""
+        return _Timer(self, labels)
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, (counts, total, count) in self._series.items():
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    out.append((f"{self.name}_bucket", key, f'le="{bound}"', cumulative))
+                out.append((f"{self.name}_bucket", key, 'le="+Inf"', count))
+                out.append((f"{self.name}_sum", key, "", total))
+                out.append((f"{self.name}_count", key, "", count))
+        return out
+
+    def quantile(self, q: float, key: tuple) -> float | None:
+        """Bucket upper bound below which `q` of the observations fall (None if empty)."""
+        counts, _, count = self._series.get(key, (None, 0.0, 0))
+        if not count:
+            return None
+        target, cumulative = q * count, 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        with self._lock:
+            keys = list(self._series)
+        result = {}
+        for key in keys:
+            _, total, count = self._series[key]
+            result[",".join(key) or "all"] = {
+                "count": count,
+                "avg": round(total / count, 4) if count else 0.0,
+                "p50": self.quantile(0.5, key),
+                "p95": self.quantile(0.95, key),
+                "p99": self.quantile(0.99, key),
+            }
+        return result
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class MetricsRegistry:
+    """
+    In-process metrics registry.
+    - `counter()` / `gauge()` / `histogram()` return the existing metric when the
+      name is already registered, so modules can declare what they use at import time.
+    - `render_prometheus()` emits the text exposition format for /metrics.
+    - `snapshot()` is the JSON-friendly view for the API.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labels=(), **kwargs) -> Counter:
+        return self._register(Counter, name, help_text, labels, **kwargs)
+
+    def gauge(self, name: str, help_text: str, labels=(), **kwargs) -> Gauge:
+        return self._register(Gauge, name, help_text, labels, **kwargs)
+
+    def histogram(self, name: str, help_text: str, labels=(), **kwargs) -> Histogram:
+        return self._register(Histogram, name, help_text, labels, **kwargs)
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, key, extra, value in metric.samples():
+                lines.append(f"{sample_name}{_label_str(metric.labels, key, extra)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        return {metric.name: metric.snapshot() for metric in list(self._metrics.values())}
+
+
+REGISTRY = MetricsRegistry()
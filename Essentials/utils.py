@@ -1,8 +1,15 @@
-from urllib.parse import urlparse, urlunparse
+from urllib.parse import urlparse, urlsplit, urlunparse
+from functools import lru_cache
+import base64
+import binascii
 import hashlib
+import re
 from datetime import datetime, timedelta, timezone
 
 
+ONION_LABEL_RE = re.compile(r"^[a-z2-7]{16}$|^[a-z2-7]{56}$")
+
+
 def normalise_url(url) -> str:
 
     parsed_url = urlparse(url.strip())
@@ -30,13 +37,25 @@ def normalise_url(url) -> str:
     return urlunparse(normalized)
 
 
+@lru_cache(maxsize=65536)
 def remove_path_from_url(url:str) -> str:
-
+    """
+    Site root of a URL. Onion hosts are reduced to their service domain
+    (see `onion_domain`), so every subdomain of a service maps to one site.
+    """
     parsed_url = urlparse(url.strip())
 
+    netloc = parsed_url.netloc.lower()
+    if (parsed_url.hostname or "").rstrip(".").endswith(".onion"):
+        try:
+            port = parsed_url.port
+        except ValueError:
+            port = None
+        netloc = onion_domain(url) + (f":{port}" if port else "")
+
     normalized = parsed_url._replace(
         scheme=parsed_url.scheme.lower(),
-        netloc=parsed_url.netloc.lower(),
+        netloc=netloc,
         path='/',
         params="",
         query="",
@@ -45,3 +64,52 @@ def remove_path_from_url(url:str) -> str:
 
     return urlunparse(normalized)
 
+
+# ================= ONION HOSTS =================
+# Onion-aware replacement for tldextract: no public suffix list, no network access.
+
+@lru_cache(maxsize=65536)
+def onion_domain(url: str) -> str:
+    """
+    Service-level domain of a URL: "sub.abc...xyz.onion:80/x" → "abc...xyz.onion".
+    Non-onion hosts are returned lowercased as-is; unparsable input falls back to the URL.
+    """
+    try:
+        host = urlsplit(url.strip()).hostname or ""
+    except ValueError:
+        return url
+    host = host.rstrip(".")
+    if host.endswith(".onion"):
+        labels = host.split(".")
+        if len(labels) >= 2 and labels[-2]:
+            return f"{labels[-2]}.onion"
+    return host or url
+
+
+def is_valid_onion_address(url: str) -> bool:
+    """
+    True if the URL's onion address is well formed: a v2 (16 char) base32
+    label, or a v3 (56 char) label with version byte 3 and a valid checksum.
+    """
+    domain = onion_domain(url)
+    if not domain.endswith(".onion"):
+        return False
+    label = domain[: -len(".onion")]
+    if not ONION_LABEL_RE.match(label):
+        return False
+    if len(label) == 16:
+        return True
+    return _valid_v3_checksum(label)
+
+
+@lru_cache(maxsize=65536)
+def _valid_v3_checksum(label: str) -> bool:
+    try:
+        raw = base64.b32decode(label.upper())
+    except (binascii.Error, ValueError):
+        return False
+    pubkey, checksum, version = raw[:32], raw[32:34], raw[34:]
+    if version != b"\x03":
+        return False
+    expected = hashlib.sha3_256(b".onion checksum" + pubkey + version).digest()[:2]
+    return checksum == expected
@@ -22,7 +22,7 @@ class Main:
         pool = await asyncpg.create_pool(**DB_CONFIG)
 
         #2. Starting the linkmanager
-        link_manager = LinkManager(pool=pool)
+        link_manager = LinkManager(pool=pool, keywords=self.keywords)
 
         #3. Seed Collector
         SeedCollector(link_manager=link_manager, max_depth=self.seed_max_depth, max_pages=self.pages)
@@ -32,5 +32,6 @@ class Main:
         task = asyncio.create_task(crawler.start())
         await asyncio.sleep(60)
         await crawler.stop()
+        await task  # drains buffered page writes and the frontier checkpoint
         await pool.close()
 
@@ -29,7 +29,7 @@ async def test_crawler():
     finally:
         info("🛑 Stopping test crawler...")
         await crawler.stop()
-        crawler_task.cancel()
+        await crawler_task  # let buffered writes flush before the pool closes
 
     await pool.close()
     info("✅ UnifiedCrawler test completed successfully.")
@@ -0,0 +1,94 @@
+"""In-memory stand-ins for an asyncpg pool, enough for code that writes through it."""
+import re
+
+
+class FakeTransaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def __aenter__(self):
+        self.connection.staged = []
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        staged, self.connection.staged = self.connection.staged, None
+        if exc_type is None:
+            self.connection.pool.committed.extend(staged)
+        return False
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.staged = None  # writes of the open transaction
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    async def execute(self, query: str, *args):
+        self._write(query, [args])
+        return "OK"
+
+    async def executemany(self, query: str, rows):
+        self._write(query, rows)
+
+    async def copy_records_to_table(self, table: str, records, columns):
+        self._write(f"COPY {table}", records)
+
+    async def fetch(self, query: str, *args):
+        return self.pool.reader(query, args) if self.pool.reader else []
+
+    async def fetchrow(self, query: str, *args):
+        rows = await self.fetch(query, *args)
+        return rows[0] if rows else None
+
+    def _write(self, query: str, rows):
+        query = " ".join(query.split())
+        table = self.pool.table(query)
+        rows = [tuple(row) for row in rows]
+        for row in rows:
+            self.pool.statements += 1
+            rejected = self.pool.reject(table, row)
+            if rejected is not None:
+                raise rejected
+        target = self.staged if self.staged is not None else self.pool.committed
+        target.extend((table, row) for row in rows)
+
+
+class _Acquire:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        if self.pool.down:
+            raise ConnectionRefusedError("database unavailable")
+        return FakeConnection(self.pool)
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakePool:
+    """
+    `reject(table, row)` returns an exception for rows the "database" refuses;
+    committed writes are kept as (table, row) in `committed`.
+    """
+
+    TABLE = re.compile(r"^(?:INSERT INTO|UPDATE|COPY)\s+(\w+)", re.IGNORECASE)
+
+    def __init__(self, reject=None, reader=None):
+        self.reject = reject or (lambda table, row: None)
+        self.reader = reader
+        self.committed = []
+        self.statements = 0
+        self.down = False
+
+    def acquire(self):
+        return _Acquire(self)
+
+    def table(self, query: str) -> str:
+        match = self.TABLE.match(query)
+        return match.group(1) if match else query.split()[0].upper()
+
+    def rows(self, table: str) -> list[tuple]:
+        return [row for t, row in self.committed if t.lower() == table.lower()]
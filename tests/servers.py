@@ -0,0 +1,100 @@
+"""Local network stand-ins: an HTTP origin (aiohttp.web) and a SOCKS5 proxy in front of it."""
+import asyncio
+import struct
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+from Connector.connector import CircuitPool, TorEndpoint
+
+
+@asynccontextmanager
+async def http_server(routes: list[web.RouteDef]):
+    """Serve `routes` on a free localhost port; yields the base URL."""
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
+
+
+class FakeSocksServer:
+    """
+    Minimal SOCKS5 proxy (RFC 1928/1929) that, like Tor for onion addresses,
+    routes every CONNECT to one fixed origin whatever host was asked for.
+    Records the username of each connection, so tests can see which
+    isolation credentials carried a request.
+    """
+
+    def __init__(self, origin_port: int):
+        self.origin_port = origin_port
+        self.port = None
+        self.connects = []  # (username, requested host)
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            _, n_methods = await reader.readexactly(2)
+            methods = await reader.readexactly(n_methods)
+            username = None
+            if 2 in methods:
+                writer.write(b"\x05\x02")
+                _, ulen = await reader.readexactly(2)
+                username = (await reader.readexactly(ulen)).decode()
+                (plen,) = await reader.readexactly(1)
+                await reader.readexactly(plen)
+                writer.write(b"\x01\x00")
+            else:
+                writer.write(b"\x05\x00")
+
+            _, _, _, atyp = await reader.readexactly(4)
+            if atyp == 3:
+                (hlen,) = await reader.readexactly(1)
+                host = (await reader.readexactly(hlen)).decode()
+            else:
+                host = ".".join(str(b) for b in await reader.readexactly(4 if atyp == 1 else 16))
+            await reader.readexactly(2)  # requested port
+            self.connects.append((username, host))
+
+            upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", self.origin_port)
+            writer.write(b"\x05\x00\x00\x01" + bytes(4) + struct.pack("!H", 0))
+            await asyncio.gather(self._pipe(reader, upstream_writer), self._pipe(upstream_reader, writer))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+@asynccontextmanager
+async def onion_circuits(routes: list[web.RouteDef]):
+    """A CircuitPool whose only Tor endpoint is a FakeSocksServer in front of `routes`."""
+    async with http_server(routes) as origin:
+        async with FakeSocksServer(int(origin.rsplit(":", 1)[1])) as socks:
+            async with CircuitPool([TorEndpoint("127.0.0.1", socks.port)]) as circuits:
+                yield circuits
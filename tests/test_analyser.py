@@ -0,0 +1,98 @@
+import asyncio
+
+import asyncpg
+
+from Analysis.analyser import CACHE_FIELDS, PageAnalyzer
+from Analysis.translation import LocalBackend, TranslationBackend, Translator
+from fakes import FakePool
+
+
+def page_row(page_id: str, html: str) -> dict:
+    row = {"page_id": page_id, "site_id": "site-a", "html_hash": f"hash-{page_id}", "cached": False}
+    row.update({field: None for field in CACHE_FIELDS})
+    row.update({"raw_html": html.encode(), "codec": None, "blob": None, "raw_size": None})
+    return row
+
+
+def nul_rejected(table, row):
+    """PostgreSQL refuses NUL characters in text columns."""
+    if any(isinstance(value, str) and "\x00" in value for value in row):
+        return asyncpg.CharacterNotInRepertoireError('invalid byte sequence for encoding "UTF8": 0x00')
+    return None
+
+
+def test_one_poisoned_page_is_quarantined_and_the_rest_are_stored():
+    titles = ["Market", "Forum", "Bad\x00Title", "Shop", "Wiki"]
+    rows = [page_row(f"p{i}", f"<html><title>{title}</title><body>hello</body></html>") for i, title in enumerate(titles)]
+    pool = FakePool(reject=nul_rejected, reader=lambda query, args: rows if "FROM Pages" in query else [])
+    analyzer = PageAnalyzer(pool, translator=Translator(backend=LocalBackend()))
+
+    assert asyncio.run(analyzer.analyze_unprocessed_pages()) == 5
+
+    assert sorted(row[1] for row in pool.rows("Metadata")) == ["p0", "p1", "p3", "p4"]
+    assert sorted(row[0] for row in pool.rows("AnalysisCache")) == ["hash-p0", "hash-p1", "hash-p3", "hash-p4"]
+    (failure,) = pool.rows("AnalysisFailures")
+    assert failure[:3] == ("p2", "hash-p2", "write") and "CharacterNotInRepertoireError" in failure[3]
+    assert analyzer.stats()["pages_failed"] == 1
+
+
+class FailingBackend(TranslationBackend):
+    name = "failing"
+
+    def translate_batch(self, segments, source, target):
+        raise ConnectionError("translation service unavailable")
+
+
+def test_failed_translation_is_stored_but_not_cached():
+    spanish = (
+        "Bienvenidos a nuestra tienda. Enviamos productos a todos los paises del mundo. "
+        "Los pedidos se procesan en menos de dos dias y el soporte responde todas las preguntas."
+    )
+    rows = [page_row("p0", f"<html><title>Tienda</title><body><p>{spanish}</p></body></html>")]
+    pool = FakePool(reader=lambda query, args: rows if "FROM Pages" in query else [])
+    analyzer = PageAnalyzer(pool, translator=Translator(backend=FailingBackend()))
+
+    asyncio.run(analyzer.analyze_unprocessed_pages())
+
+    (metadata,) = pool.rows("Metadata")
+    assert metadata[9] == "es" and metadata[10] is None
+    assert pool.rows("AnalysisCache") == []
+
+
+def mirrored(rows: list[dict]) -> list[dict]:
+    """The same content crawled at several URLs (one html_hash)."""
+    return [{**row, "html_hash": "hash-shared"} for row in rows]
+
+
+def test_duplicates_of_a_failed_extraction_are_quarantined_with_it():
+    rows = mirrored([page_row(f"p{i}", "<html><title>Mirror</title></html>") for i in range(3)])
+    pool = FakePool(reader=lambda query, args: rows if "FROM Pages" in query else [])
+    analyzer = PageAnalyzer(pool, translator=Translator(backend=LocalBackend()))
+
+    async def crash(pages):
+        return [("error", page_id, "ValueError: parser crashed") for page_id, _, _ in pages]
+    analyzer.analysis_pool.analyze_batch = crash
+
+    asyncio.run(analyzer.analyze_unprocessed_pages())
+
+    assert pool.rows("Metadata") == []
+    assert sorted(row[:3] for row in pool.rows("AnalysisFailures")) == [
+        (f"p{i}", "hash-shared", "extract") for i in range(3)
+    ]
+    assert analyzer.stats()["pages_failed"] == 3
+
+
+def test_duplicates_of_a_failed_translation_are_left_for_a_retry():
+    spanish = (
+        "Bienvenidos a nuestra tienda. Enviamos productos a todos los paises del mundo. "
+        "Los pedidos se procesan en menos de dos dias y el soporte responde todas las preguntas."
+    )
+    rows = mirrored([page_row(f"p{i}", f"<html><body><p>{spanish}</p></body></html>") for i in range(3)])
+    pool = FakePool(reader=lambda query, args: rows if "FROM Pages" in query else [])
+    analyzer = PageAnalyzer(pool, translator=Translator(backend=FailingBackend()))
+
+    asyncio.run(analyzer.analyze_unprocessed_pages())
+
+    # Only the analysed page is stored; its mirrors are neither written nor quarantined
+    assert [row[1] for row in pool.rows("Metadata")] == ["p0"]
+    assert pool.rows("AnalysisFailures") == [] and pool.rows("AnalysisCache") == []
@@ -0,0 +1,79 @@
+import asyncio
+
+from aiohttp import web
+
+from Crawler.linkmanager import LinkManager
+from Crawler.unified_crawler import UnifiedCrawler
+from fakes import FakePool
+from servers import onion_circuits
+
+HTML = b"<html><body>listing</body></html>"
+
+
+def test_validators_are_cached_only_for_committed_pages():
+    pool = FakePool()
+    manager = LinkManager(pool, persist_frontier=False)
+    url = "http://a.onion/listing"
+
+    async def run():
+        await manager.get_page_validators(url)   # site validators cached (nothing stored yet)
+        pool.down = True
+        await manager.add_html_page(url, HTML, etag='"v1"')
+        await manager.write_buffer.flush()
+        # Write not persisted: the next visit must be a full fetch that stores the page
+        assert await manager.get_page_validators(url) is None
+        assert manager.conditional_headers(None) == {}
+        pool.down = False
+        await manager.write_buffer.flush()
+        return await manager.get_page_validators(url)
+    validators = asyncio.run(run())
+
+    assert validators[0] == '"v1"'
+    assert manager.conditional_headers(validators) == {"If-None-Match": '"v1"'}
+
+
+def test_not_modified_response_skips_the_store_and_follows_stored_links():
+    site = "http://" + "c" * 56 + ".onion"
+    page = f'<html><body><a href="{site}/next">next</a></body></html>'.encode()
+    conditional = []
+
+    async def listing(request):
+        conditional.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.Response(body=page, content_type="text/html", headers={"ETag": '"v1"'})
+
+    def stored_page(query, args):
+        # load_page_html reads the stored copy back for link extraction
+        if "WHERE p.page_id" in query:
+            return [{"html_hash": "h", "raw_html": page, "codec": None, "blob": None, "raw_size": len(page)}]
+        return []
+
+    pool = FakePool(reader=stored_page)
+    manager = LinkManager(pool, persist_frontier=False)
+    crawler = UnifiedCrawler(manager, polite_delay=0)
+    followed = []
+
+    async def follow(page_url, depth, priority=0.0):
+        followed.append(page_url)
+    manager.add_url_InnerLinksQueue = follow
+
+    async def run():
+        async with onion_circuits([web.get("/listing", listing)]) as circuits:
+            assert await crawler._process_url(circuits, f"{site}/listing", "InnerLink", 0) == "Alive"
+            await manager.write_buffer.flush()
+            writes = pool.statements
+            assert await crawler._process_url(circuits, f"{site}/listing", "InnerLink", 0) == "Alive"
+            assert manager.write_buffer.pending() == 0
+            await manager.write_buffer.flush()
+            return writes
+
+    writes = asyncio.run(run())
+
+    assert conditional == [None, '"v1"']
+    # Nothing was written for the 304: the page row was copied once, by the first fetch
+    assert pool.statements == writes and len(pool.rows("pages_staging")) == 1
+    assert manager.recrawl_stats["not_modified"] == 1 and manager.recrawl_stats["writes_skipped"] == 1
+    # The 304 fetch follows the same links as the full fetch, read from the stored copy
+    half = len(followed) // 2
+    assert f"{site}/next" in followed[:half] and followed[:half] == followed[half:]
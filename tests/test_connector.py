@@ -0,0 +1,96 @@
+import asyncio
+import socket
+
+from aiohttp import web
+
+from Connector.connector import CircuitPool, TorEndpoint, TorNetwork
+from servers import FakeSocksServer, http_server
+
+ONION = "a" * 56
+
+
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeController:
+    def __init__(self):
+        self.connects = 0
+        self.connected = False
+
+    async def connect(self, quiet: bool = False) -> bool:
+        self.connects += 1
+        self.connected = True
+        return True
+
+    async def wait_until_ready(self, timeout: float = 0.0) -> bool:
+        return True
+
+    async def close(self):
+        self.connected = False
+
+
+def test_tor_network_start_is_idempotent_and_counts_jobs_once():
+    controller = FakeController()
+    network = TorNetwork(circuit_pool=CircuitPool([TorEndpoint("127.0.0.1", 9)]), controller=controller)
+
+    async def run():
+        # Startup warm-up, then one job: the API checks readiness and the crawler starts
+        assert await network.start()
+        assert await network.start()
+        network.job_started()
+        assert await network.start()
+        await network.close()
+
+    asyncio.run(run())
+    assert controller.connects == 1
+    assert network.jobs_served == 1
+
+
+async def slow_page(request):
+    await asyncio.sleep(0.2)
+    return web.Response(text="<html>onion</html>", content_type="text/html")
+
+
+def test_circuit_pool_spreads_requests_over_isolated_socks_credentials():
+    async def run():
+        async with http_server([web.get("/", slow_page)]) as origin:
+            async with FakeSocksServer(int(origin.rsplit(":", 1)[1])) as socks:
+                endpoints = [TorEndpoint("127.0.0.1", socks.port, username=name, password=name) for name in ("a", "b")]
+                async with CircuitPool(endpoints) as pool:
+
+                    async def fetch():
+                        async with pool.get(f"http://{ONION}.onion/") as resp:
+                            return resp.status, await resp.text()
+
+                    results = await asyncio.gather(*(fetch() for _ in range(4)))
+                return results, socks.connects, endpoints
+
+    results, connects, endpoints = asyncio.run(run())
+    assert results == [(200, "<html>onion</html>")] * 4
+    # The onion name reaches the proxy unresolved, and concurrent requests use both circuits
+    assert {host for _, host in connects} == {f"{ONION}.onion"}
+    assert {username for username, _ in connects} == {"a", "b"}
+    assert [endpoint.requests for endpoint in endpoints] == [2, 2]
+
+
+def test_circuit_pool_routes_around_a_dead_endpoint():
+    async def run():
+        async with http_server([web.get("/", slow_page)]) as origin:
+            async with FakeSocksServer(int(origin.rsplit(":", 1)[1])) as socks:
+                dead, live = TorEndpoint("127.0.0.1", unused_port()), TorEndpoint("127.0.0.1", socks.port)
+                async with CircuitPool([dead, live]) as pool:
+                    statuses = []
+                    for _ in range(3):
+                        try:
+                            async with pool.get(f"http://{ONION}.onion/") as resp:
+                                statuses.append(resp.status)
+                        except CircuitPool.NETWORK_ERRORS:
+                            statuses.append("error")
+                return statuses, dead, live
+
+    statuses, dead, live = asyncio.run(run())
+    assert statuses == ["error", 200, 200]
+    assert dead.failures == 1 and live.requests == 2 and dead.score() < live.score()
@@ -0,0 +1,147 @@
+"""
+DistributedFrontier against a real PostgreSQL.
+Set ONIONTRACEX_TEST_DSN (e.g. postgresql://user@127.0.0.1/oniontracex_test) to run;
+Database/query.sql is applied to an empty database and the frontier tables are emptied.
+"""
+import asyncio
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import asyncpg
+import pytest
+
+from Crawler.distributed import DistributedFrontier
+from Crawler.frontier_store import FrontierStore
+
+DSN = os.environ.get("ONIONTRACEX_TEST_DSN")
+SCHEMA = Path(__file__).resolve().parents[1] / "Database" / "query.sql"
+
+pytestmark = pytest.mark.skipif(not DSN, reason="ONIONTRACEX_TEST_DSN is not set")
+
+
+async def reset_frontier():
+    connection = await asyncpg.connect(DSN)
+    try:
+        if await connection.fetchval("SELECT to_regclass('CrawlNodes') IS NULL;"):
+            await connection.execute(SCHEMA.read_text())
+        await connection.execute("TRUNCATE CrawlFrontier, CrawlDomains, CrawlNodes;")
+    finally:
+        await connection.close()
+
+
+def frontier(pool, node_id):
+    return DistributedFrontier(pool, node_id=node_id, polite_delay=0.0, poll_interval=0.05, flush_interval=0.05)
+
+
+async def drain(node_id: str) -> list[str]:
+    """Lease and release URLs until the shared frontier stays empty."""
+    leased = []
+    async with asyncpg.create_pool(DSN, min_size=1, max_size=2) as pool:
+        node = frontier(pool, node_id)
+        while (entry := await node.get(timeout=1.0)) is not None:
+            leased.append(entry[0])
+            node.release(entry[3])
+        await node.flush()
+    return leased
+
+
+def drain_in_process(node_id: str) -> list[str]:
+    return asyncio.run(drain(node_id))
+
+
+def test_no_url_is_leased_twice_across_processes():
+    urls = [f"http://site{d:02d}.onion/page{p}" for d in range(12) for p in range(10)]
+
+    async def seed():
+        await reset_frontier()
+        async with asyncpg.create_pool(DSN, min_size=1, max_size=1) as pool:
+            node = frontier(pool, "seeder")
+            for url in urls:
+                node.put(url.split("/")[2], url, "InnerLink")
+            await node.flush()
+
+    asyncio.run(seed())
+    with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context("spawn")) as executor:
+        results = list(executor.map(drain_in_process, [f"node-{i}" for i in range(4)]))
+
+    leased = Counter(url for result in results for url in result)
+    assert [url for url, n in leased.items() if n > 1] == []
+    assert sorted(leased) == sorted(urls)
+
+
+def test_rows_checkpointed_without_a_domain_become_leasable():
+    url = "http://legacy.onion/"
+
+    async def run():
+        await reset_frontier()
+        async with asyncpg.create_pool(DSN, min_size=1, max_size=1) as pool:
+            async with pool.acquire() as connection:
+                # A checkpoint row from before FrontierStore recorded domains
+                await connection.execute(
+                    "INSERT INTO CrawlFrontier (url, site_root, source, depth, state) VALUES ($1, $1, 'OuterLink', 0, 'queued');",
+                    url,
+                )
+            node = frontier(pool, "node")
+            node.put("legacy.onion", url, "OuterLink")
+            return await node.get(timeout=1.0)
+
+    assert asyncio.run(run()) == (url, "OuterLink", 0, "legacy.onion")
+
+
+def test_frontier_store_records_the_domain():
+    async def run():
+        await reset_frontier()
+        async with asyncpg.create_pool(DSN, min_size=1, max_size=1) as pool:
+            store = FrontierStore(pool)
+            store.record("http://shop.market.onion/item", "http://shop.market.onion/", "InnerLink", 1, "queued")
+            await store.flush()
+            async with pool.acquire() as connection:
+                return await connection.fetchval("SELECT domain FROM CrawlFrontier;")
+
+    assert asyncio.run(run()) == "market.onion"
+
+
+def test_domain_keeps_work_while_rows_are_queued():
+    urls = [f"http://shop.onion/item{i}" for i in range(3)]
+
+    async def run():
+        await reset_frontier()
+        async with asyncpg.create_pool(DSN, min_size=1, max_size=1) as pool:
+            node = frontier(pool, "node")
+            for url in urls:
+                node.put("shop.onion", url, "InnerLink")
+            states = []
+            for _ in urls:
+                entry = await node.get(timeout=1.0)
+                node.release(entry[3])
+                await node.flush()
+                await node.heartbeat()
+                states.append(node.has_work("shop.onion"))
+            return states
+
+    # The per-site crawl counter must survive releases until the domain is drained
+    assert asyncio.run(run()) == [True, True, False]
+
+
+def test_expired_lease_is_requeued_by_heartbeat():
+    url = "http://crashed.onion/"
+
+    async def run():
+        await reset_frontier()
+        async with asyncpg.create_pool(DSN, min_size=1, max_size=1) as pool:
+            crashed = frontier(pool, "crashed")
+            crashed.put("crashed.onion", url, "OuterLink")
+            assert await crashed.get(timeout=1.0) is not None
+            async with pool.acquire() as connection:
+                # The node died: its lease and domain lock run out without a release
+                await connection.execute("UPDATE CrawlFrontier SET lease_expires = NOW() - interval '1 second';")
+                await connection.execute("UPDATE CrawlDomains SET lock_expires = NOW() - interval '1 second';")
+            survivor = frontier(pool, "survivor")
+            before = await survivor.get(timeout=0.1)
+            await survivor.heartbeat()
+            return before, await survivor.get(timeout=1.0)
+
+    assert asyncio.run(run()) == (None, (url, "OuterLink", 0, "crashed.onion"))
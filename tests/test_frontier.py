@@ -0,0 +1,54 @@
+import asyncio
+
+from Crawler.frontier import FrontierScheduler
+from Crawler.priority import LinkScorer
+
+
+def drain(frontier: FrontierScheduler, n: int) -> list[str]:
+    async def run():
+        urls = []
+        for _ in range(n):
+            url, _, _, domain = await frontier.get(timeout=1.0)
+            frontier.release(domain)
+            urls.append(url)
+        return urls
+    return asyncio.run(run())
+
+
+def test_inner_links_before_outer_roots_at_any_depth():
+    scorer = LinkScorer()
+    frontier = FrontierScheduler(polite_delay=0.0)
+    frontier.put("b.onion", "http://b.onion/x", "InnerLink", 1, scorer.score(depth=1))
+    frontier.put("c.onion", "http://c.onion", "OuterLink", 0, scorer.score(depth=0))
+    frontier.put("a.onion", "http://a.onion/y/z", "InnerLink", 2, scorer.score(depth=2))
+    frontier.put("d.onion", "http://d.onion/1/2/3/4", "InnerLink", 4, scorer.score(depth=4))
+
+    assert drain(frontier, 4) == [
+        "http://b.onion/x", "http://a.onion/y/z", "http://d.onion/1/2/3/4", "http://c.onion",
+    ]
+
+
+def test_score_orders_within_a_group():
+    frontier = FrontierScheduler(polite_delay=0.0)
+    frontier.put("a.onion", "http://a.onion", "OuterLink", 0, 0.0)
+    frontier.put("b.onion", "http://b.onion", "OuterLink", 0, 2.0)
+    frontier.put("b.onion", "http://b.onion/p", "InnerLink", 1, -0.5)
+    frontier.put("b.onion", "http://b.onion/q", "InnerLink", 1, 3.0)
+
+    assert drain(frontier, 4) == ["http://b.onion/q", "http://b.onion/p", "http://b.onion", "http://a.onion"]
+
+
+def test_pending_counts_and_idle_domains_are_pruned():
+    frontier = FrontierScheduler(polite_delay=0.0)
+    for i in range(3):
+        frontier.put(f"d{i}.onion", f"http://d{i}.onion", "OuterLink", 0)
+    frontier.put("d0.onion", "http://d0.onion/a", "InnerLink", 1)
+    assert (frontier.pending_count(), frontier.pending_count(inner=True), frontier.pending_count(inner=False)) == (4, 1, 3)
+
+    drain(frontier, 4)
+    assert frontier.pending_count() == 0
+
+    async def prune():
+        assert await frontier.get(timeout=0.01) is None
+    asyncio.run(prune())
+    assert frontier.stats == {} and frontier._ready_at == {}
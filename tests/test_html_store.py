@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from Crawler.linkmanager import LinkManager
+from Essentials.html_store import HtmlStore
+from fakes import FakePool
+
+HTML = b"<html><body>same listing on two mirrors</body></html>"
+
+
+def test_blob_hash_is_known_only_after_a_committed_flush():
+    pool = FakePool()
+    manager = LinkManager(pool, persist_frontier=False)
+    pool.down = True
+
+    async def run():
+        await manager.add_html_page("http://a.onion/1", HTML)
+        await manager.write_buffer.flush()   # fails, rows kept
+        await manager.add_html_page("http://b.onion/1", HTML)
+        # The blob never reached the database, so the second page must not rely on it
+        assert not manager.html_store.seen(next(iter(manager.write_buffer._blobs)))
+        pool.down = False
+        await manager.write_buffer.flush()
+    asyncio.run(run())
+
+    assert len(pool.rows("HtmlBlobs")) == 1 and len(pool.rows("pages_staging")) == 2
+    assert manager.html_store.seen(pool.rows("HtmlBlobs")[0][0])
+
+
+def test_page_without_blob_is_an_error_not_an_empty_page():
+    store = HtmlStore(pool=None)
+    row = {"html_hash": "ab" * 32, "raw_html": None, "codec": None, "blob": None, "raw_size": None}
+    with pytest.raises(LookupError):
+        asyncio.run(store.page_html(row))
+    assert asyncio.run(store.page_html({**row, "raw_html": b"<p>legacy</p>"})) == b"<p>legacy</p>"
+
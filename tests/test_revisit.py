@@ -0,0 +1,28 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from Crawler.revisit import RevisitPolicy
+from fakes import FakePool
+
+NOW = datetime.now(timezone.utc)
+
+
+def site(url, never_visited, last_visit=None, intervals=0, changes=0, observed_hours=0.0, checks=0, alive=0):
+    return {
+        "url": url, "never_visited": never_visited, "last_visit": last_visit, "intervals": intervals,
+        "changes": changes, "observed_hours": observed_hours, "checks": checks, "alive": alive,
+    }
+
+
+def test_never_crawled_sites_are_always_due():
+    rows = [
+        # Imported seed: never crawled, even if a timestamp (e.g. OnionSites.last_seen) comes along
+        site("http://seed.onion", True, NOW - timedelta(hours=1)),
+        # Crawled an hour ago and stable: not due yet
+        site("http://stable.onion", False, NOW - timedelta(hours=1), intervals=10, changes=0,
+             observed_hours=240, checks=10, alive=10),
+    ]
+    policy = RevisitPolicy(FakePool(reader=lambda query, args: rows), budget_per_hour=1.0)
+
+    assert asyncio.run(policy.due_sites()) == ["http://seed.onion"]
+    assert policy.last_plan["never_crawled"] == 1
@@ -0,0 +1,122 @@
+import asyncio
+import base64
+import hashlib
+
+from aiohttp import web
+
+from Crawler.priority import LinkScorer
+from Crawler.seed import SeedCollector
+from servers import http_server
+
+
+def v3_label(pubkey: bytes) -> str:
+    checksum = hashlib.sha3_256(b".onion checksum" + pubkey + b"\x03").digest()[:2]
+    return base64.b32encode(pubkey + checksum + b"\x03").decode().lower()
+
+
+ONION = v3_label(bytes(range(32)))
+
+
+class FakeLinkManager:
+    def __init__(self):
+        self.scorer = LinkScorer()
+        self.copied = {}
+        self.added = []
+        self.stored = set()
+        self.queued = []
+
+    async def copy_sites_to_DB(self, sites, source, keyword=""):
+        new = [url for site_id, url in sites.items() if site_id not in self.copied]
+        self.copied.update(sites)
+        return new
+
+    async def add_urls_to_DB(self, rows):
+        self.added.extend(rows)
+        new = [url for url, _, _ in rows if url not in self.stored]
+        self.stored.update(url for url, _, _ in rows)
+        return new
+
+    async def add_url_LinksQueue(self, url, priority=0.0):
+        self.queued.append(url)
+
+
+def collector(link_manager):
+    return SeedCollector(link_manager, sources={})
+
+
+def test_overlong_host_is_not_cut_down_to_a_valid_onion(tmp_path):
+    seeds = tmp_path / "seeds.txt"
+    seeds.write_text(f"b{ONION}.onion\nhttp://x{ONION}.onion/page\n")
+    link_manager = FakeLinkManager()
+
+    stats = asyncio.run(collector(link_manager).import_file(str(seeds)))
+
+    assert stats["inserted"] == 0
+    assert link_manager.copied == {}
+
+
+def test_file_and_search_seeds_share_one_visited_representation(tmp_path):
+    seeds = tmp_path / "seeds.txt"
+    seeds.write_text(f"{ONION}.onion\n")
+    link_manager = FakeLinkManager()
+    seed_collector = collector(link_manager)
+
+    async def run():
+        await seed_collector.import_file(str(seeds))
+
+        async def search(source, template, keyword):
+            return source, keyword, [f"http://{ONION}.onion/about"]
+
+        seed_collector.sources = {"Local": "http://localhost/?q={query}"}
+        seed_collector._search_source = search
+        return await seed_collector.collect_keywords(["market"])
+
+    assert asyncio.run(run()) == 0
+    assert link_manager.added == []
+    assert list(link_manager.copied.values()) == [f"http://{ONION}.onion/"]
+
+
+def test_keywords_and_sources_are_collected_concurrently_from_local_sources():
+    other = v3_label(bytes(range(1, 33)))
+    in_flight, peak = 0, 0
+
+    async def search(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.1)
+        in_flight -= 1
+        found = ONION if request.query["q"] == "market" else other
+        return web.Response(text=f'<a href="http://{found}.onion/listing">x</a>', content_type="text/html")
+
+    link_manager = FakeLinkManager()
+
+    async def run():
+        async with http_server([web.get("/one", search), web.get("/two", search)]) as base:
+            sources = {"One": f"{base}/one?q={{query}}", "Two": f"{base}/two?q={{query}}"}
+            async with SeedCollector(link_manager, sources=sources, fan_out=4) as seed:
+                return await seed.collect_keywords(["market", "forum"])
+
+    assert asyncio.run(run()) == 2
+    # 2 keywords x 2 sources in flight together, one bulk insert, duplicates across sources dropped
+    assert peak == 4
+    assert sorted(url for url, _, _ in link_manager.added) == sorted(
+        [f"http://{ONION}.onion", f"http://{other}.onion"]
+    )
+
+
+def test_sites_already_stored_are_still_queued_on_a_new_run():
+    link_manager = FakeLinkManager()
+
+    async def search(source, template, keyword):
+        return source, keyword, [f"http://{ONION}.onion/about"]
+
+    async def run(seed_collector):
+        seed_collector.sources = {"Local": "http://localhost/?q={query}"}
+        seed_collector._search_source = search
+        return await seed_collector.collect_keywords(["market"])
+
+    # A second run (new collector, empty visited set) finds the same site already in OnionSites
+    assert asyncio.run(run(collector(link_manager))) == 1
+    assert asyncio.run(run(collector(link_manager))) == 0
+    assert link_manager.queued == [f"http://{ONION}.onion/"] * 2
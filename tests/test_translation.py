@@ -0,0 +1,55 @@
+import asyncio
+
+from Analysis.translation import LocalBackend, Translator
+
+
+class CountingBackend(LocalBackend):
+    """Local glossary backend that records every call and can be switched off."""
+
+    name = "counting"
+
+    def __init__(self, glossary=None):
+        super().__init__(glossary)
+        self.calls = []
+        self.down = False
+
+    def translate_batch(self, segments, source, target):
+        if self.down:
+            raise ConnectionError("translation service unavailable")
+        self.calls.append(list(segments))
+        return super().translate_batch(segments, source, target)
+
+
+def test_cached_segments_skip_the_backend():
+    backend = CountingBackend({"hola": "hello", "gracias": "thanks"})
+    translator = Translator(backend=backend)
+    pages = [(["hola mundo", "gracias"], "es"), (["hola mundo"], "es"), (["hello"], "en")]
+
+    async def run():
+        first = await translator.translate_pages(pages)
+        second = await translator.translate_pages([(["gracias", "hola mundo"], "es")])
+        return first, second
+
+    (texts, failed), (again, failed_again) = asyncio.run(run())
+
+    assert texts == ["hello mundo\nthanks", "hello mundo", None] and failed == set()
+    assert again == ["thanks\nhello mundo"] and failed_again == set()
+    # Shared segments went to the backend once, in one call; the repeat was served from memory
+    assert backend.calls == [["hola mundo", "gracias"]]
+    assert translator.stats()["memory_hits"] == 2
+
+
+def test_failed_translation_is_reported_and_not_cached():
+    backend = CountingBackend({"hola": "hello"})
+    translator = Translator(backend=backend)
+
+    async def run():
+        backend.down = True
+        failed_run = await translator.translate_pages([(["hola"], "es"), (["hi"], "en")])
+        backend.down = False
+        return failed_run, await translator.translate_pages([(["hola"], "es")])
+
+    (texts, failed), (retried, _) = asyncio.run(run())
+
+    assert texts == [None, None] and failed == {0}
+    assert retried == ["hello"] and backend.calls == [["hola"]]
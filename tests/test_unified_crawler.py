@@ -0,0 +1,63 @@
+import asyncio
+
+from aiohttp import web
+
+from Crawler.linkmanager import LinkManager
+from Crawler.unified_crawler import UnifiedCrawler
+from fakes import FakePool
+from servers import onion_circuits
+
+SITE = "http://" + "b" * 56 + ".onion"
+CAP = 256 * 1024
+
+
+async def endless_page(request):
+    resp = web.StreamResponse(headers={"Content-Type": "text/html"})
+    await resp.prepare(request)
+    chunk = b"<p>" + b"x" * 65_000 + b"</p>"
+    try:
+        while True:
+            await resp.write(chunk)
+    except (ConnectionError, RuntimeError):
+        return resp
+
+
+async def image(request):
+    return web.Response(body=b"\x89PNG" + bytes(100_000), content_type="image/png")
+
+
+def test_bodies_are_capped_and_non_html_is_skipped():
+    manager = LinkManager(FakePool(), persist_frontier=False)
+    crawler = UnifiedCrawler(manager, polite_delay=0, max_page_bytes=CAP)
+
+    async def run():
+        async with onion_circuits([web.get("/dump", endless_page), web.get("/logo.png", image)]) as circuits:
+            dump = await crawler._process_url(circuits, f"{SITE}/dump", "InnerLink", 1)
+            logo = await crawler._process_url(circuits, f"{SITE}/logo.png", "InnerLink", 1)
+        return dump, logo
+
+    assert asyncio.run(run()) == ("Alive", "Alive")
+    assert crawler.pages_truncated == 1 and crawler.bytes_fetched == CAP
+    assert crawler.non_html_skipped == 1
+    # Only the truncated HTML page is stored, with exactly `max_page_bytes` of content
+    (page,) = manager.write_buffer._pages.values()
+    (blob,) = manager.write_buffer._blobs.values()
+    assert page[2] == f"{SITE}/dump" and blob[2] == CAP
+
+
+def test_bodies_in_a_declared_charset_are_stored_as_utf8():
+    page = "<html><title>Магазин</title><body>Доставка</body></html>"
+
+    async def cyrillic(request):
+        return web.Response(body=page.encode("cp1251"), headers={"Content-Type": "text/html; charset=windows-1251"})
+
+    manager = LinkManager(FakePool(), persist_frontier=False)
+    crawler = UnifiedCrawler(manager, polite_delay=0)
+
+    async def run():
+        async with onion_circuits([web.get("/ru", cyrillic)]) as circuits:
+            assert await crawler._process_url(circuits, f"{SITE}/ru", "InnerLink", 1) == "Alive"
+        (blob,) = manager.write_buffer._blobs.values()
+        return await manager.html_store.decompress(blob[1], blob[3])
+
+    assert asyncio.run(run()).decode("utf-8") == page
@@ -0,0 +1,11 @@
+from Essentials.utils import onion_domain, remove_path_from_url
+
+
+def test_site_root_uses_the_onion_service_domain():
+    url = "http://Shop.Market.onion/item?id=1"
+
+    assert remove_path_from_url(url) == "http://market.onion/"
+    assert remove_path_from_url(url) == remove_path_from_url(f"http://{onion_domain(url)}/")
+    # The port still selects the service's virtual port; clearnet hosts are only lowercased
+    assert remove_path_from_url("http://market.onion:8080/a") == "http://market.onion:8080/"
+    assert remove_path_from_url("https://WWW.Example.com/x") == "https://www.example.com/"
@@ -0,0 +1,24 @@
+import sys
+
+from Crawler.visited import BloomVisitedSet, ExactVisitedSet, memory_per_million
+
+
+def test_exact_set_memory_is_tracked_as_items_are_added():
+    visited = ExactVisitedSet()
+    urls = [f"http://site{i}.onion/page" for i in range(1000)]
+    for url in urls + urls:
+        visited.add(url)
+
+    expected = sys.getsizeof(visited._items) + sum(sys.getsizeof(url) for url in urls)
+    assert len(visited) == 1000 and visited.memory_bytes() == expected
+
+
+def test_bloom_memory_per_million_is_against_capacity_not_fill():
+    visited = BloomVisitedSet(capacity=1_000_000, error_rate=0.01)
+    empty = memory_per_million(visited)
+    for i in range(10):
+        visited.add(f"http://site{i}.onion/")
+
+    # Ten entries do not make the fixed allocation look 100,000x larger per million
+    assert memory_per_million(visited) == empty
+    assert empty == visited.memory_bytes() / (1024 * 1024)
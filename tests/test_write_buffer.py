@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timezone
+
+import asyncpg
+
+from Crawler.write_buffer import CrawlWriteBuffer
+from fakes import FakePool
+
+NOW = datetime.now(timezone.utc)
+
+
+def orphan_page_rejected(table, row):
+    """Pages whose site was never inserted violate the OnionSites foreign key."""
+    if table in ("pages_staging", "Pages") and row[1] == "missing-site":
+        return asyncpg.ForeignKeyViolationError("site_id not present in OnionSites")
+    return None
+
+
+def fill(buffer: CrawlWriteBuffer):
+    buffer.add_site("site-a", "http://a.onion", "seed", "", NOW)
+    buffer.add_page("p1", "site-a", "http://a.onion/1", "h1", NOW, blob=("h1", "zlib", 3, b"abc"))
+    buffer.add_page("p2", "missing-site", "http://b.onion/2", "h1", NOW)
+    buffer.update_status("site-a", "Alive", NOW)
+
+
+def test_failed_flush_is_retried_then_written_row_by_row():
+    pool = FakePool(reject=orphan_page_rejected)
+    buffer = CrawlWriteBuffer(pool, max_retries=3)
+    flushed = []
+    buffer.on_flushed(lambda pages, blobs, dropped: flushed.append((pages, blobs, dropped)))
+    fill(buffer)
+
+    async def run():
+        await buffer.flush()
+        await buffer.flush()
+        # Nothing is lost while retrying the batch
+        assert buffer.pending() == 5 and pool.committed == [] and flushed == []
+        await buffer.flush()
+    asyncio.run(run())
+
+    assert buffer.pending() == 0
+    assert [row[0] for row in pool.rows("Pages")] == ["p1"]
+    assert pool.rows("OnionSites")[0][0] == "site-a" and len(pool.rows("HtmlBlobs")) == 1
+    assert buffer.rows_dropped == 1
+    (pages, blobs, dropped), = flushed
+    assert [p[0] for p in pages] == ["p1"] and [b[0] for b in blobs] == ["h1"] and [p[0] for p in dropped] == ["p2"]
+
+
+def test_rows_are_requeued_while_the_database_is_down():
+    pool = FakePool()
+    buffer = CrawlWriteBuffer(pool, max_retries=2)
+    fill(buffer)
+    pool.down = True
+
+    async def run():
+        for _ in range(4):
+            await buffer.flush()
+        assert buffer.pending() == 5
+        # Newer status buffered during the outage wins over the requeued one
+        buffer.update_status("site-a", "Dead", NOW)
+        pool.down = False
+        await buffer.flush()
+    asyncio.run(run())
+
+    assert buffer.pending() == 0 and buffer.rows_dropped == 0
+    assert [row[0] for row in pool.rows("OnionSites") if len(row) == 3] == ["Dead"]
+    assert {row[0] for row in pool.rows("pages_staging")} == {"p1", "p2"}